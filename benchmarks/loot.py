@@ -0,0 +1,693 @@
+#  Copyright 2019 Allan Galarza
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Benchmarks for the loot scanning functions.
+
+Compares the current implementations with the original pixel by pixel ones, checking that both give the same results.
+
+The synthetic benchmark composes inventory screenshots from the loot database's frames, so the whole scan can be
+measured without real screenshots, checking that the identified items are the ones placed. The parity check runs the
+original and current pixel helpers on the slots of these screenshots, failing if any stage gives different results.
+
+Usage:
+    python -m benchmarks.loot slots <screenshot> [<screenshot>...]
+    python -m benchmarks.loot helpers <screenshot> [<screenshot>...]
+    python -m benchmarks.loot synthetic [--images 20] [--seed 0]
+    python -m benchmarks.loot parity [--images 20] [--seed 0]
+"""
+import io
+import operator
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import click
+from PIL import Image
+
+from cogs import loot
+from cogs.loot import Loot, Pixel, number_blank, number_blank2, numbers, slot, slot_border
+
+SLOT_SPACING = 37
+"""Distance between the start of two consecutive slots in synthetic screenshots."""
+WINDOW_COLOR = (45, 45, 45, 255)
+"""Background color of synthetic screenshots."""
+
+
+def find_slots_reference(loot_image: Image.Image) -> List[Dict[str, Any]]:
+    """Original implementation of Loot.find_slots, used as reference."""
+    image_copy = loot_image.copy()
+    loot_bytes = loot_image.tobytes()
+    slot_list = []
+    if loot_image.size[0] < 34 or loot_image.size[1] < 27:
+        return slot_list
+
+    x = -1
+    y = 0
+    skip = False
+    for _ in loot_bytes:
+        x += 1
+        if x + 34 > image_copy.size[0]:
+            y += 1
+            x = 0
+        if y + 27 > image_copy.size[1]:
+            break
+        if skip:
+            skip = False
+        else:
+            if x + 34 != image_copy.size[0]:
+                skip = True
+            if image_copy.getpixel((x, y)) == slot_border[0]:
+                s = 0
+                diff = 0
+                diffmax = 1
+                xs = 0
+                ys = 0
+
+                if x != 0 and image_copy.getpixel((x - 1, y)) == slot_border[0]:
+                    x -= 1
+                    image_copy.putpixel((x + 1, y), (255, 0, 255, 0))
+                while diff < diffmax:
+                    if xs == 0 or xs == 33 or ys == 0 or ys == 33:
+                        if not image_copy.getpixel((x + xs, y + ys)) == slot_border[s] \
+                                and image_copy.getpixel((x + xs, y + ys)) not in [(24, 24, 24, 255),
+                                                                                  (55, 55, 55, 255),
+                                                                                  (57, 57, 57, 255),
+                                                                                  (75, 76, 76, 255),
+                                                                                  (255, 0, 255, 0)]:
+                            break
+                    s += 1
+                    xs += 1
+                    if xs == 34:
+                        xs = 0
+                        ys += 1
+                    if ys == 28:
+                        slot_list.append({'image': loot_image.crop((x + 1, y + 1, x + 33, y + 33)), 'x': x, 'y': y})
+                        image_copy.paste(Image.new("RGBA", (34, 34), (255, 255, 255, 255)), (x, y))
+                        x += 33
+                        break
+    return slot_list
+
+
+class ReferenceLoot:
+    """Original implementations of the Loot pixel helpers, used as reference."""
+
+    @classmethod
+    def is_transparent(cls, pixel: Pixel) -> bool:
+        """Checks if a pixel is transparent."""
+        if len(pixel) < 4:
+            return False
+        return pixel[3] == 0
+
+    @classmethod
+    def is_number(cls, pixel: Pixel) -> bool:
+        """Checks if a pixel is a number."""
+        return cls.is_transparent(pixel) and pixel[0] == 255 and pixel[1] == 255 and pixel[2] == 0
+
+    @classmethod
+    def is_white(cls, pixel: Pixel) -> bool:
+        """Checks if a pixel is white"""
+        return pixel[0] == 255 and pixel[1] == 255 and pixel[2] == 255
+
+    @classmethod
+    def is_background_color(cls, pixel: Pixel) -> bool:
+        low = 22
+        high = 60
+        color_diff = 15
+        return (pixel[0] >= low and pixel[1] >= low and pixel[2] >= low) \
+            and (pixel[0] <= high and pixel[1] <= high and pixel[2] <= high) \
+            and max(abs(pixel[0] - pixel[1]), abs(pixel[0] - pixel[2]), abs(pixel[1] - pixel[2])) < color_diff
+
+    @classmethod
+    def is_empty(cls, pixel: Pixel):
+        """Checks if a pixel can be considered empty."""
+        return cls.is_white(pixel) or cls.is_transparent(pixel) or cls.is_number(pixel)
+
+    @classmethod
+    def crop_item(cls, item_image: Image.Image, *, copy=False) -> Optional[Image.Image]:
+        """Removes the transparent border around item images.
+
+        :param item_image: The item's image, with no slot background.
+        :param copy: Whether to return a copy or alter the original
+        :return: The cropped's item's image.
+        """
+        if item_image is None:
+            return item_image
+        # Top
+        offset_top = 0
+        px = 0
+        py = 0
+        # Clear reference to previous item
+        if copy:
+            item_image = item_image.copy()
+        while py < item_image.size[1]:
+            item_image_pixel = item_image.getpixel((px, py))
+            if not (cls.is_empty(item_image_pixel)):
+                offset_top = py
+                break
+            px += 1
+            if px == item_image.size[0]:
+                py += 1
+                px = 0
+
+        # Bottom
+        offset_bottom = -1
+        px = item_image.size[0] - 1
+        py = item_image.size[1] - 1
+        while py > 0:
+            item_image_pixel = item_image.getpixel((px, py))
+            if not (cls.is_empty(item_image_pixel)):
+                offset_bottom = py
+                break
+            px -= 1
+            if px == 0:
+                py -= 1
+                px = item_image.size[0] - 1
+
+        # Left
+        offset_left = 0
+        px = 0
+        py = 0
+        while px < item_image.size[0]:
+            item_image_pixel = item_image.getpixel((px, py))
+            if not (cls.is_empty(item_image_pixel)):
+                offset_left = px
+                break
+            py += 1
+            if py == item_image.size[1]:
+                px += 1
+                py = 0
+        # Right
+        offset_right = -1
+        px = item_image.size[0] - 1
+        py = item_image.size[1] - 1
+        while px > 0:
+            item_image_pixel = item_image.getpixel((px, py))
+            if not (cls.is_empty(item_image_pixel)):
+                offset_right = px
+                break
+            py -= 1
+            if py == 0:
+                px -= 1
+                py = item_image.size[1] - 1
+        if offset_right == -1 or offset_bottom == -1:
+            return None
+        item_image = item_image.crop((offset_left, offset_top, offset_right + 1, offset_bottom + 1))
+        return item_image
+
+    @classmethod
+    def number_scan(cls, slot_image: Image.Image) -> Tuple[int, Any]:
+        """Scans a slot's image looking for amount digits
+
+        :param slot_image: The image of an inventory slot.
+        :return: A tuple containing the number parsed, the slot's image and the number's image.
+        """
+        digit_thousands = slot_image.crop((0, 20, 0 + 8, 20 + 7))
+        digit_hundreds = slot_image.crop((8, 20, 8 + 8, 20 + 7))
+        digit_tens = slot_image.crop((16, 20, 16 + 8, 20 + 7))
+        digit_units = slot_image.crop((24, 20, 24 + 8, 20 + 7))
+        item_numbers = [digit_thousands, digit_hundreds, digit_tens, digit_units]
+        number_string = ""
+        numbers_image = Image.new("RGBA", (32, 11), (255, 255, 255, 0))
+        a = 0
+        for item_number in item_numbers:
+            i = 0
+            for number in numbers:
+                px = 0
+                py = 0
+                while py < item_number.size[1] and py < number.size[1]:
+                    item_number_pixel = item_number.getpixel((px, py))
+                    number_pixel = number.getpixel((px, py))
+                    if not cls.is_transparent(number_pixel) and not item_number_pixel == number_pixel:
+                        break
+                    px += 1
+                    if px == item_number.size[0] or px == number.size[0]:
+                        py += 1
+                        px = 0
+                    if py == item_number.size[1]:
+                        if i > 9:
+                            i = "k"
+                        number_string += str(i)
+                        numbers_image.paste(number, (8 * a, 0))
+                        i = -1
+                        break
+                if i == -1:
+                    break
+                i += 1
+            a += 1
+        px = 0
+        py = 0
+        while py < numbers_image.size[1]:
+            numbers_image_pixel = numbers_image.getpixel((px, py))
+            if not cls.is_transparent(numbers_image_pixel):
+                slot_image.putpixel((px, py + 20), (255, 255, 0, 0))
+            px += 1
+            if px == numbers_image.size[0]:
+                py += 1
+                px = 0
+        return 1 if number_string == "" else int(number_string.replace("k", "000")), numbers_image
+
+    @classmethod
+    def make_transparent(cls, slot_item: Image.Image):
+        px = 0
+        py = 0
+        while py < slot_item.size[1] and py < 34:
+            slot_item_pixel = slot_item.getpixel((px, py))
+            if slot_item_pixel == (255, 0, 255, 255):
+                slot_item.putpixel((px, py), (255, 0, 255, 0))
+            px += 1
+            if px == slot_item.size[0] or px == 34:
+                py += 1
+                px = 0
+        return slot_item
+
+    @classmethod
+    def get_background_type(cls, lum):
+        """Guesses background color based on a pixels luminosity
+        """
+        if 24 < lum < 52:
+            return 'Normal'
+        elif 89 < lum < 94:
+            return 'Green'
+        elif 98 < lum < 101:
+            return 'Blue'
+        elif 110 < lum < 113:
+            return 'Violet'
+        elif 114 < lum < 124:
+            return 'Golden'
+        elif 126 < lum < 131:
+            return 'Gray'
+        return 'Other'
+
+    @classmethod
+    def clear_background(cls, slot_item: Image.Image, *, copy=False) -> Image.Image:
+        """Clears the slot's background of an image.
+
+        :param slot_item: The slot's image.
+        :param copy: Whether to create a copy or alter the original.
+
+        :returns: The item's image without the slot's background.
+        """
+        px = 0
+        py = 0
+        if copy:
+            slot_item = slot_item.copy()
+
+        background = {'Normal': 0, 'Gray': 0, 'Green': 0, 'Blue': 0, 'Violet': 0, 'Golden': 0, 'Other': -255}
+        for i in range(0, 32):
+            pixel = slot_item.getpixel((i, 0))
+            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
+            background[cls.get_background_type(lum)] += 1
+        for i in range(0, 32):
+            pixel = slot_item.getpixel((0, i))
+            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
+            background[cls.get_background_type(lum)] += 1
+        for i in range(0, 32):
+            pixel = slot_item.getpixel((31, i))
+            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
+            background[cls.get_background_type(lum)] += 1
+        # no point checking the last row since its always blanked out
+        # for i in range(0, 32):
+        #     pixel = slot_item.getpixel((i, 31))
+        #     lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
+        #     background[get_background_type(lum)]+=1
+        background_type = max(background.items(), key=operator.itemgetter(1))[0]
+        while py < slot_item.size[1] and py < slot[background_type].size[1]:
+            slot_item_pixel = slot_item.getpixel((px, py))
+            slot_pixel = slot[background_type].getpixel((px + 1, py + 1))
+            if slot_item_pixel[:3] == slot_pixel[:3]:
+                slot_item.putpixel((px, py), (255, 0, 255, 0))
+            px += 1
+            if px == slot_item.size[0] or px == slot[background_type].size[0]:
+                py += 1
+                px = 0
+        return slot_item
+
+    @classmethod
+    def get_item_size(cls, item: Image.Image) -> int:
+        """Gets the actual size of an item in pixels."""
+        size = item.size[0] * item.size[1]
+        empty = 0
+        px = 0
+        py = 0
+        while py < item.size[1]:
+            item_pixel = item.getpixel((px, py))
+            if not cls.is_empty(item_pixel):
+                size -= empty
+                empty = 0
+                px = 0
+                py += 1
+            else:
+                empty += 1
+                px += 1
+                if px == item.size[0]:
+                    size -= empty - 1
+                    empty = 0
+                    px = 0
+                    py += 1
+
+        empty = 0
+        px = item.size[0] - 1
+        py = 0
+        while py < item.size[1]:
+            item_pixel = item.getpixel((px, py))
+            if not cls.is_empty(item_pixel):
+                size -= empty
+                empty = 0
+                px = item.size[0] - 1
+                py += 1
+            else:
+                empty += 1
+                px -= 1
+                if px == -1:
+                    empty = 0
+                    px = item.size[0] - 1
+                    py += 1
+        return size
+
+    @classmethod
+    def get_item_color(cls, item: Image.Image) -> Tuple[int, int, int]:
+        """Gets the average color of an item.
+
+        :param item: The item's image
+        :return: The item's colors
+        """
+        count = 0
+        px = 0
+        py = 0
+        color = [0, 0, 0]
+        while py < item.size[1]:
+            item_pixel = item.getpixel((px, py))
+            if not (cls.is_empty(item_pixel) or cls.is_background_color(item_pixel)):
+                color[0] += item_pixel[0]
+                color[1] += item_pixel[1]
+                color[2] += item_pixel[2]
+                count += 1
+            px += 1
+            if px == item.size[0]:
+                px = 0
+                py += 1
+        if count == 0:
+            return 0, 0, 0
+        color[0] /= count
+        color[1] /= count
+        color[2] /= count
+        return int(color[0]), int(color[1]), int(color[2])
+
+
+def timed(func: Callable, *args, repeat=1) -> Tuple[Any, float]:
+    """Calls a function the specified times, returning its last result and the best time in seconds."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def slot_key(found_slot: Dict[str, Any]) -> Tuple[int, int, bytes]:
+    return found_slot["x"], found_slot["y"], found_slot["image"].tobytes()
+
+
+def image_key(image: Optional[Image.Image]) -> Optional[Tuple[str, Tuple[int, int], bytes]]:
+    if image is None:
+        return None
+    return image.mode, image.size, image.tobytes()
+
+
+def prepare_slot(helpers, slot_image: Image.Image) -> List[Tuple[str, Callable[[], Any], Callable[[Any], Any]]]:
+    """Gets the stages that a slot goes through when scanned, using the specified helpers.
+
+    Every stage has a name, a function that runs it and a function that converts its result into comparable values.
+    Stages must run in order, as they alter the slot's image like the scan does.
+    """
+    state = {"image": slot_image.copy()}
+
+    def number_scan():
+        return helpers.number_scan(state["image"])
+
+    def clear_background():
+        state["image"].paste(number_blank, None, number_blank2.convert("RGBA"))
+        state["image"] = helpers.clear_background(state["image"])
+        return state["image"]
+
+    def make_transparent():
+        state["image"] = helpers.make_transparent(state["image"])
+        return state["image"]
+
+    def crop_item():
+        state["crop"] = helpers.crop_item(state["image"])
+        return state["crop"]
+
+    def get_item_size():
+        return helpers.get_item_size(state["crop"]) if state["crop"] is not None else None
+
+    def get_item_color():
+        return helpers.get_item_color(state["crop"]) if state["crop"] is not None else None
+
+    return [
+        ("number_scan", number_scan, lambda r: (r[0], image_key(r[1]), image_key(state["image"]))),
+        ("clear_background", clear_background, image_key),
+        ("make_transparent", make_transparent, image_key),
+        ("crop_item", crop_item, image_key),
+        ("get_item_size", get_item_size, lambda r: r),
+        ("get_item_color", get_item_color, lambda r: r),
+    ]
+
+
+SlotTruth = Dict[Tuple[int, int], Tuple[str, int]]
+"""The name and count of the item placed in every slot of a synthetic screenshot, by the slot's position."""
+
+
+def draw_number(slot_image: Image.Image, count: int):
+    """Draws a stack count in the bottom right corner of a slot's image, like the game does."""
+    text = str(count)
+    start = 4 - len(text)
+    for i, digit in enumerate(text):
+        slot_image.paste(numbers[int(digit)], (8 * (start + i), 20), numbers[int(digit)])
+
+
+def compose_screenshot(frames: List[Dict[str, Any]], rng: random.Random, columns: int, rows: int,
+                       empty_ratio: float, stack_ratio: float) -> Tuple[bytes, SlotTruth]:
+    """Composes a synthetic inventory screenshot.
+
+    :param frames: The item frames to choose from.
+    :param rng: The random generator to use.
+    :param columns: The number of slot columns.
+    :param rows: The number of slot rows.
+    :param empty_ratio: The chance of a slot being empty.
+    :param stack_ratio: The chance of an item showing a stack count.
+    :return: The screenshot's PNG content and the items placed in every non empty slot.
+    """
+    width = columns * SLOT_SPACING + 4
+    height = rows * SLOT_SPACING + 4
+    screenshot = Image.new("RGBA", (width, height), WINDOW_COLOR)
+    border = Image.open("./images/slotborder.png").convert("RGBA")
+    truth = {}
+    for row in range(rows):
+        for column in range(columns):
+            x, y = 2 + column * SLOT_SPACING, 2 + row * SLOT_SPACING
+            slot_image = slot[rng.choice(list(slot))].convert("RGBA").crop((1, 1, 33, 33))
+            if rng.random() >= empty_ratio:
+                frame = rng.choice(frames)
+                slot_image.alpha_composite(frame["image"])
+                count = rng.randint(2, 100) if rng.random() < stack_ratio else 1
+                if count > 1:
+                    draw_number(slot_image, count)
+                truth[(x, y)] = (frame["name"], count)
+            tile = border.copy()
+            tile.paste(slot_image, (1, 1))
+            screenshot.paste(tile, (x, y))
+    output = io.BytesIO()
+    screenshot.save(output, format="png")
+    return output.getvalue(), truth
+
+
+def compare_helpers(slot_image: Image.Image, times: Dict[str, List[float]], mismatches: Dict[str, int]) -> List[str]:
+    """Runs a slot through the stages of a scan with the original and the current helpers, comparing every stage.
+
+    :param slot_image: The slot's image.
+    :param times: The accumulated time of every stage, for the original and current helpers, updated in place.
+    :param mismatches: The number of mismatches of every stage, updated in place.
+    :return: The names of the stages whose results didn't match.
+    """
+    mismatched = []
+    reference_stages = prepare_slot(ReferenceLoot, slot_image)
+    current_stages = prepare_slot(Loot, slot_image)
+    for (name, reference, key), (_, current, current_key) in zip(reference_stages, current_stages):
+        expected, reference_time = timed(reference)
+        result, current_time = timed(current)
+        stage_times = times.setdefault(name, [0.0, 0.0])
+        stage_times[0] += reference_time
+        stage_times[1] += current_time
+        if key(expected) != current_key(result):
+            mismatches[name] = mismatches.get(name, 0) + 1
+            mismatched.append(name)
+    return mismatched
+
+
+def echo_helper_times(times: Dict[str, List[float]], mismatches: Dict[str, int]):
+    """Shows the accumulated time and mismatches of every helper stage."""
+    for name, (reference_time, current_time) in times.items():
+        click.echo(f"{name} | reference: {reference_time:.4f}s | current: {current_time:.4f}s | "
+                   f"speedup: {reference_time/max(current_time, 1e-9):.1f}x | mismatches: {mismatches.get(name, 0)}")
+
+
+@click.group()
+def main():
+    pass
+
+
+@main.command()
+@click.argument("screenshots", nargs=-1, type=click.Path(exists=True, dir_okay=False), required=True)
+@click.option("-r", "--repeat", default=3, help="Times to run each implementation, the best time is shown.")
+def slots(screenshots, repeat):
+    """Benchmarks slot detection on the specified screenshots."""
+    total_reference = 0
+    total_current = 0
+    for path in screenshots:
+        loot_image = Loot.load_image(open(path, "rb").read())
+        expected, reference_time = timed(find_slots_reference, loot_image, repeat=repeat)
+        result, current_time = timed(Loot.find_slots, loot_image, repeat=repeat)
+        total_reference += reference_time
+        total_current += current_time
+        matches = [slot_key(s) for s in expected] == [slot_key(s) for s in result]
+        click.echo(f"{path} | {loot_image.size[0]}x{loot_image.size[1]} | {len(result)} slots | "
+                   f"reference: {reference_time:.4f}s | current: {current_time:.4f}s | "
+                   f"speedup: {reference_time/max(current_time, 1e-9):.1f}x | {'OK' if matches else 'MISMATCH'}")
+    click.echo(f"Total | reference: {total_reference:.4f}s | current: {total_current:.4f}s | "
+               f"speedup: {total_reference/max(total_current, 1e-9):.1f}x")
+
+
+@main.command()
+@click.argument("screenshots", nargs=-1, type=click.Path(exists=True, dir_okay=False), required=True)
+def helpers(screenshots):
+    """Checks and benchmarks the pixel helpers on the slots of the specified screenshots.
+
+    Every slot goes through the same stages as in a scan, using the original and the current helpers, comparing the
+    results of every stage."""
+    times: Dict[str, List[float]] = {}
+    mismatches: Dict[str, int] = {}
+    slot_count = 0
+    for path in screenshots:
+        loot_image = Loot.load_image(open(path, "rb").read())
+        for found_slot in Loot.find_slots(loot_image):
+            slot_count += 1
+            for name in compare_helpers(found_slot["image"], times, mismatches):
+                click.echo(f"{path} | slot at {found_slot['x']},{found_slot['y']} | {name} MISMATCH")
+    click.echo(f"{slot_count:,} slots checked")
+    echo_helper_times(times, mismatches)
+
+
+@main.command()
+@click.option("-n", "--images", default=20, help="Number of screenshots to compose.")
+@click.option("--min-slots", default=4, help="Minimum number of slot rows and columns.")
+@click.option("--max-slots", default=12, help="Maximum number of slot rows and columns.")
+@click.option("--empty", default=0.1, help="Chance of a slot being empty.")
+@click.option("--stacked", default=0.5, help="Chance of an item showing a stack count.")
+@click.option("--seed", default=0, help="Seed for the random generator, to compose the same screenshots.")
+def synthetic(images, min_slots, max_slots, empty, stacked, seed):
+    """Benchmarks the complete scan on synthetic screenshots.
+
+    Screenshots are composed from the loot database's frames and slot backgrounds, and then scanned like the loot
+    command does, in a single process. Slots per second, the time of every stage and the identification accuracy are
+    reported."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    frame_count = loot.load_worker_item_index()
+    click.echo(f"Item index built | {frame_count:,} frames | {time.perf_counter()-start:.2f}s")
+    frames = [frame for group in loot._worker_item_index.items.values() for frame in group
+              if frame["image"].size == (32, 32)]
+
+    stages = {"detection": 0.0, "identification": 0.0, "results": 0.0}
+    total_slots = 0
+    found_slots = 0
+    correct = 0
+    correct_count = 0
+    for i in range(images):
+        columns, rows = rng.randint(min_slots, max_slots), rng.randint(min_slots, max_slots)
+        image, truth = compose_screenshot(frames, rng, columns, rows, empty, stacked)
+
+        (_, slot_positions, _), elapsed = timed(loot.find_slot_positions, image)
+        stages["detection"] += elapsed
+        slot_results, elapsed = timed(loot.scan_slots, image, slot_positions)
+        stages["identification"] += elapsed
+        _, elapsed = timed(loot.build_scan_results, image, slot_positions, slot_results)
+        stages["results"] += elapsed
+
+        total_slots += columns * rows
+        found_slots += len(slot_positions)
+        for position, slot_result in zip(slot_positions, slot_results):
+            expected = truth.get(position)
+            item, count = (slot_result[0]["name"], slot_result[1]) if slot_result else (None, 0)
+            if expected is None:
+                correct += item is None
+                correct_count += item is None
+                continue
+            correct += item == expected[0]
+            correct_count += item == expected[0] and count == expected[1]
+        click.echo(f"Image {i+1} | {columns}x{rows} slots | {len(slot_positions)} found")
+
+    total_time = sum(stages.values())
+    click.echo(f"Slots found: {found_slots:,}/{total_slots:,}")
+    click.echo(f"Items identified: {correct/max(found_slots, 1):.2%} | with count: "
+               f"{correct_count/max(found_slots, 1):.2%}")
+    click.echo(f"Total time: {total_time:.4f}s | {found_slots/max(total_time, 1e-9):,.1f} slots/s")
+    for name, elapsed in stages.items():
+        click.echo(f"{name} | {elapsed:.4f}s | {elapsed/max(total_time, 1e-9):.1%}")
+
+
+@main.command()
+@click.option("-n", "--images", default=20, help="Number of screenshots to compose.")
+@click.option("--min-slots", default=4, help="Minimum number of slot rows and columns.")
+@click.option("--max-slots", default=12, help="Maximum number of slot rows and columns.")
+@click.option("--empty", default=0.1, help="Chance of a slot being empty.")
+@click.option("--stacked", default=0.5, help="Chance of an item showing a stack count.")
+@click.option("--seed", default=0, help="Seed for the random generator, to compose the same screenshots.")
+def parity(images, min_slots, max_slots, empty, stacked, seed):
+    """Checks that the original and current helpers give the same results on synthetic screenshots.
+
+    Slot detection and every stage of the helpers are compared on the slots of the composed screenshots, so no real
+    screenshots are needed. Exits with a non zero status if any result doesn't match."""
+    rng = random.Random(seed)
+    loot.load_worker_item_index()
+    frames = [frame for group in loot._worker_item_index.items.values() for frame in group
+              if frame["image"].size == (32, 32)]
+
+    times: Dict[str, List[float]] = {}
+    mismatches: Dict[str, int] = {}
+    slot_count = 0
+    for i in range(images):
+        columns, rows = rng.randint(min_slots, max_slots), rng.randint(min_slots, max_slots)
+        image, _ = compose_screenshot(frames, rng, columns, rows, empty, stacked)
+        loot_image = Loot.load_image(image)
+        found_slots = Loot.find_slots(loot_image)
+        if [slot_key(s) for s in find_slots_reference(loot_image)] != [slot_key(s) for s in found_slots]:
+            mismatches["find_slots"] = mismatches.get("find_slots", 0) + 1
+            click.echo(f"Image {i+1} | find_slots MISMATCH")
+        for found_slot in found_slots:
+            slot_count += 1
+            for name in compare_helpers(found_slot["image"], times, mismatches):
+                click.echo(f"Image {i+1} | slot at {found_slot['x']},{found_slot['y']} | {name} MISMATCH")
+    click.echo(f"{images:,} images | {slot_count:,} slots checked")
+    echo_helper_times(times, mismatches)
+    if mismatches:
+        click.echo(f"Mismatches found: {sum(mismatches.values()):,}")
+        raise SystemExit(1)
+    click.echo("All results match.")
+
+
+if __name__ == "__main__":
+    main()
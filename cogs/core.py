@@ -23,6 +23,7 @@ import discord
 from discord.ext import commands
 
 from cogs.utils.database import DbChar
+from cogs.utils.database_migration import create_partitions
 from nabbot import NabBot
 from .utils import CogUtils, config, context, errors, join_list, database, timing
 
@@ -37,10 +38,12 @@ class Core(commands.Cog, CogUtils):
     def __init__(self, bot: NabBot):
         self.bot = bot
         self.game_update_task = self.bot.loop.create_task(self.game_update())
+        self.partition_maintenance_task = self.bot.loop.create_task(self.partition_maintenance())
 
     def cog_unload(self):
         log.info(f"{self.tag} Unloading cog")
         self.game_update_task.cancel()
+        self.partition_maintenance_task.cancel()
 
     async def game_update(self):
         """Updates the bot's status.
@@ -89,6 +92,25 @@ class Core(commands.Cog, CogUtils):
                 continue
             await asyncio.sleep(60*20)  # Change game every 20 minutes
 
+    async def partition_maintenance(self):
+        """Creates the upcoming monthly partitions of the partitioned tables.
+
+        Partitions are checked once a day, so they always exist before entries for that month are inserted.
+        """
+        tag = f"{self.tag}[partition_maintenance]"
+        await self.bot.wait_until_ready()
+        log.info(f"{tag} Task started")
+        while not self.bot.is_closed():
+            try:
+                async with self.bot.pool.acquire() as conn:
+                    await create_partitions(conn)
+            except asyncio.CancelledError:
+                log.info(f"{tag} Stopped")
+                return
+            except Exception:
+                log.exception(f"{tag} Exception")
+            await asyncio.sleep(60*60*24)
+
     # region Discord events
 
     @commands.Cog.listener()
@@ -12,18 +12,26 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import asyncio
+import bisect
+import collections
+import hashlib
 import io
 import logging
+import math
 import operator
 import os
 import pickle
 import sqlite3
 import time
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import closing
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
 
 import aiohttp
+import cachetools
 import discord
+import numpy as np
 from PIL import Image
 from discord.ext import commands
 
@@ -31,7 +39,7 @@ from nabbot import NabBot
 from .utils import FIELD_VALUE_LIMIT, checks, CogUtils
 from .utils.config import config
 from .utils.context import NabCtx
-from .utils.database import wiki_db
+from .utils.database import SqliteDatabase, connect_sqlite, wiki
 from .utils.messages import split_message
 
 log = logging.getLogger("nabbot")
@@ -73,10 +81,52 @@ group_images: Dict[str, Image.Image] = {'Green Djinn': Image.open("./images/Gree
 scan_speed = [0.035]*10
 MIN_HEIGHT = 27  # Images with a width
 MIN_WIDTH = 34   # or height smaller than this are not considered.
+MIN_CHUNK_SIZE = 8
+"""Minimum number of slots scanned by each process at a time."""
+
+# Scan results, by the hash of the scanned image. Limited by the total size of the overlay images, in bytes.
+CACHE_SCANS = cachetools.LRUCache(32 * 1024 * 1024, getsizeof=lambda scan: len(scan[1]))
+# Hashes of the pixels of scanned images, by the hash of the image's file.
+CACHE_IMAGE_HASHES = cachetools.LRUCache(1024)
+# Slot results, by the hash of the slot's image.
+CACHE_SLOTS = cachetools.LRUCache(5000)
+# Images of the frames of an item and their information, by the searched name.
+CACHE_ITEM_STRIPS = cachetools.LRUCache(128)
 
 Pixel = Tuple[int, ...]
 
 
+def image_to_array(image: Image.Image) -> np.ndarray:
+    """Converts an image into a 2D array, where every RGBA pixel is packed into a single 32-bit integer.
+
+    :param image: The image to convert.
+    :return: A writable array of shape (height, width).
+    """
+    return np.array(image.convert("RGBA"), dtype=np.uint8).view(np.uint32)[..., 0]
+
+
+def pack_colors(colors: List[Pixel]) -> np.ndarray:
+    """Packs a list of RGBA colors into 32-bit integers, so they can be compared with arrays from image_to_array.
+
+    :param colors: The list of RGBA colors.
+    :return: An array containing the packed colors.
+    """
+    return np.array(colors, dtype=np.uint8).reshape(-1, 4).view(np.uint32)[:, 0]
+
+
+# Offsets of the pixels of the slot's border that are compared when looking for slots.
+_slot_border_offsets = [(xs, ys) for ys in range(28) for xs in range(34) if xs == 0 or xs == 33 or ys == 0]
+SLOT_BORDER_X, SLOT_BORDER_Y = np.array(_slot_border_offsets).T
+SLOT_BORDER_COLORS = pack_colors([slot_border[ys * 34 + xs] for xs, ys in _slot_border_offsets])
+SLOT_BORDER_START = pack_colors([slot_border[0]])[0]
+# Colors that are ignored when comparing borders.
+# This is a workaround to ignore the bottom-left border of containers, as well as the pixels flagged while scanning.
+SLOT_BORDER_IGNORED = pack_colors([(24, 24, 24, 255), (55, 55, 55, 255), (57, 57, 57, 255), (75, 76, 76, 255),
+                                   (255, 0, 255, 0)])
+SLOT_FLAG = pack_colors([(255, 0, 255, 0)])[0]
+SLOT_FILL = pack_colors([(255, 255, 255, 255)])[0]
+
+
 def dict_factory(cursor, row):
     """Makes values returned by cursor fetch functions return a dictionary instead of a tuple.
     To implement this, the connection's row_factory method must be replaced by this one."""
@@ -86,18 +136,269 @@ def dict_factory(cursor, row):
     return d
 
 
+def image_pixels(image: Image.Image) -> np.ndarray:
+    """Gets the pixels of an image as a writable array of RGBA values, of shape (height, width, 4)."""
+    return np.array(image.convert("RGBA"), dtype=np.uint8)
+
+
+def empty_mask(pixels: np.ndarray) -> np.ndarray:
+    """Gets the mask of the pixels considered empty: white, transparent or numbers.
+
+    :param pixels: An array of RGBA pixels.
+    :return: A boolean array, true where pixels are empty.
+    """
+    return np.all(pixels[..., :3] == 255, axis=-1) | (pixels[..., 3] == 0)
+
+
+def background_mask(pixels: np.ndarray) -> np.ndarray:
+    """Gets the mask of the pixels that have a color similar to a slot's background.
+
+    :param pixels: An array of RGBA pixels.
+    :return: A boolean array, true where pixels have a background color.
+    """
+    low = 22
+    high = 60
+    color_diff = 15
+    rgb = pixels[..., :3].astype(np.int16)
+    in_range = np.all((rgb >= low) & (rgb <= high), axis=-1)
+    diff = np.maximum(np.maximum(np.abs(rgb[..., 0] - rgb[..., 1]), np.abs(rgb[..., 0] - rgb[..., 2])),
+                      np.abs(rgb[..., 1] - rgb[..., 2]))
+    return in_range & (diff < color_diff)
+
+
+def pixel_masks(image: Image.Image) -> Tuple[np.ndarray, np.ndarray]:
+    """Gets the masks of the empty pixels and the number pixels of an image.
+
+    :param image: The image to check.
+    :return: A tuple containing the empty pixels mask and the number pixels mask.
+    """
+    pixels = image_pixels(image)
+    number = (pixels[..., 3] == 0) & (pixels[..., 0] == 255) & (pixels[..., 1] == 255) & (pixels[..., 2] == 0)
+    return empty_mask(pixels), number
+
+
+# The first 7 rows of the digits, which are the ones shown in slots, and the mask of their visible pixels.
+DIGIT_PIXELS = np.stack([image_to_array(number)[:7] for number in numbers])
+DIGIT_MASKS = np.stack([image_pixels(number)[:7, :, 3] != 0 for number in numbers])
+SLOT_PIXELS: Dict[str, np.ndarray] = {k: np.asarray(v.convert("RGB")) for k, v in slot.items()}
+
+
+ItemKey = Tuple[int, int, int, int, int, int]
+"""The values used to narrow down item frames: width, height, size and average color (red, green and blue)."""
+
+
+class ItemIndex:
+    """Index of the item frames in the loot database.
+
+    Frames are decoded once and grouped by their :data:`ItemKey`, storing the mask of their empty pixels, so they can
+    be compared against a slot's image all at once."""
+    def __init__(self):
+        self.items: Dict[ItemKey, List[Dict[str, Any]]] = {}
+        """The items in every group, in the same order as they are stored in the database."""
+        self.masks: Dict[ItemKey, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        """For every group, the empty masks of the frames, stacked by frame size, and their positions in the group."""
+
+    def __len__(self):
+        return sum(len(v) for v in self.items.values())
+
+    @classmethod
+    def from_database(cls, path: str) -> 'ItemIndex':
+        """Builds the index from all the item frames in a loot database.
+
+        :param path: The path to the loot database.
+        :return: The built index.
+        """
+        with closing(connect_sqlite(path, row_factory=dict_factory)) as conn:
+            rows = conn.execute("SELECT * FROM Items").fetchall()
+        index = cls()
+        frames: Dict[ItemKey, Dict[Tuple[int, int], Tuple[List[np.ndarray], List[int]]]] = {}
+        for row in rows:
+            key = (row["sizeX"], row["sizeY"], row["size"], row["red"], row["green"], row["blue"])
+            row["image"] = Image.open(io.BytesIO(bytearray(pickle.loads(row["frame"])))).convert("RGBA")
+            group = index.items.setdefault(key, [])
+            empty, _ = pixel_masks(row["image"])
+            masks, positions = frames.setdefault(key, {}).setdefault(empty.shape, ([], []))
+            masks.append(empty)
+            positions.append(len(group))
+            group.append(row)
+        for key, shapes in frames.items():
+            index.masks[key] = [(np.stack(masks), np.array(positions)) for masks, positions in shapes.values()]
+        return index
+
+    def scan_item(self, slot_item: Image.Image, key: ItemKey) -> Union[Dict[str, Any], str]:
+        """Looks for a slot's item among the items with the same size and color.
+
+        Only the shape of the frames is compared. Empty pixels must be empty on both images, except where the slot
+        has numbers.
+
+        :param slot_item: The slot's image, without its background.
+        :param key: The size and color of the slot's cropped item.
+        :return: The matched item, represented in a dictionary.
+        """
+        if slot_item is None:
+            return "Empty"
+        slot_empty, slot_number = pixel_masks(slot_item)
+        match = None
+        for masks, positions in self.masks.get(key, []):
+            height = min(masks.shape[1], slot_empty.shape[0])
+            width = min(masks.shape[2], slot_empty.shape[1])
+            item_empty = masks[:, :height, :width]
+            mismatch = (item_empty != slot_empty[:height, :width]) & (item_empty | ~slot_number[:height, :width])
+            matches = ~mismatch.reshape(len(masks), -1).any(axis=1)
+            if matches.any():
+                position = int(positions[matches.argmax()])
+                match = position if match is None else min(match, position)
+        if match is None:
+            return "Unknown"
+        return self.items[key][match]
+
+
 class LootScanException(commands.CommandError):
     pass
 
 
+class LootJob:
+    """A loot scan requested by a user.
+
+    :ivar ctx: The context of the command that requested the scan.
+    :ivar image: The image's byte content.
+    :ivar status_msg: The message used to display the scan's status.
+    :ivar position: The last queue position shown to the user.
+    :ivar scan_time: The time the scan took, not counting the time it spent queued.
+    :ivar future: A future with the scan results, or the exception raised while scanning.
+    :ivar task: The task running the scan, once it has started.
+    """
+    def __init__(self, ctx: NabCtx, image: bytes, status_msg: discord.Message):
+        self.ctx = ctx
+        self.image = image
+        self.status_msg = status_msg
+        self.position = 0
+        self.scan_time = 0.0
+        self.future: asyncio.Future = ctx.bot.loop.create_future()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def user_id(self) -> int:
+        return self.ctx.author.id
+
+
+class LootQueue:
+    """Queue of loot scans, limiting how many scans run at the same time.
+
+    Users take turns, so a user with many pending scans doesn't delay the scans of other users.
+
+    :ivar max_scans: The maximum number of scans running at the same time.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_scans: int,
+                 run: Callable[[LootJob], Awaitable[Any]],
+                 on_position: Callable[[LootJob], Awaitable[None]]):
+        self.loop = loop
+        self.max_scans = max_scans
+        self._run = run
+        self._on_position = on_position
+        self._pending: Dict[int, Deque[LootJob]] = collections.OrderedDict()
+        self._running: List[LootJob] = []
+
+    def __len__(self):
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    @property
+    def waiting(self) -> List[LootJob]:
+        """The jobs waiting to run, in the order they will run."""
+        queues = [list(jobs) for jobs in self._pending.values()]
+        waiting = []
+        for i in range(max(map(len, queues), default=0)):
+            waiting.extend(jobs[i] for jobs in queues if i < len(jobs))
+        return waiting
+
+    def add(self, job: LootJob):
+        """Adds a job to the queue, starting it right away if possible."""
+        self._pending.setdefault(job.user_id, collections.deque()).append(job)
+        self._update()
+
+    def cancel(self, user_id: int) -> int:
+        """Cancels all the pending jobs of a user.
+
+        Jobs that are already running can't be cancelled, as their work keeps running in the worker processes and
+        their slot wouldn't be freed until it's done.
+
+        :param user_id: The id of the user.
+        :return: The number of jobs cancelled.
+        """
+        jobs = list(self._pending.pop(user_id, []))
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_exception(LootScanException("Your scan was cancelled."))
+        self._update()
+        return len(jobs)
+
+    def cancel_all(self):
+        """Cancels all the pending and running jobs, meant to be used when the queue is no longer used."""
+        for user_id in list(self._pending):
+            self.cancel(user_id)
+        for job in self._running:
+            job.task.cancel()
+
+    def _update(self):
+        """Starts jobs while there are free slots and notifies waiting jobs of their new positions."""
+        while len(self._running) < self.max_scans and self._pending:
+            user_id, jobs = next(iter(self._pending.items()))
+            job = jobs.popleft()
+            # Move the user to the end of the line
+            del self._pending[user_id]
+            if jobs:
+                self._pending[user_id] = jobs
+            self._running.append(job)
+            job.task = self.loop.create_task(self._run_job(job))
+        for position, job in enumerate(self.waiting, 1):
+            if job.position != position:
+                job.position = position
+                self.loop.create_task(self._on_position(job))
+
+    async def _run_job(self, job: LootJob):
+        start_time = time.time()
+        try:
+            result = await self._run(job)
+            job.scan_time = time.time() - start_time
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.set_exception(LootScanException("Your scan was cancelled."))
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._running.remove(job)
+            self._update()
+
+
 class Loot(commands.Cog, CogUtils):
     def __init__(self, bot: NabBot):
         self.bot = bot
         self.processing_users = []
         if not os.path.isfile(LOOTDB):
             raise FileNotFoundError("Couldn't find loot database. Can't start cog.")
-        self.loot_conn = sqlite3.connect(LOOTDB)
-        self.loot_conn.row_factory = dict_factory
+        self.loot_db = SqliteDatabase(LOOTDB, row_factory=dict_factory)
+        self.workers = config.loot_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.item_index_task = self.bot.loop.create_task(self.load_item_index())
+        self.scan_queue = LootQueue(self.bot.loop, config.loot_max_scans, self.run_job, self.show_queue_position)
+
+    def cog_unload(self):
+        log.info(f"{self.tag} Unloading cog")
+        self.item_index_task.cancel()
+        self.scan_queue.cancel_all()
+        self.executor.shutdown(wait=False)
+        self.loot_db.close()
+
+    async def load_item_index(self):
+        """Builds the index of item frames in the loot database on every worker process."""
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*[self.bot.loop.run_in_executor(self.executor, load_worker_item_index)
+                                       for _ in range(self.workers)])
+        log.info(f"{self.tag} Item index built | {sizes[0]:,} frames | {self.workers} workers "
+                 f"| {time.perf_counter()-start:.2f}s")
 
     @checks.can_embed()
     @commands.group(invoke_without_command=True, case_insensitive=True)
@@ -144,23 +445,34 @@ class Loot(commands.Cog, CogUtils):
             await ctx.error("I failed to load your image. Please try again.")
             return
 
-        await ctx.send(f"I've begun parsing your image, **@{ctx.author.display_name}**. "
-                       "Please be patient, this may take a few moments.")
-        status_msg = await ctx.send("Status: Reading")
-        try:
-            # Owners are not affected by the limit.
-            self.processing_users.append(ctx.author.id)
-            start_time = time.time()
-            loot_list, loot_image_overlay = await self.loot_scan(ctx, loot_image, status_msg)
-            scan_time = time.time() - start_time
-        except LootScanException as e:
-            await ctx.error(e)
-            log.exception("loot")
-            return
-        finally:
-            self.processing_users.remove(ctx.author.id)
+        # Images scanned before are answered right away, without waiting in the queue.
+        cached = CACHE_SCANS.get(CACHE_IMAGE_HASHES.get(file_hash(loot_image)))
+        if cached:
+            log.debug(f"{self.tag} Found scan results in cache.")
+            loot_list, loot_image_overlay = cached
+            scan_time = None
+        else:
+            await ctx.send(f"I've begun parsing your image, **@{ctx.author.display_name}**. "
+                           "Please be patient, this may take a few moments.")
+            status_msg = await ctx.send("Status: Reading")
+            job = LootJob(ctx, loot_image, status_msg)
+            try:
+                # Owners are not affected by the limit.
+                self.processing_users.append(ctx.author.id)
+                self.scan_queue.add(job)
+                loot_list, loot_image_overlay = await job.future
+                scan_time = job.scan_time
+            except LootScanException as e:
+                await ctx.error(e)
+                log.exception("loot")
+                return
+            finally:
+                self.processing_users.remove(ctx.author.id)
         embed = discord.Embed(color=discord.Color.blurple())
-        embed.set_footer(text=f"Loot scanned in {scan_time:,.2f} seconds.")
+        if scan_time is None:
+            embed.set_footer(text="Loot scanned previously.")
+        else:
+            embed.set_footer(text=f"Loot scanned in {scan_time:,.2f} seconds.")
         long_message = f"These are the results for your image: [{attachment.filename}]({attachment.url})"
 
         if len(loot_list) == 0:
@@ -181,6 +493,7 @@ class Loot(commands.Cog, CogUtils):
             if not loot_list[item]['group'] in groups and loot_list[item]['group'] != "Unknown":
                 groups.append(loot_list[item]['group'])
         has_marketable = False
+        imbuement_items = await wiki.run(self.get_imbuement_items, list(loot_list))
         for group in groups:
             value = ""
             group_value = 0
@@ -189,13 +502,7 @@ class Loot(commands.Cog, CogUtils):
                     if group == "No Value":
                         value += f"x{loot_list[item]['count']} {item}\n"
                     else:
-                        with closing(wiki_db.cursor()) as c:
-                            c.execute("""SELECT item.name FROM item
-                                         LEFT JOIN item_attribute att on item_id = item.article_id
-                                         WHERE item.name LIKE ? AND article_id = item_id AND att.name = 'imbuement'
-                                         LIMIT 1""", (item,))
-                            result = c.fetchone()
-                        if result:
+                        if item in imbuement_items:
                             has_marketable = True
                             emoji = "💎"
                         else:
@@ -248,6 +555,14 @@ class Loot(commands.Cog, CogUtils):
             else:
                 await ctx.send(short_message)
 
+    @loot.command(name="cancel")
+    async def loot_cancel(self, ctx: NabCtx):
+        """Cancels your pending loot scans."""
+        count = self.scan_queue.cancel(ctx.author.id)
+        if not count:
+            return await ctx.error("You don't have any pending scans.")
+        await ctx.success(f"Cancelled {count:,} scans." if count > 1 else "Your scan was cancelled.")
+
     @loot.command(name="legend", aliases=["help", "symbols", "symbol"])
     async def loot_legend(self, ctx: NabCtx):
         """Shows the meaning of the overlayed icons."""
@@ -289,6 +604,16 @@ class Loot(commands.Cog, CogUtils):
         """
         return Image.open(io.BytesIO(bytearray(image_bytes))).convert("RGBA")
 
+    async def run_job(self, job: LootJob):
+        """Runs a loot scan from the queue."""
+        return await self.loot_scan(job.ctx, job.image, job.status_msg)
+
+    async def show_queue_position(self, job: LootJob):
+        """Shows a job's position in the queue in its status message."""
+        await self.update_status(job.status_msg, f"{config.loading_emoji} Waiting in queue, position "
+                                                 f"**{job.position:,}**.\n"
+                                                 f"Use `{job.ctx.clean_prefix}loot cancel` to cancel.")
+
     @classmethod
     async def update_status(cls, msg: discord.Message, status: str):
         """ Updates the status message.
@@ -303,261 +628,122 @@ class Loot(commands.Cog, CogUtils):
             pass
 
     async def loot_scan(self, ctx: NabCtx, image: bytes, status_msg: discord.Message):
+        """Scans a loot image on the worker processes.
+
+        Slots are found first, and then they are split in chunks that are identified in parallel.
+
+        :param ctx: The invocation context.
+        :param image: The image's byte content.
+        :param status_msg: The message used to display the scan's status.
+        :return: A tuple containing the found items and the overlay image's bytes.
+        """
         try:
-            loot_image = await ctx.execute_async(self.load_image, image)
+            await self.item_index_task
+        except asyncio.CancelledError:
+            raise
         except Exception:
-            raise LootScanException("Either that wasn't an image or I failed to load it, please try again.")
-
+            log.exception(f"{self.tag} Couldn't build item index")
+            raise LootScanException("I couldn't load the item database, please try again later.")
         await self.update_status(status_msg, "Detecting item slots")
+        try:
+            image_hash, slot_positions, slot_hashes = await self.bot.loop.run_in_executor(self.executor,
+                                                                                         find_slot_positions, image)
+        except Exception:
+            raise LootScanException("Either that wasn't an image or I failed to load it, please try again.")
 
-        slot_list = await ctx.execute_async(self.find_slots, loot_image)
-        if not slot_list:
+        if not slot_positions:
             raise LootScanException("I couldn't find any inventory slots in your image."
                                     " Make sure your image is not stretched out or that overscaling is off.")
-        loot_list = {}
-        await self.update_status(status_msg, f"{len(slot_list)+1:,} slots found.\n"
+        CACHE_IMAGE_HASHES[file_hash(image)] = image_hash
+        # The same pixels may come in a different file
+        cached = CACHE_SCANS.get(image_hash)
+        if cached:
+            log.debug(f"{self.tag} Found scan results in cache.")
+            await self.update_status(status_msg, "Complete!")
+            return cached
+        # Slots already seen in previous scans, or repeated in this image, are not identified again.
+        slot_results = {h: CACHE_SLOTS[h] for h in set(slot_hashes) if h in CACHE_SLOTS}
+        pending = [slot_hashes.index(h) for h in dict.fromkeys(slot_hashes) if h not in slot_results]
+        await self.update_status(status_msg, f"{len(slot_positions)+1:,} slots found.\n"
                                              f"{config.loading_emoji} Identifying items...\n"
-                                             f"Estimated time: {(len(slot_list)+1)*(sum(scan_speed)/10):.2f} seconds.")
+                                             f"Estimated time: {(len(pending)+1)*(sum(scan_speed)/10):.2f} "
+                                             f"seconds.")
         start_time = time.time()
-        for i, found_slot in enumerate(slot_list):
-            found_item = found_slot['image']
-            found_item_number, item_number_image = await ctx.execute_async(self.number_scan, found_slot['image'])
-
-            found_item.paste(number_blank, None, number_blank2.convert("RGBA"))
-            found_item_clear = await ctx.execute_async(self.clear_background, found_item)
-            found_item_clear = self.make_transparent(found_item_clear)
-
-            found_item_crop = await ctx.execute_async(self.crop_item, found_item_clear)
-
-            # Check if the slot is empty
-            if found_item_crop is None:
-                continue
-
-            found_item_size = await ctx.execute_async(self.get_item_size, found_item_crop)
-            found_item_color = await ctx.execute_async(self.get_item_color, found_item_crop)
-
-            results = self.loot_conn.execute(
-                "SELECT * FROM Items WHERE sizeX = ? AND sizeY = ?  AND size = ? "
-                "AND red = ? AND green = ? AND blue = ?",
-                (found_item_crop.size[0], found_item_crop.size[1], found_item_size,
-                 found_item_color[0], found_item_color[1], found_item_color[2]))
-            item_list = list(results)
-
-            result = await ctx.execute_async(self.scan_item, found_item_clear, item_list)
-
-            if result == "Unknown":
-                unknown_image = await ctx.execute_async(self.clear_background, found_slot['image'])
-                unknown_image_crop = await ctx.execute_async(self.crop_item, unknown_image, copy=True)
-                unknown_image_size = await ctx.execute_async(self.get_item_size, unknown_image_crop)
-                result = {'name': "Unknown",
-                          'group': "Unknown",
-                          'value_sell': 0,
-                          'frame': unknown_image_crop,
-                          'sizeX': unknown_image_crop.size[0],
-                          'sizeY': unknown_image_crop.size[1],
-                          'size': unknown_image_size}
-                found_item_number = 1
-            if isinstance(result, dict):
-                if result['name'] in loot_list:
-                    loot_list[result['name']]['count'] += found_item_number
-                else:
-                    loot_list[result['name']] = {'count': found_item_number, 'group': result['group'],
-                                                 'value_sell': result['value_sell']}
-
-                if result['group'] != "Unknown":
-                    detect = pickle.loads(result['frame'])
-                    detect = Image.open(io.BytesIO(bytearray(detect)))
-                    loot_image.paste(slot['Normal'], (found_slot['x'], found_slot['y']))
-                    detect = Image.alpha_composite(loot_image.crop(
-                        (found_slot['x'] + 1, found_slot['y'] + 1, found_slot['x'] + 33, found_slot['y'] + 33)), detect)
-                    if found_item_number > 1:
-                        num = Image.new("RGBA", (32, 32), (255, 255, 255, 0))
-                        num.paste(item_number_image, (0, 20))
-                        detect = Image.alpha_composite(detect, num)
-                    loot_image.paste(detect, (found_slot['x'] + 1, found_slot['y'] + 1))
-
-                overlay = Image.alpha_composite(
-                    loot_image.crop((found_slot['x'], found_slot['y'], found_slot['x'] + 34, found_slot['y'] + 34)),
-                    group_images.get(result['group'], group_images['Other']) if result['value_sell'] > 0 or result[
-                        'group'] == "Unknown" else
-                    group_images['NoValue'])
-                loot_image.paste(overlay, (found_slot['x'], found_slot['y']))
-        total_time = time.time() - start_time
-        scan_speed.pop()
-        scan_speed.insert(0, total_time/(len(slot_list)+1))
+        chunk_size = max(MIN_CHUNK_SIZE, math.ceil(len(pending) / self.workers))
+        chunks = [[slot_positions[i] for i in pending[j:j + chunk_size]] for j in range(0, len(pending), chunk_size)]
+        results = await asyncio.gather(*[self.bot.loop.run_in_executor(self.executor, scan_slots, image, chunk)
+                                         for chunk in chunks])
+        for i, slot_result in zip(pending, (result for chunk_results in results for result in chunk_results)):
+            slot_results[slot_hashes[i]] = CACHE_SLOTS[slot_hashes[i]] = slot_result
+        if pending:
+            total_time = time.time() - start_time
+            scan_speed.pop()
+            scan_speed.insert(0, total_time/(len(pending)+1))
         await self.update_status(status_msg, "Complete!")
-        img_byte_arr = io.BytesIO()
-        await ctx.execute_async(loot_image.save, img_byte_arr, format="png")
-        img_byte_arr = img_byte_arr.getvalue()
-        return loot_list, img_byte_arr
-
-    @classmethod
-    def is_transparent(cls, pixel: Pixel) -> bool:
-        """Checks if a pixel is transparent."""
-        if len(pixel) < 4:
-            return False
-        return pixel[3] == 0
-
-    @classmethod
-    def is_number(cls, pixel: Pixel) -> bool:
-        """Checks if a pixel is a number."""
-        return cls.is_transparent(pixel) and pixel[0] == 255 and pixel[1] == 255 and pixel[2] == 0
-
-    @classmethod
-    def is_white(cls, pixel: Pixel) -> bool:
-        """Checks if a pixel is white"""
-        return pixel[0] == 255 and pixel[1] == 255 and pixel[2] == 255
-
-    @classmethod
-    def is_background_color(cls, pixel: Pixel) -> bool:
-        low = 22
-        high = 60
-        color_diff = 15
-        return (pixel[0] >= low and pixel[1] >= low and pixel[2] >= low) \
-            and (pixel[0] <= high and pixel[1] <= high and pixel[2] <= high) \
-            and max(abs(pixel[0] - pixel[1]), abs(pixel[0] - pixel[2]), abs(pixel[1] - pixel[2])) < color_diff
-
-    @classmethod
-    def is_empty(cls, pixel: Pixel):
-        """Checks if a pixel can be considered empty."""
-        return cls.is_white(pixel) or cls.is_transparent(pixel) or cls.is_number(pixel)
+        scan = await ctx.execute_async(build_scan_results, image, slot_positions,
+                                       [slot_results[slot_hash] for slot_hash in slot_hashes])
+        CACHE_SCANS[image_hash] = scan
+        return scan
 
     @classmethod
     def crop_item(cls, item_image: Image.Image, *, copy=False) -> Optional[Image.Image]:
         """Removes the transparent border around item images.
 
+        The bottom and right borders are searched ignoring the first row and column.
+
         :param item_image: The item's image, with no slot background.
         :param copy: Whether to return a copy or alter the original
         :return: The cropped's item's image.
         """
         if item_image is None:
             return item_image
-        # Top
-        offset_top = 0
-        px = 0
-        py = 0
         # Clear reference to previous item
         if copy:
             item_image = item_image.copy()
-        while py < item_image.size[1]:
-            item_image_pixel = item_image.getpixel((px, py))
-            if not (cls.is_empty(item_image_pixel)):
-                offset_top = py
-                break
-            px += 1
-            if px == item_image.size[0]:
-                py += 1
-                px = 0
-
-        # Bottom
-        offset_bottom = -1
-        px = item_image.size[0] - 1
-        py = item_image.size[1] - 1
-        while py > 0:
-            item_image_pixel = item_image.getpixel((px, py))
-            if not (cls.is_empty(item_image_pixel)):
-                offset_bottom = py
-                break
-            px -= 1
-            if px == 0:
-                py -= 1
-                px = item_image.size[0] - 1
-
-        # Left
-        offset_left = 0
-        px = 0
-        py = 0
-        while px < item_image.size[0]:
-            item_image_pixel = item_image.getpixel((px, py))
-            if not (cls.is_empty(item_image_pixel)):
-                offset_left = px
-                break
-            py += 1
-            if py == item_image.size[1]:
-                px += 1
-                py = 0
-        # Right
-        offset_right = -1
-        px = item_image.size[0] - 1
-        py = item_image.size[1] - 1
-        while px > 0:
-            item_image_pixel = item_image.getpixel((px, py))
-            if not (cls.is_empty(item_image_pixel)):
-                offset_right = px
-                break
-            py -= 1
-            if py == 0:
-                px -= 1
-                py = item_image.size[1] - 1
-        if offset_right == -1 or offset_bottom == -1:
+        filled = ~empty_mask(image_pixels(item_image))
+        inner = filled[1:, 1:]
+        inner_rows = np.flatnonzero(inner.any(axis=1))
+        if not len(inner_rows):
             return None
-        item_image = item_image.crop((offset_left, offset_top, offset_right + 1, offset_bottom + 1))
-        return item_image
+        inner_columns = np.flatnonzero(inner.any(axis=0))
+        offset_top = int(filled.any(axis=1).argmax())
+        offset_left = int(filled.any(axis=0).argmax())
+        offset_bottom = int(inner_rows[-1]) + 1
+        offset_right = int(inner_columns[-1]) + 1
+        return item_image.crop((offset_left, offset_top, offset_right + 1, offset_bottom + 1))
 
     @classmethod
     def number_scan(cls, slot_image: Image.Image) -> Tuple[int, Any]:
         """Scans a slot's image looking for amount digits
 
+        The digits found are marked in the slot's image as transparent yellow pixels.
+
         :param slot_image: The image of an inventory slot.
         :return: A tuple containing the number parsed, the slot's image and the number's image.
         """
-        digit_thousands = slot_image.crop((0, 20, 0 + 8, 20 + 7))
-        digit_hundreds = slot_image.crop((8, 20, 8 + 8, 20 + 7))
-        digit_tens = slot_image.crop((16, 20, 16 + 8, 20 + 7))
-        digit_units = slot_image.crop((24, 20, 24 + 8, 20 + 7))
-        item_numbers = [digit_thousands, digit_hundreds, digit_tens, digit_units]
+        pixels = image_to_array(slot_image)
+        # Split the digits row into the thousands, hundreds, tens and units digit
+        digits = pixels[20:27, :32].reshape(7, 4, 8).transpose(1, 0, 2)
+        matches = np.all(~DIGIT_MASKS | (digits[:, None] == DIGIT_PIXELS), axis=(2, 3))
         number_string = ""
         numbers_image = Image.new("RGBA", (32, 11), (255, 255, 255, 0))
-        a = 0
-        for item_number in item_numbers:
-            i = 0
-            for number in numbers:
-                px = 0
-                py = 0
-                while py < item_number.size[1] and py < number.size[1]:
-                    item_number_pixel = item_number.getpixel((px, py))
-                    number_pixel = number.getpixel((px, py))
-                    if not cls.is_transparent(number_pixel) and not item_number_pixel == number_pixel:
-                        break
-                    px += 1
-                    if px == item_number.size[0] or px == number.size[0]:
-                        py += 1
-                        px = 0
-                    if py == item_number.size[1]:
-                        if i > 9:
-                            i = "k"
-                        number_string += str(i)
-                        numbers_image.paste(number, (8 * a, 0))
-                        i = -1
-                        break
-                if i == -1:
-                    break
-                i += 1
-            a += 1
-        px = 0
-        py = 0
-        while py < numbers_image.size[1]:
-            numbers_image_pixel = numbers_image.getpixel((px, py))
-            if not cls.is_transparent(numbers_image_pixel):
-                slot_image.putpixel((px, py + 20), (255, 255, 0, 0))
-            px += 1
-            if px == numbers_image.size[0]:
-                py += 1
-                px = 0
+        for a, digit_matches in enumerate(matches):
+            if not digit_matches.any():
+                continue
+            i = int(digit_matches.argmax())
+            number_string += "k" if i > 9 else str(i)
+            numbers_image.paste(numbers[i], (8 * a, 0))
+        number_pixels = image_pixels(slot_image.crop((0, 20, 32, 31)))
+        number_pixels[image_pixels(numbers_image)[..., 3] != 0] = (255, 255, 0, 0)
+        slot_image.paste(Image.fromarray(number_pixels, "RGBA"), (0, 20))
         return 1 if number_string == "" else int(number_string.replace("k", "000")), numbers_image
 
     @classmethod
     def make_transparent(cls, slot_item: Image.Image):
-        px = 0
-        py = 0
-        while py < slot_item.size[1] and py < 34:
-            slot_item_pixel = slot_item.getpixel((px, py))
-            if slot_item_pixel == (255, 0, 255, 255):
-                slot_item.putpixel((px, py), (255, 0, 255, 0))
-            px += 1
-            if px == slot_item.size[0] or px == 34:
-                py += 1
-                px = 0
+        width, height = min(slot_item.size[0], 34), min(slot_item.size[1], 34)
+        pixels = image_pixels(slot_item.crop((0, 0, width, height)))
+        pixels[np.all(pixels == (255, 0, 255, 255), axis=-1), 3] = 0
+        slot_item.paste(Image.fromarray(pixels, "RGBA"), (0, 0))
         return slot_item
 
     @classmethod
@@ -587,82 +773,37 @@ class Loot(commands.Cog, CogUtils):
 
         :returns: The item's image without the slot's background.
         """
-        px = 0
-        py = 0
         if copy:
             slot_item = slot_item.copy()
+        pixels = image_pixels(slot_item)
 
-        background = {'Normal': 0, 'Gray': 0, 'Green': 0, 'Blue': 0, 'Violet': 0, 'Golden': 0, 'Other': -255}
-        for i in range(0, 32):
-            pixel = slot_item.getpixel((i, 0))
-            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
-            background[cls.get_background_type(lum)] += 1
-        for i in range(0, 32):
-            pixel = slot_item.getpixel((0, i))
-            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
-            background[cls.get_background_type(lum)] += 1
-        for i in range(0, 32):
-            pixel = slot_item.getpixel((31, i))
-            lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
-            background[cls.get_background_type(lum)] += 1
+        # The background is guessed using the top, left and right borders.
         # no point checking the last row since its always blanked out
-        # for i in range(0, 32):
-        #     pixel = slot_item.getpixel((i, 31))
-        #     lum = (0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
-        #     background[get_background_type(lum)]+=1
+        edges = np.concatenate([pixels[0, :32, :3], pixels[:32, 0, :3], pixels[:32, 31, :3]]).astype(np.float64)
+        lums = 0.299 * edges[:, 0] + 0.587 * edges[:, 1] + 0.114 * edges[:, 2]
+        background = {'Normal': 0, 'Gray': 0, 'Green': 0, 'Blue': 0, 'Violet': 0, 'Golden': 0, 'Other': -255}
+        for background_type, count in collections.Counter(map(cls.get_background_type, lums.tolist())).items():
+            background[background_type] += count
         background_type = max(background.items(), key=operator.itemgetter(1))[0]
-        while py < slot_item.size[1] and py < slot[background_type].size[1]:
-            slot_item_pixel = slot_item.getpixel((px, py))
-            slot_pixel = slot[background_type].getpixel((px + 1, py + 1))
-            if slot_item_pixel[:3] == slot_pixel[:3]:
-                slot_item.putpixel((px, py), (255, 0, 255, 0))
-            px += 1
-            if px == slot_item.size[0] or px == slot[background_type].size[0]:
-                py += 1
-                px = 0
+
+        height, width = min(pixels.shape[0], 33), min(pixels.shape[1], 33)
+        background_pixels = SLOT_PIXELS[background_type][1:height + 1, 1:width + 1]
+        region = pixels[:height, :width]
+        region[np.all(region[..., :3] == background_pixels, axis=-1)] = (255, 0, 255, 0)
+        slot_item.paste(Image.fromarray(pixels, "RGBA"), (0, 0))
         return slot_item
 
     @classmethod
     def get_item_size(cls, item: Image.Image) -> int:
-        """Gets the actual size of an item in pixels."""
-        size = item.size[0] * item.size[1]
-        empty = 0
-        px = 0
-        py = 0
-        while py < item.size[1]:
-            item_pixel = item.getpixel((px, py))
-            if not cls.is_empty(item_pixel):
-                size -= empty
-                empty = 0
-                px = 0
-                py += 1
-            else:
-                empty += 1
-                px += 1
-                if px == item.size[0]:
-                    size -= empty - 1
-                    empty = 0
-                    px = 0
-                    py += 1
-
-        empty = 0
-        px = item.size[0] - 1
-        py = 0
-        while py < item.size[1]:
-            item_pixel = item.getpixel((px, py))
-            if not cls.is_empty(item_pixel):
-                size -= empty
-                empty = 0
-                px = item.size[0] - 1
-                py += 1
-            else:
-                empty += 1
-                px -= 1
-                if px == -1:
-                    empty = 0
-                    px = item.size[0] - 1
-                    py += 1
-        return size
+        """Gets the actual size of an item in pixels.
+
+        Empty pixels at the start and end of every row are not counted. Rows that are completely empty count as a
+        single pixel."""
+        filled = ~empty_mask(image_pixels(item))
+        has_pixels = filled.any(axis=1)
+        leading = filled.argmax(axis=1)
+        trailing = filled[:, ::-1].argmax(axis=1)
+        return int(filled.size - np.where(has_pixels, leading + trailing, filled.shape[1] - 1).sum())
 
     @classmethod
     def get_item_color(cls, item: Image.Image) -> Tuple[int, int, int]:
@@ -671,137 +812,138 @@ class Loot(commands.Cog, CogUtils):
         :param item: The item's image
         :return: The item's colors
         """
-        count = 0
-        px = 0
-        py = 0
-        color = [0, 0, 0]
-        while py < item.size[1]:
-            item_pixel = item.getpixel((px, py))
-            if not (cls.is_empty(item_pixel) or cls.is_background_color(item_pixel)):
-                color[0] += item_pixel[0]
-                color[1] += item_pixel[1]
-                color[2] += item_pixel[2]
-                count += 1
-            px += 1
-            if px == item.size[0]:
-                px = 0
-                py += 1
+        pixels = image_pixels(item)
+        colored = ~(empty_mask(pixels) | background_mask(pixels))
+        count = int(colored.sum())
         if count == 0:
             return 0, 0, 0
-        color[0] /= count
-        color[1] /= count
-        color[2] /= count
-        return int(color[0]), int(color[1]), int(color[2])
+        red, green, blue = (int(total) for total in pixels[colored][:, :3].sum(axis=0, dtype=np.int64))
+        return int(red / count), int(green / count), int(blue / count)
 
     @classmethod
-    def scan_item(cls, slot_item: Image.Image, item_list: List[Dict[str, Any]]) -> \
-            Union[Dict[str, Union[str, int]], str]:
-        """Scans an item's image, and looks for it among similar items in the database.
+    def is_slot(cls, pixels: np.ndarray, x: int, y: int) -> bool:
+        """Checks if there's a slot's border at the specified coordinates.
 
-        :param slot_item: The item's cropped image.
-        :param item_list: The list of similar items.
-        :return: The matched item, represented in a dictionary.
+        :param pixels: The packed pixels of the image, as returned by image_to_array.
+        :param x: The x coordinate of the slot's top left corner.
+        :param y: The y coordinate of the slot's top left corner.
+        :return: Whether the border matches or not.
         """
-        results = {}
-        if slot_item is None:
-            return "Empty"
-        for item in item_list:
-            if item['id'] in results:
-                continue
-            item_image = pickle.loads(item['frame'])
-            item_image = Image.open(io.BytesIO(bytearray(item_image)))
-            px = 0
-            py = 0
-            while py < slot_item.size[1] and py < item_image.size[1]:
-                slot_item_pixel = slot_item.getpixel((px, py))
-                item_pixel = item_image.getpixel((px, py))
-                if cls.is_empty(item_pixel) == cls.is_empty(slot_item_pixel):
-                    pass
-                elif cls.is_empty(slot_item_pixel):
-                    if not cls.is_number(slot_item_pixel):
-                        break
-                elif cls.is_empty(item_pixel) or item_pixel != slot_item_pixel:
-                    break
-
-                px += 1
-                if px == slot_item.size[0] or px == item_image.size[0]:
-                    py += 1
-                    px = 0
-                if py == slot_item.size[1] or py == item_image.size[1]:
-                    return item
-
-        return "Unknown"
+        border = pixels[y + SLOT_BORDER_Y, x + SLOT_BORDER_X]
+        return bool(np.all((border == SLOT_BORDER_COLORS) | np.isin(border, SLOT_BORDER_IGNORED)))
 
     @classmethod
     def find_slots(cls, loot_image: Image) -> List[Dict[str, Any]]:
         """Scans through an image, looking for inventory slots
 
+        Only pixels matching the border's first pixel can be the start of a slot, so those are found first and their
+        borders are compared all at once. The remaining candidates are then visited in the same order as a pixel by
+        pixel scan would, checking every other pixel and skipping the area of found slots.
+
         :param loot_image: An inventory screenshot
         :return: A list of dictionaries, containing the images and coordinates for every slot.
         """
-        image_copy = loot_image.copy()
-        loot_bytes = loot_image.tobytes()
         slot_list = []
-        if loot_image.size[0] < 34 or loot_image.size[1] < 27:
+        width, height = loot_image.size
+        if width < 34 or height < 27:
+            return slot_list
+        pixels = image_to_array(loot_image)
+        last_x = width - 34
+        # The border's last row must be inside the image.
+        last_y = height - 28
+        ys, xs = np.nonzero(pixels[:last_y + 1, :last_x + 1] == SLOT_BORDER_START)
+        if not len(xs):
             return slot_list
 
-        x = -1
-        y = 0
-        skip = False
-        for _ in loot_bytes:
-            x += 1
-            if x + 34 > image_copy.size[0]:
-                y += 1
-                x = 0
-            if y + 27 > image_copy.size[1]:
-                break
-            if skip:
-                # Skip every other pixel to save time
-                skip = False
-            else:
-                if x + 34 != image_copy.size[0]:
-                    # Can't skip the last part of an image
-                    skip = True
-                if image_copy.getpixel((x, y)) == slot_border[0]:
-                    # If the current pixel looks like a slot
-                    s = 0
-                    diff = 0
-                    diffmax = 1  # 3/4's of the border size
-                    xs = 0
-                    ys = 0
-
-                    if x != 0 and image_copy.getpixel((x - 1, y)) == slot_border[0]:
-                        # Make sure we didnt skip the beggining of a slot
-                        # go back if we did
-                        x -= 1
-                        # We also flag the next pixel to avoid looping here forever if this turns out not to be a slot
-                        image_copy.putpixel((x + 1, y), (255, 0, 255, 0))
-                    while diff < diffmax:
-                        if xs == 0 or xs == 33 or ys == 0 or ys == 33:
-                            if not image_copy.getpixel((x + xs, y + ys)) == slot_border[s] \
-                                and image_copy.getpixel((x + xs, y + ys)) not in [(24, 24, 24, 255),
-                                                                                  (55, 55, 55, 255),
-                                                                                  (57, 57, 57, 255),
-                                                                                  (75, 76, 76, 255),
-                                                                                  (255, 0, 255, 0)]:
-                                # ^ This is a workaround to ignore the bottom-left border of containers
-                                # as well as make the skipping work correctly
-                                    break
-                        s += 1
-                        xs += 1
-                        if xs == 34:
-                            xs = 0
-                            ys += 1
-                        if ys == 28:
-                            slot_list.append({'image': loot_image.crop((x + 1, y + 1, x + 33, y + 33)), 'x': x, 'y': y})
-                            image_copy.paste(Image.new("RGBA", (34, 34), (255, 255, 255, 255)), (x, y))
-                            x += 33
-                            break
+        # Compare the borders of every candidate at once, including the pixel before it, since scanning may go back.
+        # Pixels flagged while scanning are ignored in comparisons, so these are considered as well here.
+        start_ys = np.concatenate([ys, ys[xs > 0]])
+        start_xs = np.concatenate([xs, xs[xs > 0] - 1])
+        borders = pixels[start_ys[:, None] + SLOT_BORDER_Y, start_xs[:, None] + SLOT_BORDER_X]
+        allowed = np.isin(borders, np.append(SLOT_BORDER_IGNORED, SLOT_BORDER_START))
+        matches = np.all((borders == SLOT_BORDER_COLORS) | allowed, axis=1)
+        possible_slots = set(zip(start_ys[matches].tolist(), start_xs[matches].tolist()))
+
+        rows: Dict[int, Tuple[List[int], List[int]]] = {}
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            rows.setdefault(y, ([], []))[x % 2].append(x)
+        # Rows start at the first pixel, unless a slot found at the end of the previous row made it skip it.
+        skip_row = -1
+        for y in sorted(rows):
+            x = 1 if skip_row == y else 0
+            while True:
+                candidates = rows[y][x % 2]
+                i = bisect.bisect_left(candidates, x)
+                if i == len(candidates):
+                    break
+                x = candidates[i]
+                if pixels[y, x] != SLOT_BORDER_START:
+                    x += 2
+                    continue
+                start_x = x
+                if x != 0 and pixels[y, x - 1] == SLOT_BORDER_START:
+                    # Make sure we didn't skip the beginning of a slot, go back if we did
+                    start_x = x - 1
+                    # We also flag the pixel to avoid checking it again if this turns out not to be a slot
+                    pixels[y, x] = SLOT_FLAG
+                if (y, start_x) in possible_slots and cls.is_slot(pixels, start_x, y):
+                    slot_list.append({'image': loot_image.crop((start_x + 1, y + 1, start_x + 33, y + 33)),
+                                      'x': start_x, 'y': y})
+                    pixels[y:y + 34, start_x:start_x + 34] = SLOT_FILL
+                    next_x = start_x + 34
+                    if next_x > last_x:
+                        if x != last_x:
+                            skip_row = y + 1
+                        break
+                    # The pixel right after the slot is skipped.
+                    x = next_x + 1
+                elif x == last_x:
+                    break
+                else:
+                    x += 1 if start_x != x else 2
         return slot_list
 
     async def item_show(self, item: str) -> Tuple[bytes, list]:
-        c = self.loot_conn.execute("SELECT * FROM Items WHERE name LIKE ?", (item,))
-        item_list = c.fetchall()
+        """Gets an image with all the frames of an item and their information.
+
+        Results are cached, and rendered outside the event loop.
+
+        :param item: The name of the item.
+        :return: A tuple containing the PNG image's content and the item's frames.
+        """
+        key = item.lower()
+        result = CACHE_ITEM_STRIPS.get(key)
+        if result is None:
+            item_list = await self.loot_db.fetchall("SELECT * FROM Items WHERE name LIKE ?", (item,))
+            result = await self.bot.loop.run_in_executor(None, self.render_item_strip, item_list)
+            CACHE_ITEM_STRIPS[key] = result
+        return result
+
+    @staticmethod
+    def get_imbuement_items(conn: sqlite3.Connection, names: List[str]) -> Set[str]:
+        """Gets which items of a list are used for imbuements.
+
+        :param conn: A connection to the TibiaWiki database.
+        :param names: The names of the items to check.
+        :return: The names of the items that are used for imbuements.
+        """
+        imbuement_items = set()
+        for name in names:
+            result = conn.execute("""SELECT item.name FROM item
+                                     LEFT JOIN item_attribute att on item_id = item.article_id
+                                     WHERE item.name LIKE ? AND article_id = item_id AND att.name = 'imbuement'
+                                     LIMIT 1""", (name,)).fetchone()
+            if result:
+                imbuement_items.add(name)
+        return imbuement_items
+
+    @classmethod
+    def render_item_strip(cls, item_list: List[Dict[str, Any]]) -> Tuple[bytes, list]:
+        """Renders all the frames of an item side by side.
+
+        :param item_list: The item's frames, as stored in the loot database.
+        :return: A tuple containing the PNG image's content and the item's frames.
+        """
         if len(item_list) == 0:
             return b'', []
         output_image = Image.new("RGBA", (33 * len(item_list) - 1, 32), (255, 255, 255, 255))
@@ -817,5 +959,160 @@ class Loot(commands.Cog, CogUtils):
         return img_byte_arr, item_list
 
 
+# region Worker functions
+# These functions are executed in the cog's process pool
+
+SlotResult = Optional[Tuple[Dict[str, Any], int, Image.Image]]
+"""The item found in a slot, its count and the slot's image with the overlay applied. None for empty slots."""
+
+_worker_item_index: Optional[ItemIndex] = None
+
+
+def load_worker_item_index() -> int:
+    """Builds the item index of the current process, if it hasn't been built yet.
+
+    :return: The number of frames in the index.
+    """
+    global _worker_item_index
+    if _worker_item_index is None:
+        _worker_item_index = ItemIndex.from_database(LOOTDB)
+    return len(_worker_item_index)
+
+
+def image_hash(image: Image.Image) -> str:
+    """Gets a hash of an image's content.
+
+    :param image: The image to hash.
+    :return: The hexadecimal digest of the image's size and pixels.
+    """
+    digest = hashlib.blake2b(f"{image.size[0]}x{image.size[1]}".encode(), digest_size=16)
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def file_hash(image: bytes) -> str:
+    """Gets a hash of an image's file.
+
+    Unlike :func:`image_hash`, the image doesn't need to be decoded, but the same pixels may have different hashes.
+
+    :param image: The image's byte content.
+    :return: The hexadecimal digest of the content.
+    """
+    return hashlib.blake2b(image, digest_size=16).hexdigest()
+
+
+def find_slot_positions(image: bytes) -> Tuple[str, List[Tuple[int, int]], List[str]]:
+    """Finds the coordinates of the inventory slots in an image.
+
+    :param image: The image's byte content.
+    :return: A tuple containing the hash of the image, the x and y coordinates of every slot and their hashes.
+    """
+    loot_image = Loot.load_image(image)
+    slot_positions = [(found_slot['x'], found_slot['y']) for found_slot in Loot.find_slots(loot_image)]
+    # The result of a slot only depends on its image, including its border.
+    slot_hashes = [image_hash(loot_image.crop((x, y, x + 34, y + 34))) for x, y in slot_positions]
+    return image_hash(loot_image), slot_positions, slot_hashes
+
+
+def scan_slot(loot_image: Image.Image, x: int, y: int, item_index: ItemIndex) -> SlotResult:
+    """Identifies the item in a slot and draws its overlay.
+
+    :param loot_image: The loot image.
+    :param x: The x coordinate of the slot.
+    :param y: The y coordinate of the slot.
+    :param item_index: The item index to look for items in.
+    :return: The slot's scan result.
+    """
+    found_item = loot_image.crop((x + 1, y + 1, x + 33, y + 33))
+    found_item_number, item_number_image = Loot.number_scan(found_item)
+
+    found_item.paste(number_blank, None, number_blank2.convert("RGBA"))
+    found_item_clear = Loot.clear_background(found_item)
+    found_item_clear = Loot.make_transparent(found_item_clear)
+
+    found_item_crop = Loot.crop_item(found_item_clear)
+
+    # Check if the slot is empty
+    if found_item_crop is None:
+        return None
+
+    found_item_size = Loot.get_item_size(found_item_crop)
+    found_item_color = Loot.get_item_color(found_item_crop)
+
+    key = (found_item_crop.size[0], found_item_crop.size[1], found_item_size, *found_item_color)
+    result = item_index.scan_item(found_item_clear, key)
+
+    if result == "Unknown":
+        unknown_image = Loot.clear_background(found_item)
+        unknown_image_crop = Loot.crop_item(unknown_image, copy=True)
+        unknown_image_size = Loot.get_item_size(unknown_image_crop)
+        result = {'name': "Unknown",
+                  'group': "Unknown",
+                  'value_sell': 0,
+                  'frame': unknown_image_crop,
+                  'sizeX': unknown_image_crop.size[0],
+                  'sizeY': unknown_image_crop.size[1],
+                  'size': unknown_image_size}
+        found_item_number = 1
+
+    # Slots never overlap, so the overlay can be drawn on the slot's image alone.
+    slot_image = loot_image.crop((x, y, x + 34, y + 34))
+    if result['group'] != "Unknown":
+        slot_image.paste(slot['Normal'], (0, 0))
+        detect = Image.alpha_composite(slot_image.crop((1, 1, 33, 33)), result['image'])
+        if found_item_number > 1:
+            num = Image.new("RGBA", (32, 32), (255, 255, 255, 0))
+            num.paste(item_number_image, (0, 20))
+            detect = Image.alpha_composite(detect, num)
+        slot_image.paste(detect, (1, 1))
+
+    slot_image = Image.alpha_composite(
+        slot_image,
+        group_images.get(result['group'], group_images['Other']) if result['value_sell'] > 0 or result[
+            'group'] == "Unknown" else
+        group_images['NoValue'])
+    item = {'name': result['name'], 'group': result['group'], 'value_sell': result['value_sell']}
+    return item, found_item_number, slot_image
+
+
+def scan_slots(image: bytes, slot_positions: List[Tuple[int, int]]) -> List[SlotResult]:
+    """Identifies the items in a group of slots of an image, using the process' item index.
+
+    :param image: The image's byte content.
+    :param slot_positions: The coordinates of the slots to scan.
+    :return: The scan result of every slot, in the same order.
+    """
+    load_worker_item_index()
+    loot_image = Loot.load_image(image)
+    return [scan_slot(loot_image, x, y, _worker_item_index) for x, y in slot_positions]
+
+
+def build_scan_results(image: bytes, slot_positions: List[Tuple[int, int]], slot_results: List[SlotResult]) \
+        -> Tuple[Dict[str, Dict[str, Any]], bytes]:
+    """Joins the results of every slot, counting the found items and drawing the overlays on the loot image.
+
+    :param image: The image's byte content.
+    :param slot_positions: The coordinates of the scanned slots.
+    :param slot_results: The scan result of every slot.
+    :return: A tuple containing the found items and the overlay image's bytes.
+    """
+    loot_image = Loot.load_image(image)
+    loot_list = {}
+    for (x, y), slot_result in zip(slot_positions, slot_results):
+        if slot_result is None:
+            continue
+        item, count, slot_image = slot_result
+        if item['name'] in loot_list:
+            loot_list[item['name']]['count'] += count
+        else:
+            loot_list[item['name']] = {'count': count, 'group': item['group'], 'value_sell': item['value_sell']}
+        loot_image.paste(slot_image, (x, y))
+    img_byte_arr = io.BytesIO()
+    loot_image.save(img_byte_arr, format="png")
+    return loot_list, img_byte_arr.getvalue()
+
+# endregion
+
+
 def setup(bot):
     bot.add_cog(Loot(bot))
@@ -15,6 +15,7 @@
 import inspect
 import os
 import platform
+import sqlite3
 import textwrap
 import traceback
 from contextlib import redirect_stdout
@@ -633,6 +634,27 @@ class Owner(commands.Cog, CogUtils):
         except Exception:
             await ctx.send(f'```py\n{traceback.format_exc()}\n```')
 
+    @checks.owner_only()
+    @commands.command(name="reloadwiki")
+    async def reload_wiki(self, ctx: NabCtx, *, path: str = None):
+        """Reloads the TibiaWiki database.
+
+        If a path is provided, the database at that path is used from now on.
+
+        The new database is validated before it replaces the current one. Commands keep using the current database
+        while the new one is prepared.
+
+        To update the current file, replace it with a new file instead of writing over it."""
+        wiki_cog = self.bot.get_cog("TibiaWiki")
+        if wiki_cog is None:
+            return await ctx.error("The TibiaWiki cog is not loaded.")
+        try:
+            async with ctx.typing():
+                await wiki_cog.reload_wiki(path)
+        except (OSError, sqlite3.DatabaseError) as e:
+            return await ctx.error(f"The database couldn't be loaded, the current one is still in use.\n`{e}`")
+        await ctx.success("TibiaWiki database reloaded.")
+
     @commands.command(hidden=True)
     @checks.owner_only()
     async def repl(self, ctx: NabCtx):
@@ -37,9 +37,9 @@ from .utils import CogUtils, checks, config, errors, get_time_diff, get_user_ava
     join_list, online_characters, timing, split_params
 from .utils.context import NabCtx
 from .utils.database import DbChar, DbDeath, DbLevelUp, get_global_property, get_recent_timeline, get_server_property, \
-    set_global_property
+    set_global_property, wiki
 from .utils.messages import get_first_image, html_to_markdown, split_message
-from .utils.pages import Pages, VocationPages
+from .utils.pages import LazyPages, Pages, VocationPages
 from .utils.tibia import HIGHSCORES_FORMAT, HIGHSCORE_CATEGORIES, NabChar, TIBIACOM_ICON, TIBIA_URL, get_character, \
     get_guild, get_highscores, get_house, get_house_id, get_level_by_experience, get_map_area, get_news_article, \
     get_rashid_city, get_recent_news, get_share_range, get_tibia_time_zone, get_voc_abb, get_voc_abb_and_emoji, \
@@ -250,18 +250,20 @@ class Tibia(commands.Cog, CogUtils):
         per_page = 20 if await ctx.is_long() else 5
         if name is None:
             embed_info["title"] = "☠ Recent deaths"
-            entries = await self.get_recent_deaths(ctx)
+            pages = LazyPages(ctx, source=self.get_recent_deaths(ctx), per_page=per_page)
+            count = await pages.prefetch()
         else:
             char = await get_character(self.bot, name)
             if char is None:
                 return await ctx.error("That character doesn't exist.")
             last_time = await self.get_recent_deaths_from_tibiacom(ctx, char, embed_info, entries)
             await self.get_recent_deaths_from_database(ctx, name, embed_info, entries, last_time)
-        if not entries:
+            pages = Pages(ctx, entries=entries, per_page=per_page)
+            count = len(entries)
+        if not count:
             await ctx.send("There are no recent deaths.")
             return
 
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.title = embed_info["title"]
         pages.embed.url = embed_info["url"]
         if embed_info["author"]:
@@ -312,24 +314,24 @@ class Tibia(commands.Cog, CogUtils):
         if user is None:
             await ctx.send("I don't see any users with that name.")
             return
-        entries = []
         now = dt.datetime.now(dt.timezone.utc)
         per_page = 20 if await ctx.is_long() else 5
-        async with ctx.pool.acquire() as conn:
-            async for death in DbDeath.get_latest(conn, config.announce_threshold, user_id=user.id, worlds=ctx.world):
+
+        async def get_entries():
+            async for death in DbDeath.get_latest(ctx.pool, config.announce_threshold, user_id=user.id,
+                                                  worlds=ctx.world):
                 death_time = get_time_diff(now - death.date)
                 emoji = get_voc_emoji(death.char.vocation)
-                entries.append(f"{emoji} {death.char.name} - At level **{death.level}** by {death.killer.name} - "
-                               f"*{death_time} ago*")
-                if len(entries) >= 100:
-                    break
-        if not entries:
+                yield f"{emoji} {death.char.name} - At level **{death.level}** by {death.killer.name} - " \
+                      f"*{death_time} ago*"
+
+        pages = LazyPages(ctx, source=get_entries(), per_page=per_page)
+        if not await pages.prefetch():
             await ctx.send("There are not registered deaths by this user.")
             return
 
         title = f"{user.display_name} latest deaths"
         icon_url = user.avatar_url
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.set_author(name=title, icon_url=icon_url)
         try:
             await pages.paginate()
@@ -358,53 +360,48 @@ class Tibia(commands.Cog, CogUtils):
             description_suffix = ""
             embed.set_footer(text=f"For a shorter period, try {ctx.clean_prefix}{ctx.command.qualified_name} week or "
                                   f"{ctx.clean_prefix}{ctx.command.qualified_name} month")
+        # The current day is included in the period
+        since = dt.datetime.now(dt.timezone.utc).date() - period + dt.timedelta(days=1)
         async with ctx.pool.acquire() as conn:
-            total = await conn.fetchval("""SELECT count(*) FROM character_death WHERE CURRENT_TIMESTAMP-date < $1""",
-                                        period)
+            total = await conn.fetchval("SELECT COALESCE(SUM(count), 0) FROM character_death_stats WHERE day >= $1",
+                                        since)
             embed.description = f"There are {total:,} deaths registered{description_suffix}."
-            async with conn.transaction():
-                count = 0
-                content = ""
-                async for row in conn.cursor("""
-                        SELECT COUNT(*), name, user_id
-                        FROM character_death d
-                        LEFT JOIN "character" c on c.id = d.character_id
-                        WHERE CURRENT_TIMESTAMP-date < $1 AND world = $2
-                        GROUP by name, user_id ORDER BY count DESC""", period, ctx.world):
-                    user = self.bot.get_member(row["user_id"], ctx.guild)
-                    if user is None:
-                        continue
-                    count += 1
-                    content += f"**{row['name']}** \U00002014 {row['count']}\n"
-                    if count >= 3:
-                        break
-            if count > 0:
+            # Only characters owned by members of this server are considered
+            rows = await conn.fetch("""SELECT SUM(s.count) as count, c.name, c.user_id
+                                       FROM character_death_stats s
+                                       INNER JOIN "character" c on c.id = s.character_id
+                                       INNER JOIN user_server u on u.user_id = c.user_id AND u.server_id = $3
+                                       WHERE s.day >= $1 AND s.world = $2
+                                       GROUP by c.name, c.user_id ORDER BY count DESC LIMIT 3""",
+                                    since, ctx.world, ctx.guild.id)
+            content = ""
+            for row in rows:
+                content += f"**{row['name']}** \U00002014 {row['count']}\n"
+            if content:
                 embed.add_field(name="Most deaths per character", value=content, inline=False)
-            async with conn.transaction():
-                count = 0
-                content = ""
-                async for row in conn.cursor("""SELECT COUNT(*), user_id
-                                                FROM character_death d
-                                                LEFT JOIN "character" c on c.id = d.character_id
-                                                WHERE CURRENT_TIMESTAMP-date < $1 AND world = $2
-                                                AND user_id != 0
-                                                GROUP by user_id
-                                                ORDER BY count DESC""", period, ctx.world):
-                    user = self.bot.get_member(row["user_id"], ctx.guild)
-                    if user is None:
-                        continue
-                    count += 1
-                    content += f"@**{user.display_name}** \U00002014 {row['count']}\n"
-                    if count >= 3:
-                        break
+            rows = await conn.fetch("""SELECT SUM(s.count) as count, c.user_id
+                                       FROM character_death_stats s
+                                       INNER JOIN "character" c on c.id = s.character_id
+                                       INNER JOIN user_server u on u.user_id = c.user_id AND u.server_id = $3
+                                       WHERE s.day >= $1 AND s.world = $2 AND c.user_id != 0
+                                       GROUP by c.user_id ORDER BY count DESC LIMIT 3""",
+                                    since, ctx.world, ctx.guild.id)
+            count = 0
+            content = ""
+            for row in rows:
+                user = self.bot.get_member(row["user_id"], ctx.guild)
+                if user is None:
+                    continue
+                count += 1
+                content += f"@**{user.display_name}** \U00002014 {row['count']}\n"
+                if count >= 3:
+                    break
             if count > 0:
                 embed.add_field(name="Most deaths per user", value=content, inline=False)
-            rows = await conn.fetch("""SELECT COUNT(*), k.name
-                                       FROM character_death d
-                                       LEFT JOIN character_death_killer k on k.death_id = d.id
-                                       LEFT JOIN "character" c on c.id = d.character_id
-                                       WHERE CURRENT_TIMESTAMP-date < $1 AND world = $2
-                                       GROUP by k.name ORDER BY count DESC LIMIT 3""", period, ctx.world)
+            rows = await conn.fetch("""SELECT SUM(count) as count, name
+                                       FROM character_death_killer_stats
+                                       WHERE day >= $1 AND world = $2
+                                       GROUP by name ORDER BY count DESC LIMIT 3""", since, ctx.world)
             content = ""
             for row in rows:
                 killer = re.sub(r"(a|an)(\s+)", " ", row["name"]).title().strip()
@@ -428,7 +425,7 @@ class Tibia(commands.Cog, CogUtils):
         embed.description = ""
         embed.set_thumbnail(url=guild.logo_url)
         if guild.guildhall is not None:
-            url = GuildHouse.get_url(get_house_id(guild.guildhall.name), guild.world)
+            url = GuildHouse.get_url(await get_house_id(guild.guildhall.name), guild.world)
             embed.description += f"They own the guildhall [{guild.guildhall.name}]({url}).\n"
 
         if len(guild.online_members) < 1:
@@ -475,7 +472,7 @@ class Tibia(commands.Cog, CogUtils):
         if guild.description:
             embed.description = guild.description
         if guild.guildhall is not None:
-            url = GuildHouse.get_url(get_house_id(guild.guildhall.name), guild.world)
+            url = GuildHouse.get_url(await get_house_id(guild.guildhall.name), guild.world)
             embed.description += f"\nThey own the guildhall [{guild.guildhall.name}]({url}).\n"
         applications = f"{ctx.tick(True)} Open" if guild.open_applications else f"{ctx.tick(False)} Closed"
         embed.add_field(name="Applications", value=applications)
@@ -683,9 +680,9 @@ class Tibia(commands.Cog, CogUtils):
         if wiki_cog is None:
             return await ctx.error("TibiaWiki cog is unavailable for the moment, try again later.")
 
-        entries = wiki_cog.search_entry("house", name)
+        entries = await wiki_cog.search_entry("house", name)
         if not entries:
-            await ctx.send("I couldn't find a house with that name.")
+            await wiki_cog.send_not_found(ctx, name, "I couldn't find a house with that name.")
             return
         if len(entries) > 1:
             title = await ctx.choose([e["title"] for e in entries])
@@ -693,7 +690,7 @@ class Tibia(commands.Cog, CogUtils):
                 return
         else:
             title = entries[0]["title"]
-        wiki_house: models.House = wiki_cog.get_entry(title, models.House)
+        wiki_house: models.House = await wiki_cog.get_entry(title, models.House)
 
         if world:
             try:
@@ -702,7 +699,7 @@ class Tibia(commands.Cog, CogUtils):
                 pass
         # Attach image only if the bot has permissions
         if ctx.bot_permissions.attach_files:
-            mapimage = io.BytesIO(get_map_area(wiki_house.x, wiki_house.y, wiki_house.z))
+            mapimage = io.BytesIO(await wiki.call(get_map_area, wiki_house.x, wiki_house.y, wiki_house.z))
             embed = self.get_house_embed(ctx, wiki_house, house)
             embed.set_image(url="attachment://thumbnail.png")
             await ctx.send(file=discord.File(mapimage, "thumbnail.png"), embed=embed)
@@ -728,17 +725,20 @@ class Tibia(commands.Cog, CogUtils):
         user_cache = dict()
         if name is None:
             title = "Latest level ups"
-            async with ctx.pool.acquire() as conn:
-                async for lvl in DbLevelUp.get_latest(conn, minimum_level=config.announce_threshold, worlds=ctx.world):
+
+            async def get_entries():
+                async for lvl in DbLevelUp.get_latest(ctx.pool, minimum_level=config.announce_threshold,
+                                                      worlds=ctx.world):
                     user = self.get_cached_user_(lvl.char.user_id, user_cache, ctx.guild)
                     if user is None:
                         continue
                     diff = get_time_diff(now - lvl.date)
                     emoji = get_voc_emoji(lvl.char.vocation)
-                    entries.append(f"{emoji} {lvl.char.name} - Level **{lvl.level}** - **@{user.display_name}** - "
-                                   f"*{diff} ago*")
-                    if len(entries) >= 100:
-                        break
+                    yield f"{emoji} {lvl.char.name} - Level **{lvl.level}** - **@{user.display_name}** - " \
+                          f"*{diff} ago*"
+
+            pages = LazyPages(ctx, source=get_entries(), per_page=per_page)
+            count = await pages.prefetch()
         else:
             async with ctx.pool.acquire() as conn:
                 db_char = await DbChar.get_by_name(conn, name)
@@ -757,10 +757,11 @@ class Tibia(commands.Cog, CogUtils):
                     entries.append(f"Level **{lvl.level}** - *{diff} ago*")
                     if len(entries) >= 100:
                         break
-        if not entries:
+            pages = Pages(ctx, entries=entries, per_page=per_page)
+            count = len(entries)
+        if not count:
             await ctx.send("There are no registered levels.")
             return
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.title = title
         if author is not None:
             pages.embed.set_author(name=author, icon_url=author_icon)
@@ -779,24 +780,21 @@ class Tibia(commands.Cog, CogUtils):
             await ctx.send("I don't see any users with that name.")
             return
 
-        count = 0
-        entries = []
         now = dt.datetime.now(dt.timezone.utc)
         per_page = 20 if await ctx.is_long() else 5
-        async with ctx.pool.acquire() as conn:
-            async for l in DbLevelUp.get_latest(conn, user_id=ctx.author.id, worlds=ctx.world):
-                    count += 1
-                    level_time = get_time_diff(now - l.date)
-                    emoji = get_voc_emoji(l.char.vocation)
-                    entries.append(f"{emoji} {l.char.name} - Level **{l.level}** - *{level_time} ago*")
-                    if count >= 100:
-                        break
-        if count == 0:
+
+        async def get_entries():
+            async for l in DbLevelUp.get_latest(ctx.pool, user_id=ctx.author.id, worlds=ctx.world):
+                level_time = get_time_diff(now - l.date)
+                emoji = get_voc_emoji(l.char.vocation)
+                yield f"{emoji} {l.char.name} - Level **{l.level}** - *{level_time} ago*"
+
+        pages = LazyPages(ctx, source=get_entries(), per_page=per_page)
+        if not await pages.prefetch():
             await ctx.send("There are not registered level ups by this user.")
             return
 
         title = f"{user.display_name} latest level ups"
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.set_author(name=title, icon_url=get_user_avatar(user))
         try:
             await pages.paginate()
@@ -1061,25 +1059,27 @@ class Tibia(commands.Cog, CogUtils):
         user_cache = dict()
         if name is None:
             title = "Timeline"
-            async with ctx.pool.acquire() as conn:
-                async for entry in get_recent_timeline(conn, minimum_level=config.announce_threshold, worlds=ctx.world):
+
+            async def get_entries():
+                async for entry in get_recent_timeline(ctx.pool, minimum_level=config.announce_threshold,
+                                                       worlds=ctx.world):
                     user = self.get_cached_user_(entry.char.user_id, user_cache, ctx.guild)
                     if user is None:
                         continue
-                    count += 1
                     entry_time = get_time_diff(now - entry.date)
                     user_name = user.display_name
                     voc_emoji = get_voc_emoji(entry.char.vocation)
                     if isinstance(entry, DbDeath):
                         emoji = config.death_emoji
-                        entries.append(f"{emoji}{voc_emoji} {entry.char.name} (**@{user_name}**) - "
-                                       f"At level **{entry.level}** by {entry.killer.name} - *{entry_time} ago*")
+                        yield f"{emoji}{voc_emoji} {entry.char.name} (**@{user_name}**) - " \
+                              f"At level **{entry.level}** by {entry.killer.name} - *{entry_time} ago*"
                     else:
                         emoji = config.levelup_emoji
-                        entries.append(f"{emoji}{voc_emoji} {entry.char.name} (**@{user_name}**) -"
-                                       f" Level **{entry.level}** - *{entry_time} ago*")
-                    if count >= 100:
-                        break
+                        yield f"{emoji}{voc_emoji} {entry.char.name} (**@{user_name}**) -" \
+                              f" Level **{entry.level}** - *{entry_time} ago*"
+
+            pages = LazyPages(ctx, source=get_entries(), per_page=per_page)
+            count = await pages.prefetch()
         else:
             async with ctx.pool.acquire() as conn:
                 db_char = await DbChar.get_by_name(conn, name)
@@ -1105,11 +1105,11 @@ class Tibia(commands.Cog, CogUtils):
                         entries.append(f"{emoji} Level **{entry.level}** - *{entry_time} ago*")
                     if count >= 100:
                         break
+            pages = Pages(ctx, entries=entries, per_page=per_page)
         if count == 0:
             await ctx.send("There are no registered events.")
             return
 
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.title = title
         if author is not None:
             pages.embed.set_author(name=author, icon_url=author_icon)
@@ -1127,32 +1127,27 @@ class Tibia(commands.Cog, CogUtils):
             await ctx.send("I don't see any users with that name.")
             return
 
-        entries = []
-        count = 0
         now = dt.datetime.now(dt.timezone.utc)
         per_page = 20 if await ctx.is_long() else 5
+        title = f"{user.display_name} timeline"
 
-        async with ctx.pool.acquire() as conn:
-            title = f"{user.display_name} timeline"
-            async for entry in get_recent_timeline(conn, worlds=ctx.world, user_id=user.id):
-                count += 1
+        async def get_entries():
+            async for entry in get_recent_timeline(ctx.pool, worlds=ctx.world, user_id=user.id):
                 entry_time = get_time_diff(now - entry.date)
                 voc_emoji = get_voc_emoji(entry.char.vocation)
                 if isinstance(entry, DbDeath):
                     emoji = config.death_emoji
-                    entries.append(f"{emoji}{voc_emoji} {entry.char.name} - At level **{entry.level}** "
-                                   f"by {entry.killer.name} - *{entry_time} ago*")
+                    yield f"{emoji}{voc_emoji} {entry.char.name} - At level **{entry.level}** " \
+                          f"by {entry.killer.name} - *{entry_time} ago*"
                 else:
                     emoji = config.levelup_emoji
-                    entries.append(f"{emoji}{voc_emoji} {entry.char.name} Level **{entry.level}** - *{entry_time} ago*")
-                if count >= 200:
-                    break
+                    yield f"{emoji}{voc_emoji} {entry.char.name} Level **{entry.level}** - *{entry_time} ago*"
 
-        if count == 0:
+        pages = LazyPages(ctx, source=get_entries(), per_page=per_page, max_entries=200)
+        if not await pages.prefetch():
             await ctx.send("There are no registered events.")
             return
         author_icon = user.avatar_url
-        pages = Pages(ctx, entries=entries, per_page=per_page)
         pages.embed.set_author(name=title, icon_url=author_icon)
         try:
             await pages.paginate()
@@ -1182,7 +1177,7 @@ class Tibia(commands.Cog, CogUtils):
 
         reply = f"It's currently **{tibia_time.strftime('%H:%M')}** in Tibia's website ({timezone_name}).\n" \
                 f"Server save is in **{server_save_str}**.\n" \
-                f"Rashid is in **{get_rashid_city()}** today."
+                f"Rashid is in **{await get_rashid_city()}** today."
         if ctx.is_private:
             return await ctx.send(reply)
 
@@ -1694,32 +1689,28 @@ class Tibia(commands.Cog, CogUtils):
         return last_time
 
     async def get_recent_deaths(self, ctx: NabCtx):
+        """Gets an asynchronous generator of the recent deaths visible in the current context."""
         now = dt.datetime.now(dt.timezone.utc)
-        entries = []
         cache = dict()
         min_level = config.announce_threshold
         user_servers = self.bot.get_user_guilds(ctx.author.id) if ctx.is_private else [ctx.guild]
         user_worlds = self.bot.get_user_worlds(ctx.author.id) if ctx.is_private else [ctx.world]
-        async with ctx.pool.acquire() as conn:
-            if ctx.guild:
-                min_level = await get_server_property(conn, ctx.guild.id, "announce_level", min_level)
-            async for death in DbDeath.get_latest(conn, min_level, worlds=user_worlds):
-                if ctx.is_private:
-                    user = self.get_cached_user_(death.char.user_id, cache, user_servers)
-                else:
-                    user = ctx.guild.get_member(death.char.user_id)
-                if user is None:
-                    continue
-                user_name = user.name if ctx.is_private else user.display_name
-                if death.char.world not in user_worlds:
-                    continue
-                time_diff = get_time_diff(now - death.date)
-                emoji = get_voc_emoji(death.char.vocation)
-                entries.append(f"{emoji} {death.char.name} (**@{user_name}**) - "
-                               f"At level **{death.char.level}** by {death.killer.name} - *{time_diff} ago*")
-                if len(entries) >= 100:
-                    break
-        return entries
+        if ctx.guild:
+            min_level = await get_server_property(ctx.pool, ctx.guild.id, "announce_level", min_level)
+        async for death in DbDeath.get_latest(ctx.pool, min_level, worlds=user_worlds):
+            if ctx.is_private:
+                user = self.get_cached_user_(death.char.user_id, cache, user_servers)
+            else:
+                user = ctx.guild.get_member(death.char.user_id)
+            if user is None:
+                continue
+            user_name = user.name if ctx.is_private else user.display_name
+            if death.char.world not in user_worlds:
+                continue
+            time_diff = get_time_diff(now - death.date)
+            emoji = get_voc_emoji(death.char.vocation)
+            yield f"{emoji} {death.char.name} (**@{user_name}**) - " \
+                  f"At level **{death.char.level}** by {death.killer.name} - *{time_diff} ago*"
 
     @classmethod
     def get_tibia_embed(cls, title=None, url=None):
@@ -12,16 +12,19 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import asyncio
 import datetime as dt
 import io
 import logging
+import os
 import random
 import re
 import sqlite3
+import time
 from collections import defaultdict
-from contextlib import closing
-from typing import Dict, List
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import cachetools
 import discord
 import tibiawikisql
 from discord.ext import commands
@@ -32,11 +35,16 @@ from cogs.utils.converter import TibiaNumber
 from nabbot import NabBot
 from .utils import FIELD_VALUE_LIMIT, average_color, checks, config, join_list, split_params
 from .utils.context import NabCtx
-from .utils.database import wiki_db
+from .utils.database import wiki
 from .utils.errors import CannotPaginate
+from .utils.imbuements import GOLD_TOKEN, TIERS, TOKENS, ImbuementCost, ImbuementMaterial, ImbuementRecipe, \
+    calculate_cost, rank_imbuements
 from .utils.messages import split_message
 from .utils.pages import Pages
-from .utils.tibia import get_map_area, get_tibia_weekday
+from .utils.search import TrigramIndex, build_index
+from .utils.wiki_images import IMAGE_TABLES, WIKI_IMAGES_DB, WikiImages
+from .utils.wiki_summary import WikiSummary
+from .utils.tibia import clear_map_cache, get_map_area, get_tibia_weekday
 
 log = logging.getLogger("nabbot")
 
@@ -57,6 +65,51 @@ OCCURRENCES = {
     "Very Rare": config.occurrence_on_emoji * 4,
 }
 
+SearchKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+"""The table, columns and searchable fields of a search index."""
+
+SEARCH_INDEXES: Dict[SearchKey, TrigramIndex] = {}
+"""The search indexes of TibiaWiki tables, built on demand."""
+
+CACHE_WIKI_EMBEDS = cachetools.LRUCache(256)
+"""Rendered article embeds, keyed by the article's type, its id, whether the embed is long or not and the weekday."""
+CACHE_WIKI_COLORS = cachetools.LRUCache(1024)
+"""The average colour of the images of TibiaWiki articles, keyed by the article's type and id."""
+
+RASHID_POSITIONS: Dict[int, models.RashidPosition] = {}
+"""Rashid's position for every day of the week."""
+
+WIKI_CHECK_INTERVAL = 60
+"""Seconds between checks for changes in the TibiaWiki database file."""
+WIKI_TABLES = ["achievement", "charm", "creature", "house", "imbuement", "item", "item_key", "map", "npc",
+               "rashid_position", "spell"]
+"""Tables a TibiaWiki database must have to be used."""
+
+
+class ArticleEmbed(NamedTuple):
+    """An article and its rendered embed, as stored in the cache."""
+    article: Any
+    embed: Dict[str, Any]
+    see_more: bool
+    """Whether the embed was shortened and the user should be told where to see more."""
+
+
+KEY_SEARCH = ("item_key", ("article_id", "number", "name", "notes", "origin"), ("name", "notes", "origin"))
+"""The search index used for keys."""
+SEARCHABLE_TABLES = ["achievement", "creature", "house", "imbuement", "item", "npc"]
+"""Tables whose search indexes are built when the cog is loaded or the database is reloaded."""
+SUGGESTION_COMMANDS = {"achievement": "achievement", "creature": "monster", "house": "house",
+                       "imbuement": "imbuement", "item": "item", "npc": "npc", "spell": "spell"}
+"""The tables whose entries are suggested when a search has no results, and the command that shows them."""
+SUGGESTION_LIMIT = 5
+"""The maximum number of suggestions shown."""
+
+
+class Suggestion(NamedTuple):
+    """An entry that can be suggested when a search has no results."""
+    title: str
+    table: str
+
 
 class TibiaWiki(commands.Cog, utils.CogUtils):
     """Commands that show information about Tibia, provided by TibiaWiki.
@@ -65,9 +118,130 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
     def __init__(self, bot: NabBot):
         self.bot = bot
+        self.wiki_signature = wiki.file_signature()
+        self.wiki_lock = asyncio.Lock()
+        self.summary: Optional[WikiSummary] = None
+        self.suggestions: Optional[TrigramIndex[Suggestion]] = None
+        self.wiki_data_task = self.bot.loop.create_task(self.load_wiki_data())
+        self.watch_wiki_task = self.bot.loop.create_task(self.watch_wiki_file())
+        self.images: Optional[WikiImages] = None
+        self.images_signature: Optional[Tuple[int, int]] = None
+        self.open_images()
 
     def cog_unload(self):
         log.info(f"{self.tag} Unloading cog")
+        self.wiki_data_task.cancel()
+        self.watch_wiki_task.cancel()
+        if self.images is not None:
+            self.images.close()
+
+    def open_images(self):
+        """Opens the precomputed images database, closing the previously opened one."""
+        if self.images is not None:
+            self.images.close()
+            self.images = None
+        try:
+            stat = os.stat(WIKI_IMAGES_DB)
+        except FileNotFoundError:
+            self.images_signature = None
+            log.info(f"{self.tag} No precomputed images found, run 'launcher.py wikiimages' to create them.")
+            return
+        self.images_signature = stat.st_mtime_ns, stat.st_size
+        self.images = WikiImages(source=wiki)
+        if not self.images.current:
+            log.warning(f"{self.tag} Precomputed images are outdated, run 'launcher.py wikiimages' to update them.")
+
+    async def load_wiki_data(self):
+        """Loads Rashid's positions, the database's summary and builds the search indexes of the most searched tables,
+        and the suggestion index, so commands don't have to."""
+        start = time.perf_counter()
+        RASHID_POSITIONS.update(await wiki.run(self.load_rashid_positions))
+        await self.get_summary()
+        keys = self.get_search_keys()
+        for key in keys:
+            if key not in SEARCH_INDEXES:
+                SEARCH_INDEXES[key] = await wiki.run(self.load_search_index, key)
+        self.suggestions = await wiki.call(self.build_suggestion_index, {key: SEARCH_INDEXES[key] for key in keys})
+        log.info(f"{self.tag} Search indexes built | {len(keys)} indexes | {time.perf_counter()-start:.2f}s")
+
+    async def watch_wiki_file(self):
+        """Reloads the TibiaWiki database when its file is replaced."""
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            try:
+                await asyncio.sleep(WIKI_CHECK_INTERVAL)
+                try:
+                    stat = os.stat(WIKI_IMAGES_DB)
+                    images_signature = stat.st_mtime_ns, stat.st_size
+                except FileNotFoundError:
+                    images_signature = None
+                if images_signature != self.images_signature:
+                    log.info(f"{self.tag} Precomputed images file changed, reopening.")
+                    self.open_images()
+                try:
+                    signature = wiki.file_signature()
+                except FileNotFoundError:
+                    continue
+                if signature == self.wiki_signature:
+                    continue
+                # If the reload fails, it is not retried until the file changes again
+                self.wiki_signature = signature
+                log.info(f"{self.tag} TibiaWiki database file changed, reloading.")
+                await self.reload_wiki()
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                log.exception(f"{self.tag} Exception reloading TibiaWiki database", exc_info=e)
+
+    async def reload_wiki(self, path: str = None):
+        """Reloads the TibiaWiki database, optionally from a different file.
+
+        The new file is validated and the search indexes, suggestions and summary are built from it in the background.
+        Once ready, the file replaces the current one, along with the search indexes, suggestions and summary, and any
+        data from the previous file is discarded. The precomputed images database is reopened, so it's checked against
+        the new file.
+        If the new file is not valid, the current file remains in use.
+
+        :param path: The path to the new file. If not set, the current file is reloaded.
+        :raises sqlite3.DatabaseError: If the file is not a valid TibiaWiki database.
+        """
+        keys = self.get_search_keys()
+
+        def prepare(conn: sqlite3.Connection):
+            self.validate_wiki(conn)
+            _indexes = {key: self.load_search_index(conn, key) for key in keys}
+            return (_indexes, self.build_suggestion_index(_indexes), self.load_rashid_positions(conn),
+                    WikiSummary.build(conn))
+
+        async with self.wiki_lock:
+            start = time.perf_counter()
+            indexes, self.suggestions, rashid_positions, self.summary = await wiki.reload(path, prepare)
+            SEARCH_INDEXES.clear()
+            SEARCH_INDEXES.update(indexes)
+            RASHID_POSITIONS.clear()
+            RASHID_POSITIONS.update(rashid_positions)
+            CACHE_WIKI_EMBEDS.clear()
+            CACHE_WIKI_COLORS.clear()
+            clear_map_cache()
+            self.wiki_signature = wiki.file_signature()
+            self.open_images()
+            self.bot.dispatch("wiki_reload")
+            log.info(f"{self.tag} TibiaWiki database reloaded | {wiki.path} | {time.perf_counter()-start:.2f}s")
+
+    @classmethod
+    def validate_wiki(cls, conn: sqlite3.Connection):
+        """Checks that a database contains the tables used from TibiaWiki.
+
+        :param conn: A connection to the database.
+        :raises sqlite3.DatabaseError: If any of the tables is missing or empty.
+        """
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [t for t in WIKI_TABLES if t not in tables]
+        if missing:
+            raise sqlite3.DatabaseError(f"Missing tables: {', '.join(missing)}")
+        for table in ["creature", "item", "npc"]:
+            if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+                raise sqlite3.DatabaseError(f"Table {table} is empty")
 
     # region Commands
     @checks.can_embed()
@@ -77,9 +251,9 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
         Shows the achievement's grade, points, description, and instructions on how to unlock."""
 
-        entries = self.search_entry("achievement", name)
+        entries = await self.search_entry("achievement", name)
         if not entries:
-            await ctx.send("I couldn't find an achievement with that name.")
+            await self.send_not_found(ctx, name, "I couldn't find an achievement with that name.")
             return
         if len(entries) > 1:
             title = await ctx.choose([e["title"] for e in entries])
@@ -88,7 +262,7 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         else:
             title = entries[0]["title"]
 
-        achievement: models.Achievement = self.get_entry(title, models.Achievement)
+        achievement: models.Achievement = await self.get_entry(title, models.Achievement)
 
         embed = TibiaWiki.get_base_embed(achievement)
         embed.description = achievement.description
@@ -105,17 +279,17 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
         If a category is specified, it will list all the creatures that belong to the category and their level.
         If no category is specified, it will list all the bestiary categories."""
+        summary = await self.get_summary()
         if _class is None:
-            categories = self.get_bestiary_classes()
-            entries = [f"**{name}** - {count} creatures" for name, count in categories.items()]
+            entries = [f"**{name}** - {count} creatures" for name, count in summary.bestiary_classes.items()]
             description = ""
             title = "Bestiary Classes"
         else:
-            creatures = self.get_bestiary_creatures(_class)
+            creatures = summary.get_bestiary_creatures(_class)
             if not creatures:
                 await ctx.error("There's no class with that name.")
                 return
-            entries = [f"**{name}** - {level}" for name, level in creatures.items()]
+            entries = [f"**{c.title}** - {c.level}" for c in creatures]
             description = f"Use `{ctx.clean_prefix} monster <name>` to see more info"
             title = f"Creatures in the {_class.title()} class"
 
@@ -135,18 +309,19 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
         If no name is specified, displays a list of all charms for the user to choose from."""
         if name is None:
-            embed = self.get_charms_embed(ctx)
+            embed = await self.get_charms_embed(ctx)
             return await ctx.send(embed=embed)
 
-        charm = models.Charm.get_by_field(wiki_db, "name", name, True)
+        charm = await wiki.run(models.Charm.get_by_field, "name", name, True)
         if charm is None:
-            embed = self.get_charms_embed(ctx)
+            embed = await self.get_charms_embed(ctx)
             return await ctx.error("There's no charm with that name, try one of these:", embed=embed)
         embed = await self.get_charm_embed(charm)
         await self.send_embed_with_image(charm, ctx, embed, True, extension="png")
 
     @checks.can_embed()
-    @commands.command(aliases=["imbue"], usage="<name>[,price1[,price2[,price3]]][,tokenprice]")
+    @commands.group(aliases=["imbue"], usage="<name>[,price1[,price2[,price3]]][,tokenprice]",
+                    invoke_without_command=True, case_insensitive=True)
     async def imbuement(self, ctx: NabCtx, *, params: str):
         """Displays information about an imbuement.
 
@@ -171,9 +346,9 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
         name = params[0]
 
-        entries = self.search_entry("imbuement", name)
+        entries = await self.search_entry("imbuement", name)
         if not entries:
-            await ctx.send("I couldn't find an imbuement with that name.")
+            await self.send_not_found(ctx, name, "I couldn't find an imbuement with that name.")
             return
         if len(entries) > 1:
             title = await ctx.choose([e["title"] for e in entries])
@@ -182,11 +357,62 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         else:
             title = entries[0]["title"]
 
-        imbuement: models.Imbuement = self.get_entry(title, models.Imbuement)
+        imbuement: models.Imbuement = await self.get_entry(title, models.Imbuement)
+        summary = await self.get_summary()
+        recipe = summary.imbuements.get(imbuement.title)
+        if recipe is None:
+            recipe = ImbuementRecipe(imbuement.title, imbuement.type, TIERS.index(imbuement.tier),
+                                     tuple(ImbuementMaterial(m.item_title, m.amount) for m in imbuement.materials))
 
-        embed = self.get_imbuement_embed(ctx, imbuement, prices)
+        embed = self.get_imbuement_embed(ctx, imbuement, recipe, prices)
         await self.send_embed_with_image(imbuement, ctx, embed, True)
 
+    @checks.can_embed()
+    @imbuement.command(name="cheapest", usage="<material> <price>[,<material> <price>...][,gold token <price>]")
+    async def imbuement_cheapest(self, ctx: NabCtx, *, params: str):
+        """Ranks imbuements by their cost at the given material prices.
+
+        Provide the price of each material, separated by commas.
+        Only imbuements whose materials all have a price are shown.
+
+        Optionally, provide the price of gold tokens, so they are considered for Vampirism, Void and Strike imbuements.
+
+        It can also accept prices using the 'k' suffix, e.g. 1.5k
+        """
+        prices = {}
+        for param in split_params(params):
+            try:
+                name, price = param.rsplit(" ", 1)
+                name = " ".join(name.lower().split())
+                prices[GOLD_TOKEN if name.rstrip("s") == GOLD_TOKEN else name] = TibiaNumber(price)
+            except (ValueError, commands.BadArgument):
+                await ctx.send(f"{ctx.tick(False)} Invalid syntax. The correct syntax is: `{ctx.usage}`.")
+                return
+
+        summary = await self.get_summary()
+        materials = {m.item_title.lower() for recipe in summary.imbuements.values() for m in recipe.materials}
+        unknown = [name for name in prices if name not in materials and name != GOLD_TOKEN]
+        if unknown:
+            await ctx.error(f"These are not imbuement materials: {join_list(unknown)}.")
+            return
+        costs = rank_imbuements(summary.imbuements.values(), prices)
+        if not costs:
+            await ctx.error("No imbuement can be calculated with those prices. "
+                            "All the materials of an imbuement's tier must have a price.")
+            return
+
+        entries = []
+        for cost in costs:
+            tokens = " (gold tokens)" if cost.token_tier >= 0 else ""
+            entries.append(f"**{cost.recipe.title}** - {cost.total:,} gold | {cost.hourly:,.0f} gold/hour{tokens}")
+        pages = Pages(ctx, entries=entries, per_page=20 if await ctx.is_long() else 10)
+        pages.embed.title = "Cheapest imbuements"
+        pages.embed.set_author(name="TibiaWiki", icon_url=WIKI_ICON, url=tibiawikisql.api.BASE_URL)
+        try:
+            await pages.paginate()
+        except CannotPaginate as e:
+            await ctx.send(e)
+
     @checks.can_embed()
     @commands.command(aliases=["itemprice"])
     async def item(self, ctx: NabCtx, *, name: str):
@@ -198,20 +424,15 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         Yellow for Rashid, Blue and Green for Djinns and Purple for gems.
 
         More information is shown if used in private messages or in the command channel."""
-        entries = self.search_entry("item", name)
+        entries = await self.search_entry("item", name)
         if not entries:
-            await ctx.send("I couldn't find an item with that name.")
+            await self.send_not_found(ctx, name, "I couldn't find an item with that name.")
+            return
+        entry = await self.choose_entry(ctx, entries)
+        if entry is None:
             return
-        if len(entries) > 1:
-            title = await ctx.choose([e["title"] for e in entries])
-            if title is None:
-                return
-        else:
-            title = entries[0]["title"]
-
-        item: models.Item = self.get_entry(title, models.Item)
 
-        embed = await self.get_item_embed(ctx, item, await ctx.is_long())
+        item, embed = await self.get_article_embed(ctx, entry, models.Item, self.get_item_embed)
         await self.send_embed_with_image(item, ctx, embed)
 
     @checks.can_embed()
@@ -230,14 +451,14 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
             await ctx.send("Tell me a numeric value, to search keys, try: `/key search`")
             return
 
-        key: models.Key = models.Key.get_by_field(wiki_db, "number", number)
+        key: models.Key = await wiki.run(models.Key.get_by_field, "number", number)
         if not key:
             return await ctx.send("There's no key with that number.")
         embed = self.get_key_embed(key)
 
         # Attach key's image only if the bot has permissions
         if key.item_id:
-            item = models.Item.get_by_field(wiki_db, "article_id", key.item_id)
+            item = await wiki.run(models.Item.get_by_field, "article_id", key.item_id)
             return await self.send_embed_with_image(item, ctx, embed, True)
         await ctx.send(embed=embed)
 
@@ -250,9 +471,9 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
 
         if there are multiple matches, a list is shown.
         If only one matches, the key's information is shwon directly."""
-        keys = self.search_key(term)
+        keys = await self.search_key(term)
 
-        if keys is None:
+        if not keys:
             await ctx.send("I couldn't find any related keys.")
             return
 
@@ -295,19 +516,15 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
                                           "That's funny... If only I was programmed to laugh."]))
             return
 
-        entries = self.search_entry("creature", name)
+        entries = await self.search_entry("creature", name)
         if not entries:
-            await ctx.send("I couldn't find a monster with that name.")
+            await self.send_not_found(ctx, name, "I couldn't find a monster with that name.")
+            return
+        entry = await self.choose_entry(ctx, entries)
+        if entry is None:
             return
-        if len(entries) > 1:
-            title = await ctx.choose([e["title"] for e in entries])
-            if title is None:
-                return
-        else:
-            title = entries[0]["title"]
 
-        monster = self.get_entry(title, models.Creature)
-        embed = await self.get_monster_embed(ctx, monster, await ctx.is_long())
+        monster, embed = await self.get_article_embed(ctx, entry, models.Creature, self.get_monster_embed)
         await self.send_embed_with_image(monster, ctx, embed, True)
 
     @checks.can_embed()
@@ -318,31 +535,26 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         Shows the NPC's item offers, their location and their travel destinations.
 
         More information is displayed if used on private messages or the command channel."""
-        entries = self.search_entry("npc", name)
+        entries = await self.search_entry("npc", name)
         if not entries:
-            await ctx.send("I couldn't find an NPC with that name.")
+            await self.send_not_found(ctx, name, "I couldn't find an NPC with that name.")
+            return
+        entry = await self.choose_entry(ctx, entries)
+        if entry is None:
             return
-        if len(entries) > 1:
-            title = await ctx.choose([e["title"] for e in entries])
-            if title is None:
-                return
-        else:
-            title = entries[0]["title"]
-
-        npc: models.Npc = self.get_entry(title, models.Npc)
 
-        embed = await self.get_npc_embed(ctx, npc, await ctx.is_long())
+        npc, embed = await self.get_article_embed(ctx, entry, models.Npc, self.get_npc_embed)
         # Attach spell's image only if the bot has permissions
         if ctx.bot_permissions.attach_files:
             files = []
             if npc.image is not None:
-                thumbnail = io.BytesIO(npc.image)
-                filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + ".gif"
+                image, extension, _ = await self.get_thumbnail(npc)
+                filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + f".{extension}"
                 embed.set_thumbnail(url=f"attachment://{filename}")
-                files.append(discord.File(thumbnail, filename))
+                files.append(discord.File(io.BytesIO(image), filename))
             if None not in [npc.x, npc.y, npc.z]:
                 map_filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + "-map.png"
-                map_image = io.BytesIO(get_map_area(npc.x, npc.y, npc.z))
+                map_image = io.BytesIO(await wiki.call(get_map_area, npc.x, npc.y, npc.z))
                 embed.set_image(url=f"attachment://{map_filename}")
                 embed.add_field(name="Location", value=f"[Mapper link]({self.get_mapper_link(npc.x, npc.y, npc.z)})",
                                 inline=False)
@@ -357,8 +569,9 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         """Shows where Rashid is today.
 
         For more information, use `npc Rashid`."""
+        await self.ensure_rashid_positions()
         rashid = self.get_rashid_position()
-        npc = models.Npc.get_by_field(wiki_db, "name", "Rashid")
+        npc = await wiki.run(models.Npc.get_by_field, "name", "Rashid")
         embed = TibiaWiki.get_base_embed(npc)
         embed.colour = discord.Colour.greyple()
         embed.description = f"Rashid is in **{rashid.city}** today."
@@ -366,13 +579,13 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         if ctx.bot_permissions.attach_files:
             files = []
             if npc.image is not None:
-                thumbnail = io.BytesIO(npc.image)
-                filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + ".gif"
+                image, extension, _ = await self.get_thumbnail(npc)
+                filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + f".{extension}"
                 embed.set_thumbnail(url=f"attachment://{filename}")
-                files.append(discord.File(thumbnail, filename))
+                files.append(discord.File(io.BytesIO(image), filename))
             if None not in [rashid.x, rashid.y, rashid.z]:
                 map_filename = re.sub(r"[^A-Za-z0-9]", "", npc.name) + "-map.png"
-                map_image = io.BytesIO(get_map_area(rashid.x, rashid.y, rashid.z))
+                map_image = io.BytesIO(await wiki.call(get_map_area, rashid.x, rashid.y, rashid.z))
                 embed.set_image(url=f"attachment://{map_filename}")
                 embed.add_field(name="Location", value=f"[Mapper link]"
                                                        f"({self.get_mapper_link(rashid.x,rashid.y,rashid.z)})",
@@ -389,24 +602,15 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         Shows the spell's attributes, NPCs that teach it and more.
 
         More information is displayed if used on private messages or the command channel."""
-        spell = models.Spell.get_by_field(wiki_db, "title", name, True)
-        if spell is None:
-            spell = models.Spell.get_by_field(wiki_db, "words", name, True)
-        if spell is None:
-            entries = self.search_entry("spell", name, additional_field="words")
-            if not entries:
-                await ctx.send("I couldn't find a spell with that name or words.")
-                return
-            if len(entries) > 1:
-                titles = ["{title} ({words})".format(**e) for e in entries]
-                title = await ctx.choose(titles)
-                if title is None:
-                    return
-                title = entries[titles.index(title)]["title"]
-            else:
-                title = entries[0]["title"]
-            spell: models.Spell = self.get_entry(title, models.Spell)
-        embed = await self.get_spell_embed(ctx, spell, await ctx.is_long())
+        entries = await self.search_entry("spell", name, additional_field="words")
+        if not entries:
+            await self.send_not_found(ctx, name, "I couldn't find a spell with that name or words.")
+            return
+        entry = await self.choose_entry(ctx, entries, ["{title} ({words})".format(**e) for e in entries])
+        if entry is None:
+            return
+
+        spell, embed = await self.get_article_embed(ctx, entry, models.Spell, self.get_spell_embed)
         await self.send_embed_with_image(spell, ctx, embed)
 
     @checks.can_embed()
@@ -415,54 +619,43 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         """Shows information about the TibiaWiki database."""
         embed = discord.Embed(colour=discord.Colour.blurple(), title="TibiaWiki database statistics", description="")
         embed.set_thumbnail(url=WIKI_ICON)
-        version = ""
-        gen_date = None
-        with closing(wiki_db.cursor()) as c:
-            info = c.execute("SELECT * FROM database_info").fetchall()
-            for entry in info:
-                if entry['key'] == "version":
-                    version = f" v{entry['value']}"
-                if entry['key'] == "timestamp":
-                    gen_date = float(entry['value'])
-            nb_space = '\u00a0'
-            embed.description += f"**‣ Achievements:** {self.count_table('achievement'):,}"
-            embed.description += f"\n**‣ Charms:** {self.count_table('charm'):,}"
-            embed.description += f"\n**‣ Creatures:** {self.count_table('creature'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Drops:** {self.count_table('creature_drop'):,}"
-            embed.description += f"\n**‣ Houses:** {self.count_table('house'):,}"
-            embed.description += f"\n**‣ Imbuements:** {self.count_table('imbuement'):,}"
-            embed.description += f"\n**‣ Items:** {self.count_table('item'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Attributes:** {self.count_table('item_attribute'):,}"
-            embed.description += f"\n**‣ Keys:** {self.count_table('item_key'):,}"
-            embed.description += f"\n**‣ NPCs:** {self.count_table('npc'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Buy offers:** {self.count_table('npc_offer_buy'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Sell offers:** {self.count_table('npc_offer_sell'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Destinations:** {self.count_table('npc_destination'):,}"
-            embed.description += f"\n**{nb_space*8}‣ Spell offers:** {self.count_table('npc_spell'):,}"
-            embed.description += f"\n**‣ Quests:** {self.count_table('quest'):,}"
-            embed.description += f"\n**‣ Spells:** {self.count_table('spell'):,}"
+        summary = await self.get_summary()
+        version = f" v{summary.version}" if summary.version else ""
+        counts = summary.counts
+        nb_space = '\u00a0'
+        embed.description += f"**‣ Achievements:** {counts['achievement']:,}"
+        embed.description += f"\n**‣ Charms:** {counts['charm']:,}"
+        embed.description += f"\n**‣ Creatures:** {counts['creature']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Drops:** {counts['creature_drop']:,}"
+        embed.description += f"\n**‣ Houses:** {counts['house']:,}"
+        embed.description += f"\n**‣ Imbuements:** {counts['imbuement']:,}"
+        embed.description += f"\n**‣ Items:** {counts['item']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Attributes:** {counts['item_attribute']:,}"
+        embed.description += f"\n**‣ Keys:** {counts['item_key']:,}"
+        embed.description += f"\n**‣ NPCs:** {counts['npc']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Buy offers:** {counts['npc_offer_buy']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Sell offers:** {counts['npc_offer_sell']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Destinations:** {counts['npc_destination']:,}"
+        embed.description += f"\n**{nb_space*8}‣ Spell offers:** {counts['npc_spell']:,}"
+        embed.description += f"\n**‣ Quests:** {counts['quest']:,}"
+        embed.description += f"\n**‣ Spells:** {counts['spell']:,}"
         embed.set_footer(text=f"Database generation date")
-        embed.timestamp = dt.datetime.utcfromtimestamp(gen_date)
+        embed.timestamp = dt.datetime.utcfromtimestamp(summary.timestamp)
         embed.set_author(name=f"tibiawiki-sql{version}", icon_url="https://github.com/fluidicon.png",
                          url="https://github.com/Galarzaa90/tibiawiki-sql")
         await ctx.send(embed=embed)
     # endregion
 
     # region Helper Methods
-    @classmethod
-    def count_table(cls, table):
-        try:
-            c = wiki_db.execute("SELECT COUNT(*) as count FROM %s" % table)
-            result = c.fetchone()
-            if not result:
-                return 0
-            return int(result["count"])
-        except sqlite3.OperationalError:
-            return 0
+    async def get_summary(self) -> WikiSummary:
+        """Gets the summary of the current TibiaWiki database, calculating it if necessary."""
+        if self.summary is None:
+            self.summary = await wiki.run(WikiSummary.build)
+        return self.summary
 
     @classmethod
-    def get_charms_embed(cls, ctx: NabCtx):
-        charms = models.Charm.search(wiki_db, sort_by="type")
+    async def get_charms_embed(cls, ctx: NabCtx):
+        charms = await wiki.run(models.Charm.search, sort_by="type")
         charms_url = f"{tibiawikisql.api.BASE_URL}/wiki/{WIKI_CHARMS_ARTICLE}"
         embed = discord.Embed(title="Charms", url=charms_url)
         embed.set_author(name="TibiaWiki", url=tibiawikisql.api.BASE_URL, icon_url=WIKI_ICON)
@@ -477,14 +670,102 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         return embed
 
     @classmethod
-    async def send_embed_with_image(cls, entity, ctx, embed, apply_color=False, extension="gif"):
+    async def choose_entry(cls, ctx: NabCtx, entries: List[Dict[str, Any]], labels: List[str] = None) \
+            -> Optional[Dict[str, Any]]:
+        """Lets the user choose an entry from search results, if there's more than one.
+
+        :param ctx: The command context.
+        :param entries: The search results.
+        :param labels: The label to show for every entry. By default, their titles are shown.
+        :return: The chosen entry, or None if the user didn't choose one.
+        """
+        if len(entries) == 1:
+            return entries[0]
+        if labels is None:
+            labels = [e["title"] for e in entries]
+        label = await ctx.choose(labels)
+        if label is None:
+            return None
+        return entries[labels.index(label)]
+
+    @classmethod
+    async def get_article_embed(cls, ctx: NabCtx, entry: Dict[str, Any], model,
+                                get_embed: Callable[[NabCtx, Any, bool], Awaitable[Tuple[discord.Embed, bool]]]) \
+            -> Tuple[Any, discord.Embed]:
+        """Gets an article and its embed, rendering them only if they're not cached already.
+
+        :param ctx: The command context.
+        :param entry: The search result of the article.
+        :param model: The model of the article.
+        :param get_embed: The coroutine that renders the article's embed.
+        :return: The article and its embed.
+        """
+        long = await ctx.is_long()
+        # Rashid's location changes daily, which is shown in his embed and in the embed of items he buys
+        key = (model.__name__, entry["article_id"], long, get_tibia_weekday())
+        cached: ArticleEmbed = CACHE_WIKI_EMBEDS.get(key)
+        if cached is None:
+            article = await wiki.run(model.get_by_field, "title", entry["title"])
+            embed, see_more = await get_embed(ctx, article, long)
+            cached = CACHE_WIKI_EMBEDS[key] = ArticleEmbed(article, embed.to_dict(), see_more)
+        embed = discord.Embed.from_dict(cached.embed)
+        if cached.see_more:
+            await cls.add_see_more_footer(ctx, embed)
+        return cached.article, embed
+
+    @classmethod
+    async def add_see_more_footer(cls, ctx: NabCtx, embed: discord.Embed):
+        """Adds a footer telling the user where to see the full information."""
+        ask_channel = await ctx.ask_channel_name()
+        if ask_channel:
+            askchannel_string = " or use #" + ask_channel
+        else:
+            askchannel_string = ""
+        embed.set_footer(text="To see more, PM me{0}.".format(askchannel_string))
+
+    @classmethod
+    async def get_image_color(cls, ctx: NabCtx, entity) -> Tuple[int, int, int]:
+        """Gets the average colour of an entity's image, calculating it only if it's not cached already.
+
+        :param ctx: The invocation context.
+        :param entity: The entity whose image will be used.
+        :return: The image's average colour.
+        """
+        article_id = getattr(entity, "article_id", None)
+        if article_id is None:
+            return await ctx.execute_async(average_color, entity.image)
+        key = (type(entity).__name__, article_id)
+        color = CACHE_WIKI_COLORS.get(key)
+        if color is None:
+            color = CACHE_WIKI_COLORS[key] = await ctx.execute_async(average_color, entity.image)
+        return color
+
+    async def get_thumbnail(self, entity, extension="gif") -> Tuple[bytes, str, Optional[int]]:
+        """Gets the thumbnail of an entity, using the precomputed one if available.
+
+        :param entity: The entity whose image will be used.
+        :param extension: The extension of the entity's image.
+        :return: The thumbnail's content, its extension and, if precomputed, its average colour.
+        """
+        table = type(entity).__name__.lower()
+        if self.images is not None and table in IMAGE_TABLES:
+            info = await self.images.get(table, entity.article_id)
+            if info is not None:
+                return info.thumbnail, info.extension, info.average_color
+        return entity.image, extension, None
+
+    async def send_embed_with_image(self, entity, ctx, embed, apply_color=False, extension="gif"):
         if ctx.bot_permissions.attach_files and entity.image:
-            thumbnail = io.BytesIO(entity.image)
+            image, extension, color = await self.get_thumbnail(entity, extension)
+            thumbnail = io.BytesIO(image)
             filename = f"thumbnail.{extension}"
             embed.set_thumbnail(url=f"attachment://{filename}")
             if apply_color:
-                main_color = await ctx.execute_async(average_color, entity.image)
-                embed.color = discord.Color.from_rgb(*main_color)
+                if color is not None:
+                    embed.color = discord.Color(color)
+                else:
+                    main_color = await self.get_image_color(ctx, entity)
+                    embed.color = discord.Color.from_rgb(*main_color)
             await ctx.send(file=discord.File(thumbnail, f"{filename}"), embed=embed)
         else:
             await ctx.send(embed=embed)
@@ -510,44 +791,6 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         embed.set_author(name="TibiaWiki", icon_url=WIKI_ICON, url=tibiawikisql.api.BASE_URL)
         return embed
 
-    @classmethod
-    def get_bestiary_classes(cls) -> Dict[str, int]:
-        """Gets all the bestiary classes
-
-        :return: The classes and how many creatures it has.
-        """
-        rows = wiki_db.execute("SELECT DISTINCT bestiary_class, count(*) as count "
-                               "FROM creature WHERE bestiary_class not NUll "
-                               "GROUP BY bestiary_class ORDER BY bestiary_class")
-        classes = {}
-        for r in rows:
-            classes[r["bestiary_class"]] = r["count"]
-        return classes
-
-    @classmethod
-    def get_bestiary_creatures(cls, _class: str) -> Dict[str, str]:
-        """Gets the creatures that belong to a bestiary class
-
-        :param _class: The name of the class.
-        :return: The creatures in the class, with their difficulty level.
-        """
-        rows = wiki_db.execute("""
-            SELECT title, bestiary_level
-            FROM creature
-            WHERE bestiary_class LIKE ?
-            ORDER BY
-                CASE bestiary_level
-                    WHEN "Trivial" THEN 0
-                    WHEN "Easy" THEN 1
-                    WHEN "Medium" THEN 2
-                    WHEN "Hard" THEN 3
-                END
-            """, (_class,))
-        creatures = {}
-        for r in rows:
-            creatures[r["title"]] = r["bestiary_level"]
-        return creatures
-
     @classmethod
     def get_key_embed(cls, key: models.Key):
         if key is None:
@@ -564,107 +807,80 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         return embed
 
     @classmethod
-    def get_imbuement_embed(cls, ctx: NabCtx, imbuement: models.Imbuement,  prices):
-        """Gets the item embed to show in /item command"""
+    def get_imbuement_embed(cls, ctx: NabCtx, imbuement: models.Imbuement, recipe: ImbuementRecipe, prices):
+        """Gets the imbuement embed to show in /imbuement command"""
         embed = cls.get_base_embed(imbuement)
         embed.add_field(name="Effect", value=imbuement.effect)
         if not prices:
             embed.set_footer(text=f"Provide material prices to calculate costs."
                                   f" More info: {ctx.clean_prefix}help {ctx.invoked_with}")
-        elif len(prices) < len(imbuement.materials):
+        elif len(prices) < len(recipe.materials):
             embed.set_footer(text="Not enough material prices provided for this tier.")
             prices = []
-        materials = cls.get_imbuement_embed_parse_materials(imbuement, prices)
+        materials = cls.get_imbuement_embed_parse_materials(recipe, prices)
         if not prices:
             embed.add_field(name="Materials", value=materials)
             return embed
-        fees = [5000, 25000, 100000]  # Gold fees for each tier
-        fees_100 = [15000, 55000, 150000]  # Gold fees for each tier with 100% chance
-        tiers = {"Basic": 0, "Intricate": 1, "Powerful": 2}  # Tiers order
-        tokens = [2, 4, 6]  # Token cost for materials of each tier
-        tier = tiers[imbuement.tier]  # Current tier
-        token_imbuements = ["Vampirism", "Void", "Strike"]  # Imbuements that can be bought with gold tokens
-
-        tier_prices = []  # The total materials cost for each tier
-        materials_cost = 0  # The cost of all materials for the current tier
-        for m, p in zip(imbuement.materials, prices):
-            materials_cost += m.amount * p
-            tier_prices.append(materials_cost)
-
-        def parse_prices(_tier: int, _materials: int):
-            return f"**Materials:** {_materials:,} gold.\n" \
-                   f"**Total:** {_materials+fees[_tier]:,} gold | " \
-                   f"{(_materials+fees[_tier])/20:,.0f} gold/hour\n" \
-                   f"**Total  (100% chance):** {_materials+fees_100[_tier]:,} gold | " \
-                   f"{(_materials+fees_100[_tier])/20:,.0f} gold/hour"
+        token_price = prices[len(recipe.materials)] if len(prices) > len(recipe.materials) else None
+        cost = calculate_cost(recipe, prices, token_price)
+
+        def parse_prices(_cost: ImbuementCost):
+            return f"**Materials:** {_cost.material_cost:,} gold.\n" \
+                   f"**Total:** {_cost.total:,} gold | {_cost.hourly:,.0f} gold/hour\n" \
+                   f"**Total  (100% chance):** {_cost.total_100:,} gold | {_cost.hourly_100:,.0f} gold/hour"
         # If no gold token price was provided or the imbuement type is not applicable, just show material cost
-        if len(prices)-1 <= tier or imbuement.type not in token_imbuements:
+        if cost.token_price is None:
             embed.add_field(name="Materials", value=materials)
-            embed.add_field(name="Cost", value=parse_prices(tier, materials_cost), inline=False)
-            if imbuement.type in token_imbuements:
+            embed.add_field(name="Cost", value=parse_prices(cost), inline=False)
+            if recipe.tokens_available:
                 embed.set_footer(text="Add gold token price at the end to find the cheapest option.")
             return embed
-        token_price = prices[tier+1]  # Gold token's price
-        possible_tokens = "2" if tokens[tier] == 2 else f"2-{tokens[tier]}"
+        tokens = TOKENS[recipe.tier]
+        possible_tokens = "2" if tokens == 2 else f"2-{tokens}"
         embed.add_field(name="Materials", value=f"{materials}\n――――――\n"
                                                 f"{possible_tokens} Gold Tokens ({token_price:,} gold each)")
-        token_cost = 0  # The total cost of the part that will be bought with tokens
-        cheapeast_tier = -1  # The tier which materials are more expensive than gold tokens.
-        for i in range(tier+1):
-            _token_cost = token_price*tokens[i]
-            if _token_cost < tier_prices[i]:
-                token_cost = _token_cost
-                cheapeast_tier = i
         # Using gold tokens is never cheaper.
-        if cheapeast_tier == -1:
-            embed.add_field(name="Cost", value=f"Getting the materials is cheaper.\n\n"
-                                               f"{parse_prices(tier, materials_cost)}",
+        if cost.token_tier == -1:
+            embed.add_field(name="Cost", value=f"Getting the materials is cheaper.\n\n{parse_prices(cost)}",
                             inline=False)
         # Buying everything with gold tokens is cheaper
-        elif cheapeast_tier == tier:
+        elif cost.token_tier == recipe.tier:
             embed.add_field(name="Cost", value=f"Getting all materials with gold tokens is cheaper.\n\n"
-                                               f"{parse_prices(tier, token_cost)}",
+                                               f"{parse_prices(cost)}",
                             inline=False)
         else:
-            total_cost = token_cost+tier_prices[cheapeast_tier+1]-tier_prices[cheapeast_tier]
-            embed.add_field(name="Cost", value=f"Getting the materials for **{list(tiers.keys())[cheapeast_tier]} "
-                                               f"{imbuement.type}** with gold tokens and buying the rest is "
-                                               f"cheaper.\n\n{parse_prices(tier, total_cost)}",
+            embed.add_field(name="Cost", value=f"Getting the materials for **{TIERS[cost.token_tier]} "
+                                               f"{recipe.type}** with gold tokens and buying the rest is "
+                                               f"cheaper.\n\n{parse_prices(cost)}",
                             inline=False)
         return embed
 
     @classmethod
-    def get_imbuement_embed_parse_materials(cls, imbuement, prices):
+    def get_imbuement_embed_parse_materials(cls, recipe: ImbuementRecipe, prices):
         content = ""
-        for i, material in enumerate(imbuement.materials):
+        for i, material in enumerate(recipe.materials):
             price = ""
             if prices:
                 price = f" ({prices[i]:,} gold each)"
             content += "\nx{0.amount} {0.item_title}{1}".format(material, price)
         return content
 
-    async def get_item_embed(self, ctx: NabCtx, item: models.Item, long):
-        """Gets the item embed to show in /item command"""
+    @classmethod
+    async def get_item_embed(cls, ctx: NabCtx, item: models.Item, long) -> Tuple[discord.Embed, bool]:
+        """Gets the item embed to show in /item command, and whether there's more to see."""
         short_limit = 5
         long_limit = 40
 
-        embed = self.get_base_embed(item)
+        embed = cls.get_base_embed(item)
         embed.description = item.flavor_text
-        await self.get_item_embed_parse_properties(embed, item)
-
-        too_long = self.get_item_embed_parse_offers(embed, item.sold_by, "Sold", long, short_limit)
-        too_long |= self.get_item_embed_parse_offers(embed, item.bought_by, "Bought", long, short_limit, True)
-        too_long |= self.get_item_embed_parse_rewards(embed, item.awarded_in, long, short_limit)
-        too_long |= self.get_item_embed_parse_loot(embed, item.dropped_by, long, long_limit, short_limit)
+        await cls.get_item_embed_parse_properties(embed, item)
+        await cls.ensure_rashid_positions()
 
-        if too_long and not long:
-            ask_channel = await ctx.ask_channel_name()
-            if ask_channel:
-                askchannel_string = " or use #" + ask_channel
-            else:
-                askchannel_string = ""
-            embed.set_footer(text="To see more, PM me{0}.".format(askchannel_string))
-        return embed
+        too_long = cls.get_item_embed_parse_offers(embed, item.sold_by, "Sold", long, short_limit)
+        too_long |= cls.get_item_embed_parse_offers(embed, item.bought_by, "Bought", long, short_limit, True)
+        too_long |= cls.get_item_embed_parse_rewards(embed, item.awarded_in, long, short_limit)
+        too_long |= cls.get_item_embed_parse_loot(embed, item.dropped_by, long, long_limit, short_limit)
+        return embed, too_long and not long
 
     # region Item Embed Submethods
     @classmethod
@@ -773,9 +989,8 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
     # endregion
 
     @classmethod
-    async def get_monster_embed(cls, ctx: NabCtx, monster: models.Creature, long):
-        """Gets the monster embeds to show in /mob command
-        The message is split in two embeds, the second contains loot only and is only shown if long is True"""
+    async def get_monster_embed(cls, ctx: NabCtx, monster: models.Creature, long) -> Tuple[discord.Embed, bool]:
+        """Gets the monster embed to show in /mob command, and whether there's more to see."""
         embed = cls.get_base_embed(monster)
         cls.get_monster_embed_description(embed, monster)
         cls.get_monster_embed_attributes(embed, monster, ctx)
@@ -785,8 +1000,7 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         cls.get_monster_embed_field_walking(embed, monster)
         embed.add_field(name="Abilities", value=monster.abilities, inline=False)
         cls.get_monster_embed_loot(embed, monster, long)
-        await cls.get_monster_embed_footer(ctx, monster, embed, long)
-        return embed
+        return embed, bool(monster.loot) and not long
 
     # region Monster Embed Submethods
     @classmethod
@@ -796,16 +1010,6 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         if content.strip():
             embed.add_field(name="Field Walking", value=content.strip(), inline=True)
 
-    @classmethod
-    async def get_monster_embed_footer(cls, ctx, monster: models.Creature, embed, long):
-        if monster.loot and not long:
-            ask_channel = await ctx.ask_channel_name()
-            if ask_channel:
-                askchannel_string = " or use #" + ask_channel
-            else:
-                askchannel_string = ""
-            embed.set_footer(text="To see more, PM me{0}.".format(askchannel_string))
-
     @classmethod
     def get_monster_embed_parse_walking(cls, monster: models.Creature, walk_field_name, attribute_name):
         """Adds the embed field describing which elemnts the monster walks around or through."""
@@ -917,13 +1121,14 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
     # endregion
 
     @classmethod
-    async def get_npc_embed(cls, ctx: NabCtx, npc: models.Npc, long):
-        """Gets the embed to show in /npc command"""
+    async def get_npc_embed(cls, ctx: NabCtx, npc: models.Npc, long) -> Tuple[discord.Embed, bool]:
+        """Gets the embed to show in /npc command, and whether there's more to see."""
         short_limit = 5
         long_limit = 50
         too_long = False
 
         embed = cls.get_base_embed(npc)
+        await cls.ensure_rashid_positions()
         cls.get_npc_embed_parse_basic_info(embed, npc)
         too_long |= cls.get_npc_embed_parse_offers(embed, npc.sell_offers, long, long_limit, short_limit, "Selling")
         too_long |= cls.get_npc_embed_parse_offers(embed, npc.buy_offers, long, long_limit, short_limit, "Buying")
@@ -933,14 +1138,7 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
                 value += "\n{0.name} \u2192 {0.price} gold".format(destination)
             embed.add_field(name="Destinations", value=value)
         too_long |= await cls.get_npc_embed_parse_spells(embed, npc.teaches, long, short_limit)
-        if too_long:
-            ask_channel = await ctx.ask_channel_name()
-            if ask_channel:
-                askchannel_string = " or use #" + ask_channel
-            else:
-                askchannel_string = ""
-            embed.set_footer(text="To see more, PM me{0}.".format(askchannel_string))
-        return embed
+        return embed, too_long
 
     # region NPC submethods
     @classmethod
@@ -1013,8 +1211,8 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
     # endregion
 
     @classmethod
-    async def get_spell_embed(cls, ctx: NabCtx, spell: models.Spell, long):
-        """Gets the embed to show in /spell command"""
+    async def get_spell_embed(cls, ctx: NabCtx, spell: models.Spell, long) -> Tuple[discord.Embed, bool]:
+        """Gets the embed to show in /spell command, and whether there's more to see."""
         short_limit = 5
         words = spell.words
         if "exani hur" in spell.words:
@@ -1064,15 +1262,7 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
                 elemental_emoji = config.elemental_emojis[spell.element.lower()]
         effect = f"\n\n{elemental_emoji}{spell.effect}"
         embed.description += effect
-        if too_long:
-            ask_channel = await ctx.ask_channel_name()
-            if ask_channel:
-                askchannel_string = " or use #" + ask_channel
-            else:
-                askchannel_string = ""
-            embed.set_footer(text="To see more, PM me{0}.".format(askchannel_string))
-
-        return embed
+        return embed, too_long
 
     @classmethod
     async def get_spell_embed_parse_teachers(cls, embed, teachers: List[models.NpcSpell], long, short_limit, voc_list,
@@ -1100,50 +1290,124 @@ class TibiaWiki(commands.Cog, utils.CogUtils):
         return too_long
 
     @classmethod
-    def search_entry(cls, table, term, *, additional_field=""):
-        if additional_field:
-            query = """SELECT article_id, title, name, %s FROM %s
-                       WHERE title LIKE ? or %s LIKE ?
-                       ORDER BY LENGTH(title) ASC LIMIT 15
-                       """ % (additional_field, table, additional_field)
-            params = ("%%%s%%" % term, "%%%s%%" % term)
-        else:
-            query = "SELECT article_id, title, name FROM %s WHERE title LIKE ? ORDER BY LENGTH(title) ASC LIMIT 15" % \
-                     table
-            params = ("%%%s%%" % term,)
-        c = wiki_db.execute(query, params)
-        results = c.fetchall()
+    def get_search_keys(cls) -> List[SearchKey]:
+        """Gets the search indexes that are kept built."""
+        keys = [cls.get_entry_search_key(table) for table in SEARCHABLE_TABLES]
+        keys.append(cls.get_entry_search_key("spell", "words"))
+        keys.append(KEY_SEARCH)
+        return keys
+
+    @classmethod
+    def get_entry_search_key(cls, table, additional_field="") -> SearchKey:
+        fields = ("title", additional_field) if additional_field else ("title",)
+        columns = ("article_id", "title", "name") + fields[1:]
+        return table, columns, fields
+
+    @classmethod
+    def load_search_index(cls, conn: sqlite3.Connection, key: SearchKey) -> TrigramIndex:
+        """Builds the search index of a table.
+
+        :param conn: A connection to the TibiaWiki database.
+        :param key: The table, the columns to fetch and the fields to index.
+        :return: The built index.
+        """
+        table, columns, fields = key
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+        return build_index([dict(r) for r in rows], *fields)
+
+    @classmethod
+    async def get_search_index(cls, key: SearchKey) -> TrigramIndex:
+        """Gets the search index of a table, building it if necessary."""
+        index = SEARCH_INDEXES.get(key)
+        if index is None:
+            index = SEARCH_INDEXES[key] = await wiki.run(cls.load_search_index, key)
+        return index
+
+    @classmethod
+    async def search_entry(cls, table, term, *, additional_field=""):
+        """Searches the entries of a table by their title and optionally, an additional field.
+
+        If an entry matches exactly, only that entry is returned.
+        Otherwise, entries starting with or containing the term are returned.
+        If there are none, entries similar to the term are returned instead."""
+        index = await cls.get_search_index(cls.get_entry_search_key(table, additional_field))
+        results = index.search(term, 15)
         if not results:
             return []
-        if results[0]["title"].lower() == term.lower() or \
-                (additional_field and results[0][additional_field].lower() == term.lower()):
-            return [dict(results[0])]
-        return [dict(r) for r in results]
+        if results[0].exact:
+            return [dict(results[0].entry)]
+        return [dict(r.entry) for r in results]
 
     @classmethod
-    def search_key(cls, terms):
-        """Returns a dictionary containing a NPC's info, a list of possible matches or None"""
-        c = wiki_db.cursor()
-        try:
-            # search query
-            c.execute("SELECT article_id, number, name FROM item_key "
-                      "WHERE name LIKE ? OR notes LIKE ? or origin LIKE ? LIMIT 10 ",
-                      ("%" + terms + "%",) * 3)
-            result = c.fetchall()
-            if not result:
-                return []
-            return result
-        finally:
-            c.close()
+    def build_suggestion_index(cls, indexes: Dict[SearchKey, TrigramIndex]) -> TrigramIndex[Suggestion]:
+        """Builds an index of the titles and names of the entries of every suggested table.
+
+        The entries are taken from the tables' search indexes, so no queries are needed.
+
+        :param indexes: The search indexes to take the entries from.
+        :return: The built index.
+        """
+        index = TrigramIndex()
+        added = set()
+        for (table, columns, _), search_index in indexes.items():
+            if table not in SUGGESTION_COMMANDS or "title" not in columns:
+                continue
+            for entry in search_index.entries:
+                suggestion = Suggestion(entry["title"], table)
+                if suggestion in added:
+                    continue
+                added.add(suggestion)
+                index.add(suggestion, entry["title"], entry.get("name"), entry.get("words"))
+        return index
+
+    async def send_not_found(self, ctx: NabCtx, term: str, message: str):
+        """Tells the user that a search had no results, suggesting similar entries from any table.
+
+        :param ctx: The command context.
+        :param term: The term that was searched.
+        :param message: The message to show.
+        """
+        if self.suggestions is not None:
+            results = self.suggestions.similar(term, SUGGESTION_LIMIT)
+            if results:
+                suggestions = [f"`{ctx.clean_prefix}{SUGGESTION_COMMANDS[r.entry.table]} {r.entry.title}`"
+                               for r in results]
+                message += f"\nMaybe you meant: {join_list(suggestions, ', ', ' or ')}"
+        await ctx.send(message)
 
     @classmethod
-    def get_entry(cls, title, model):
-        entry = model.get_by_field(wiki_db, "title", title)
+    async def search_key(cls, terms):
+        """Searches keys by their name, notes or origin."""
+        index = await cls.get_search_index(KEY_SEARCH)
+        return [dict(r.entry) for r in index.search(terms, 10)]
+
+    @classmethod
+    async def get_entry(cls, title, model):
+        entry = await wiki.run(model.get_by_field, "title", title)
         return entry
 
+    @classmethod
+    def load_rashid_positions(cls, conn: sqlite3.Connection) -> Dict[int, models.RashidPosition]:
+        """Gets Rashid's position for every day of the week.
+
+        :param conn: A connection to the TibiaWiki database.
+        :return: Rashid's positions, by weekday.
+        """
+        return {position.day: position for position in models.RashidPosition.search(conn)}
+
+    @classmethod
+    async def ensure_rashid_positions(cls):
+        """Loads Rashid's positions in the thread pool, if they haven't been loaded yet."""
+        if not RASHID_POSITIONS:
+            RASHID_POSITIONS.update(await wiki.run(cls.load_rashid_positions))
+
     @classmethod
     def get_rashid_position(cls) -> models.RashidPosition:
-        return models.RashidPosition.get_by_field(wiki_db, "day", get_tibia_weekday())
+        """Gets Rashid's position for the current day.
+
+        Positions are kept in memory, so they can be used while building embeds, without querying the database.
+        They are loaded with the cog, :meth:`ensure_rashid_positions` must be awaited if they may not be loaded yet."""
+        return RASHID_POSITIONS.get(get_tibia_weekday())
 
     @classmethod
     def get_mapper_link(cls, x, y, z):
@@ -14,10 +14,14 @@
 
 import asyncio
 import datetime as dt
+import heapq
 import io
 import logging
+import sqlite3
+import time
+import urllib.parse
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
 import asyncpg
 import discord
@@ -31,7 +35,7 @@ from nabbot import NabBot
 from .utils import CogUtils, checks, clean_string, get_user_avatar, single_line
 from .utils.context import NabCtx
 from .utils.converter import TimeString
-from .utils.database import DbChar, PoolConn, get_server_property, wiki_db
+from .utils.database import EVENT_NOTIFICATIONS, DbChar, PoolConn, get_server_property, wiki
 from .utils.errors import CannotPaginate
 from .utils.pages import Pages, VocationPages
 from .utils.tibia import get_voc_abb, get_voc_emoji
@@ -41,11 +45,13 @@ EVENT_DESCRIPTION_LIMIT = 400
 MAX_EVENTS = 3
 RECENT_THRESHOLD = dt.timedelta(minutes=30)
 
-FIRST_NOTIFICATION = dt.timedelta(hours=1)
-SECOND_NOTIFICATION = dt.timedelta(minutes=30)
-THIRD_NOTIFICATION = dt.timedelta(minutes=10)
-NOTIFICATIONS = [FIRST_NOTIFICATION, SECOND_NOTIFICATION, THIRD_NOTIFICATION, dt.timedelta()]
+NOTIFICATIONS = EVENT_NOTIFICATIONS
+FIRST_NOTIFICATION, SECOND_NOTIFICATION, THIRD_NOTIFICATION = NOTIFICATIONS[:3]
 TIME_MARGIN = dt.timedelta(minutes=1)
+TIMER_WINDOW = dt.timedelta(hours=6)
+"""Timers expiring within this time are loaded into memory at once."""
+NOTIFICATION_CONCURRENCY = 5
+"""Maximum number of event notifications sent at the same time per shard."""
 
 BOSS_ALIASES = {
     "tenebris": "Lady Tenebris",
@@ -53,8 +59,8 @@ BOSS_ALIASES = {
     "kroazur": "Kroazur",
     "lloyd": "Lloyd",
     "melting frozen horror": "Melting Frozen Horror",
-    "solid frozen horror": "Solid Frozen Horror",
-    "frozen horror": "Frozen Horror",
+    "solid frozen horror": "Melting Frozen Horror",
+    "frozen horror": "Melting Frozen Horror",
     "the enraged thorn knight": "The Enraged Thorn Knight",
     "mounted thorn knight": "The Enraged Thorn Knight",
     "the shielded thorn knight": "The Enraged Thorn Knight",
@@ -183,41 +189,83 @@ BOSS_COOLDOWNS = {
 log = logging.getLogger("nabbot")
 
 
+class BossInfo(NamedTuple):
+    """A boss with a cooldown, and its TibiaWiki article, if found."""
+    name: str
+    cooldown: dt.timedelta
+    title: Optional[str] = None
+    image: Optional[bytes] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        """The URL to the boss's TibiaWiki article."""
+        if self.title is None:
+            return None
+        return f"{tibiawikisql.api.BASE_URL}/wiki/{urllib.parse.quote(self.title.replace(' ', '_'))}"
+
+
 class Timers(commands.Cog, CogUtils):
     def __init__(self, bot: NabBot):
         self.bot = bot
         # Timers
-        self._timer_available = asyncio.Event(loop=bot.loop)
+        self._timers: List[Tuple[dt.datetime, int, 'Timer']] = []
+        """Heap containing the timers expiring before the end of the loaded window."""
+        self._timers_loaded_until: Optional[dt.datetime] = None
+        self._timers_changed = asyncio.Event(loop=bot.loop)
+        self._expired_timers: List[int] = []
+        """Ids of timers that already ran and are pending to be deleted from the database."""
+        self._deleted_timers: Set[int] = set()
+        """Ids of timers deleted from the database that may still be in the heap."""
+        self._loading_timers: Optional[Dict[int, 'Timer']] = None
+        """Timers created within the window while it is being loaded, by their id."""
         self.timers_task = self.bot.loop.create_task(self.check_timers())
-        self._next_timer = None
         # Events
         self._event_available = asyncio.Event(loop=bot.loop)
         self.events_announce_task = None  # This task is created after clean_events
+        self._notification_semaphores: Dict[int, asyncio.Semaphore] = {}
         self._next_event = None
 
         self.bot.loop.create_task(self.clean_events())
+        # Bosses
+        self.bosses: Dict[str, BossInfo] = self.load_bosses()
+        """The supported bosses, by their lowercase name and aliases."""
+        self.bot.loop.create_task(self.load_boss_articles())
 
     def cog_unload(self):
         log.info(f"{self.tag} Unloading cog")
         self.timers_task.cancel()
         self.events_announce_task.cancel()
+        if self._expired_timers:
+            self.bot.loop.create_task(self.flush_expired_timers())
 
     # region Tasks
     async def check_timers(self):
-        """Checks the first upcoming time and waits for it."""
+        """Runs timers as they expire.
+
+        Timers expiring within the next window are loaded in a single query and kept in a heap, so new timers only
+        need to wake up the task instead of restarting it. Expired timers are deleted from the database in batches."""
         tag = f"{self.tag}[check_timers]"
         try:
             await self.bot.wait_until_ready()
             log.debug(f"{tag} Started")
             while not self.bot.is_closed():
-                timer = self._next_timer = await self.await_next_timer(days=40)
-                log.debug(f"{tag} Next timer: {timer}")
                 now = dt.datetime.now(tz=dt.timezone.utc)
-                if timer.expires >= now:
-                    wait_time = (timer.expires - now)
-                    log.debug(f"{tag} Sleeping for {wait_time}")
-                    await asyncio.sleep(wait_time.total_seconds())
-                await self.run_timer(timer)
+                if self._timers_loaded_until is None or now >= self._timers_loaded_until:
+                    await self.load_timers(now + TIMER_WINDOW)
+                    log.debug(f"{tag} Loaded {len(self._timers):,} timers until {self._timers_loaded_until}")
+                for timer in self.pop_expired_timers(now):
+                    await self.run_timer(timer)
+                await self.flush_expired_timers()
+                self._timers_changed.clear()
+                wake_time = self._timers_loaded_until
+                if self._timers:
+                    wake_time = min(wake_time, self._timers[0][0])
+                wait_time = max((wake_time - dt.datetime.now(tz=dt.timezone.utc)).total_seconds(), 0)
+                log.debug(f"{tag} Sleeping for {wait_time:.2f} seconds")
+                try:
+                    await asyncio.wait_for(self._timers_changed.wait(), wait_time)
+                except asyncio.TimeoutError:
+                    pass
         except asyncio.CancelledError:
             pass
         except(OSError, discord.ConnectionClosed, asyncpg.PostgresConnectionError):
@@ -274,9 +322,21 @@ class Timers(commands.Cog, CogUtils):
         except Exception as e:
             log.exception(f"{tag} {e}")
 
+    async def load_boss_articles(self):
+        """Loads the TibiaWiki articles of the supported bosses, so boss timers don't need to query them."""
+        try:
+            self.bosses = await wiki.run(self.load_bosses)
+            log.debug(f"{self.tag} Boss articles loaded")
+        except sqlite3.Error as e:
+            log.warning(f"{self.tag} Couldn't load boss articles: {e}")
+
     # endregion
 
     # task Custom Events
+    @commands.Cog.listener()
+    async def on_wiki_reload(self):
+        await self.load_boss_articles()
+
     @commands.Cog.listener()
     async def on_event_notification(self, event: 'Event', reminder):
         """Announces upcoming events"""
@@ -292,13 +352,17 @@ class Timers(commands.Cog, CogUtils):
         if announce_channel_id == 0:
             return
         announce_channel = self.bot.get_channel_or_top(guild, announce_channel_id)
-        if announce_channel is not None:
+
+        async def announce():
+            if announce_channel is None:
+                return
             try:
                 await announce_channel.send(message)
             except discord.HTTPException:
                 log.debug(f"{self.tag} Could not send event event notification "
                           f"| Channel {announce_channel.id} | Server {announce_channel.guild.id}")
-        await self.notify_subscribers(event, message)
+
+        await asyncio.gather(announce(), self.notify_subscribers(event, message))
 
     @commands.Cog.listener()
     async def on_custom_timer_complete(self, timer: 'Timer'):
@@ -327,12 +391,12 @@ class Timers(commands.Cog, CogUtils):
         char = await DbChar.get_by_id(self.bot.pool, timer.extra["char_id"])
         if author is None or char is None:
             return
-        embed = discord.Embed(title=timer.name, colour=discord.Colour.green(),
+        boss = self.get_boss(timer.name)
+        embed = discord.Embed(title=timer.name, colour=discord.Colour.green(), url=boss.url if boss else None,
                               description=f"The cooldown for **{timer.name}** is over now for **{char.name}**.")
-        monster = tibiawikisql.models.Creature.get_by_field(wiki_db, "name", timer.name)
         try:
-            if monster:
-                thumbnail = io.BytesIO(monster.image)
+            if boss and boss.image:
+                thumbnail = io.BytesIO(boss.image)
                 filename = f"thumbnail.gif"
                 embed.set_thumbnail(url=f"attachment://{filename}")
                 await author.send(file=discord.File(thumbnail, f"{filename}"), embed=embed)
@@ -355,25 +419,26 @@ class Timers(commands.Cog, CogUtils):
         param = params.split(",", 2)
         name = param[0]
         now = dt.datetime.now(dt.timezone.utc)
-        if name.lower() in BOSS_ALIASES:
-            name = BOSS_ALIASES[name]
-        if name not in BOSS_COOLDOWNS:
+        boss = self.get_boss(name)
+        if boss is None:
             return await ctx.error(f"There's no boss with that name.\nFor a list of supported bosses, "
                                    f"try: `{ctx.clean_prefix}{ctx.invoked_with} bosslist`")
+        name = boss.name
         if len(param) > 1:
             char = param[1]
             db_char = await DbChar.get_by_name(ctx.pool, char)
             if db_char is None or db_char.user_id != ctx.author.id:
                 return await ctx.error(f"You don't have any registered character named `{char}`.")
             record = await ctx.pool.fetchrow("""SELECT * FROM timer WHERE type = $1 AND name = $2 AND user_id = $3
-                                               AND extra->>'char_id' = $4""",
+                                               AND extra ? 'char_id' AND extra->>'char_id' = $4""",
                                              ReminderType.BOSS.value, name, ctx.author.id, str(db_char.id))
             if not record:
                 return await ctx.send(f"**{db_char.name}** doesn't have any active cooldowns for **{name}**.")
             timer = Timer(**record)
             return await ctx.send(f"Your cooldown for **{name}** will be over in {timer.expires - now}.")
         rows = await ctx.pool.fetch("""SELECT timer.*, "character".name AS char_name, "character".world FROM timer
-                                       JOIN "character" ON "character".id = (extra->>'char_id')::int
+                                       JOIN "character" ON "character".id = CASE WHEN extra->>'char_id' ~ '^[0-9]{1,9}$'
+                                            THEN (extra->>'char_id')::integer END
                                        WHERE type = $1 AND timer.name = $2 AND timer.user_id = $3
                                        ORDER BY expires ASC""",
                                     ReminderType.BOSS.value, name, ctx.author.id)
@@ -412,7 +477,8 @@ class Timers(commands.Cog, CogUtils):
         For privacy reasons, only characters matching the tracked world of the current server will be shown.
         To see all your characters, try it on a private message."""
         rows = await ctx.pool.fetch("""SELECT timer.*, "character".name AS char_name, "character".world FROM timer
-                                       JOIN "character" ON "character".id = (extra->>'char_id')::int
+                                       JOIN "character" ON "character".id = CASE WHEN extra->>'char_id' ~ '^[0-9]{1,9}$'
+                                            THEN (extra->>'char_id')::integer END
                                        WHERE type = $1 AND timer.user_id = $2
                                        ORDER BY expires ASC""", ReminderType.BOSS.value, ctx.author.id)
         entries = []
@@ -451,14 +517,11 @@ class Timers(commands.Cog, CogUtils):
                                    f"You can also specify how long ago you killed: "
                                    f"`{ctx.clean_prefix}boss {ctx.invoked_with} Kroazur,Bubble,3h10m`")
         name, char, time_ago = (param + [None])[:3]
-        print(name, char, time_ago)
-        if name.lower() in BOSS_ALIASES:
-            name = BOSS_ALIASES[name.lower()]
-        if name in BOSS_COOLDOWNS:
-            cooldown = BOSS_COOLDOWNS[name]
-        else:
+        boss = self.get_boss(name)
+        if boss is None:
             return await ctx.error(f"There's no boss with that name.\nFor a list of supported bosses, "
                                    f"try: `{ctx.clean_prefix}boss bosslist`")
+        name, cooldown = boss.name, boss.cooldown
 
         if time_ago:
             time_ago = dt.timedelta(seconds=TimeString(time_ago).seconds)
@@ -475,8 +538,9 @@ class Timers(commands.Cog, CogUtils):
         now = dt.datetime.now(tz=dt.timezone.utc)
         expires = now + cooldown
         # Check if this char already has a pending cooldown
-        exists = await ctx.pool.fetchval("SELECT true FROM timer WHERE extra->>'char_id' = $1 AND name = $2",
-                                         str(db_char.id), name)
+        exists = await ctx.pool.fetchval("""SELECT true FROM timer WHERE type = $1 AND extra ? 'char_id'
+                                            AND extra->>'char_id' = $2 AND name = $3""",
+                                         ReminderType.BOSS.value, str(db_char.id), name)
         if exists:
             return await ctx.error(f"This character already has a running timer for this boss.\n"
                                    f"You can delete it using `{ctx.clean_prefix}{ctx.command.full_parent_name} clear "
@@ -497,11 +561,11 @@ class Timers(commands.Cog, CogUtils):
             return await ctx.error("You must specify for which of your character is the cooldown for.\n"
                                    f"e.g. `{ctx.clean_prefix}{ctx.invoked_with} remove Kroazur,Bubble`")
         name, char = param
-        if name.lower() in BOSS_ALIASES:
-            name = BOSS_ALIASES[name.lower()]
-        if name not in BOSS_COOLDOWNS:
+        boss = self.get_boss(name)
+        if boss is None:
             return await ctx.error(f"There's no boss with that name.\nFor a list of supported bosses, "
                                    f"try: `{ctx.clean_prefix}{ctx.invoked_with} bosslist`")
+        name = boss.name
 
         db_char = await DbChar.get_by_name(ctx.pool, char)
         if db_char is None:
@@ -509,8 +573,9 @@ class Timers(commands.Cog, CogUtils):
         if db_char.user_id != ctx.author.id:
             return await ctx.error("That character is not registered to you.")
         # Check if this char already has a pending cooldown
-        timer_id = await ctx.pool.fetchval("SELECT id FROM timer WHERE extra->>'char_id' = $1 AND name = $2",
-                                           str(db_char.id), name)
+        timer_id = await ctx.pool.fetchval("""SELECT id FROM timer WHERE type = $1 AND extra ? 'char_id'
+                                              AND extra->>'char_id' = $2 AND name = $3""",
+                                           ReminderType.BOSS.value, str(db_char.id), name)
         if timer_id is None:
             return await ctx.error(f"There's no active timer for boss {name} for {db_char.name}")
 
@@ -1280,21 +1345,6 @@ class Timers(commands.Cog, CogUtils):
 
     # Auxiliary functions
 
-    async def await_next_timer(self, connection=None, days=7) -> 'Timer':
-        """Finds the next upcoming timer
-
-        If there's no upcoming timer in the specified days, it will keep waiting until there's one.
-        It returns the timer when found."""
-        timer = await self.get_next_timer(connection=connection, days=days)
-        if timer is not None:
-            self._timer_available.set()
-            return timer
-
-        self._timer_available.clear()
-        self._next_timer = None
-        await self._timer_available.wait()
-        return await self.get_next_timer(connection=connection, days=days)
-
     async def await_next_event(self, connection=None, days=7) -> 'Event':
         """Finds the next upcoming event notification
 
@@ -1314,7 +1364,7 @@ class Timers(commands.Cog, CogUtils):
                            user_id: int, extra, connection=None) -> Optional['Timer']:
         """Creates a new timer.
 
-        If the created timer is the upcoming timer, it restarts the tasks."""
+        If the created timer is the upcoming timer, it wakes up the timers task."""
         conn = connection or self.bot.pool
         delta = (expires - created).total_seconds()
         query = """INSERT INTO timer(name, type, extra, expires, created, user_id)
@@ -1330,13 +1380,15 @@ class Timers(commands.Cog, CogUtils):
         timer_id = await conn.fetchval(query, name, type.value, extra, expires, created, user_id)
         timer.id = timer_id
         log.debug(f"{self.tag} Timer created {timer}")
-        if delta <= (86400 * 40):  # 40 days
-            self._timer_available.set()
-
-        if self._next_timer and expires < self._next_timer.expires:
-            log.debug(f"{self.tag} Timer is newer than next timer, restarting task")
-            self.timers_task.cancel()
-            self.timers_task = self.bot.loop.create_task(self.check_timers())
+        # Timers outside the loaded window will be loaded along with the next window.
+        if self._timers_loaded_until is not None and expires < self._timers_loaded_until:
+            if self._loading_timers is not None:
+                # The window's query may have run already, so it is added once the window is loaded.
+                self._loading_timers[timer.id] = timer
+            heapq.heappush(self._timers, (timer.expires, timer.id, timer))
+            if self._timers[0][2] is timer:
+                log.debug(f"{self.tag} Timer is newer than next timer, waking up task")
+                self._timers_changed.set()
         return timer
 
     def event_time_changed(self, event: 'Event'):
@@ -1356,36 +1408,69 @@ class Timers(commands.Cog, CogUtils):
         conn = connection or self.bot.pool
         await conn.execute("DELETE FROM timer WHERE id = $1", timer_id)
         log.debug(f"{self.tag} Timer with id {timer_id} deleted.")
-        if self._next_timer and self._next_timer.id == timer_id:
-            log.debug(f"{self.tag} Next timer was deleted, restarting task.")
-            self.timers_task.cancel()
-            self.timers_task = self.bot.loop.create_task(self.check_timers())
+        # The timer is skipped once it reaches the top of the heap.
+        if self._loading_timers is not None or any(timer_id == _id for _, _id, _ in self._timers):
+            self._deleted_timers.add(timer_id)
 
-    async def get_next_timer(self, connection=None, days=7) -> Optional['Timer']:
-        """Gets the first upcoming timer, if any."""
-        query = "SELECT * FROM timer WHERE expires < (CURRENT_DATE + $1::interval) ORDER BY expires ASC"
+    async def flush_expired_timers(self):
+        """Deletes all the timers that already ran from the database, in a single query."""
+        if not self._expired_timers:
+            return
+        timer_ids = self._expired_timers[:]
+        await self.bot.pool.execute("DELETE FROM timer WHERE id = any($1::int[])", timer_ids)
+        del self._expired_timers[:len(timer_ids)]
+        log.debug(f"{self.tag} Deleted {len(timer_ids):,} expired timers.")
+
+    async def get_timers(self, until: dt.datetime, connection=None) -> List['Timer']:
+        """Gets all the timers expiring before the specified date, from soonest to latest."""
+        query = "SELECT * FROM timer WHERE expires < $1 ORDER BY expires ASC"
         conn = connection or self.bot.pool
+        rows = await conn.fetch(query, until)
+        return [Timer(**row) for row in rows]
 
-        record = await conn.fetchrow(query, dt.timedelta(days=days))
-        if record is None:
-            return None
-        timer = Timer(**record)
-        return timer
+    async def load_timers(self, until: dt.datetime):
+        """Loads all the timers expiring before the specified date into the heap, replacing its current contents.
+
+        The new window's end is set before querying, so timers created meanwhile are added to the heap too, and timers
+        deleted meanwhile are excluded."""
+        previous_until = self._timers_loaded_until
+        self._timers_loaded_until = until
+        self._loading_timers = {}
+        try:
+            timers = await self.get_timers(until)
+        except Exception:
+            self._timers_loaded_until = previous_until
+            raise
+        finally:
+            created = self._loading_timers
+            self._loading_timers = None
+        loaded = {t.id: t for t in timers}
+        loaded.update(created)
+        # Timers that ran but are not deleted yet are excluded.
+        excluded = self._deleted_timers.union(self._expired_timers)
+        self._timers = [(t.expires, t.id, t) for t in loaded.values() if t.id not in excluded]
+        heapq.heapify(self._timers)
+        self._deleted_timers.clear()
+
+    def pop_expired_timers(self, now: dt.datetime) -> List['Timer']:
+        """Removes and returns all the timers in the heap that expired already."""
+        expired = []
+        while self._timers and self._timers[0][0] <= now:
+            _, timer_id, timer = heapq.heappop(self._timers)
+            if timer_id in self._deleted_timers:
+                self._deleted_timers.discard(timer_id)
+                continue
+            expired.append(timer)
+        return expired
 
     async def get_next_event_notification(self, connection=None, days=7) -> Optional['Event']:
         """Gets the first upcoming event, if any."""
-        query = """SELECT *, 
-                       CASE
-                           WHEN reminder = 0 THEN start-$1::interval
-                           WHEN reminder = 1 THEN start-$2::interval
-                           WHEN reminder = 2 THEN start-$3::interval
-                           WHEN reminder = 3 THEN start
-                       END as notification 
-                   FROM "event"
-                   WHERE start >= (now() + $4) AND active AND reminder <= 3
+        # The notification column is updated by a trigger whenever the start time or reminder changes.
+        query = """SELECT * FROM "event"
+                   WHERE start >= (now() + $1) AND active AND reminder <= 3
                    ORDER BY notification ASC LIMIT 1"""
         conn = connection or self.bot.pool
-        row = await conn.fetchrow(query, FIRST_NOTIFICATION, SECOND_NOTIFICATION, THIRD_NOTIFICATION, TIME_MARGIN)
+        row = await conn.fetchrow(query, TIME_MARGIN)
         if row is None:
             return None
 
@@ -1406,20 +1491,81 @@ class Timers(commands.Cog, CogUtils):
             raise errors.NabError("That event is not from this server.")
         return event
 
-    async def notify_subscribers(self, event: 'Event', content, *, embed: discord.Embed = None, include_owner=False):
-        """Sends a message to all users subscribed to an event"""
-        subscribers = event.subscribers[:]
+    def get_boss(self, name: str) -> Optional[BossInfo]:
+        """Gets a supported boss by its name or alias, case insensitive.
+
+        :param name: The name or alias of the boss.
+        :return: The boss, or None if it's not supported.
+        """
+        return self.bosses.get(" ".join(name.lower().split()))
+
+    @classmethod
+    def load_bosses(cls, conn: sqlite3.Connection = None) -> Dict[str, BossInfo]:
+        """Builds the index of supported bosses.
+
+        :param conn: A connection to the TibiaWiki database. If set, the bosses' articles are looked up.
+        :return: The bosses, by their lowercase name and aliases.
+        """
+        articles = {}
+        if conn is not None:
+            names = list(BOSS_COOLDOWNS)
+            rows = conn.execute(f"SELECT title, name, image FROM creature "
+                                f"WHERE name COLLATE NOCASE IN ({', '.join('?' * len(names))})", names)
+            articles = {row["name"].lower(): row for row in rows}
+        bosses = {}
+        for name, cooldown in BOSS_COOLDOWNS.items():
+            row = articles.get(name.lower())
+            bosses[name.lower()] = BossInfo(name, cooldown, row["title"], row["image"]) if row else \
+                BossInfo(name, cooldown)
+        for alias, name in BOSS_ALIASES.items():
+            bosses.setdefault(alias, bosses[name.lower()])
+        return bosses
+
+    def get_notification_semaphore(self, shard_id: int) -> asyncio.Semaphore:
+        """Gets the semaphore limiting the number of notifications being sent at the same time for a shard."""
+        semaphore = self._notification_semaphores.get(shard_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(NOTIFICATION_CONCURRENCY, loop=self.bot.loop)
+            self._notification_semaphores[shard_id] = semaphore
+        return semaphore
+
+    async def notify_subscribers(self, event: 'Event', content, *, embed: discord.Embed = None,
+                                 include_owner=False) -> Tuple[int, int]:
+        """Sends a message to all users subscribed to an event.
+
+        Messages are sent concurrently, up to the limit of notifications of the event's server shard.
+
+        :return: The number of users notified and the number of users that couldn't be notified."""
+        subscribers = set(event.subscribers)
         if include_owner:
-            subscribers.append(event.user_id)
-        for subscriber in subscribers:
-            member = self.bot.get_user(subscriber)
-            if member is None:
-                continue
-            try:
-                await member.send(content, embed=embed)
-                log.debug(f"{self.tag} Event notification sent | Event: {event.id} | User: {member.id}")
-            except discord.HTTPException:
-                log.debug(f"{self.tag} Could not send event notification | Event: {event.id} | User: {member.id}")
+            subscribers.add(event.user_id)
+        users = [self.bot.get_user(subscriber) for subscriber in subscribers]
+        users = [u for u in users if u is not None]
+        if not users:
+            return 0, 0
+        guild = self.bot.get_guild(event.server_id)
+        semaphore = self.get_notification_semaphore(guild.shard_id if guild else 0)
+
+        async def send_notification(user: discord.User) -> bool:
+            async with semaphore:
+                try:
+                    # DM channels are cached by the user object once created.
+                    channel = user.dm_channel or await user.create_dm()
+                    await channel.send(content, embed=embed)
+                    log.debug(f"{self.tag} Event notification sent | Event: {event.id} | User: {user.id}")
+                    return True
+                except discord.HTTPException:
+                    log.debug(f"{self.tag} Could not send event notification | Event: {event.id} | User: {user.id}")
+                    return False
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[send_notification(user) for user in users])
+        elapsed = time.perf_counter() - start
+        sent = sum(results)
+        failed = len(results) - sent
+        log.info(f"{self.tag} Event notifications delivered | Event: {event.id} | Sent: {sent} | Failed: {failed} "
+                 f"| Time: {elapsed:.2f}s")
+        return sent, failed
 
     async def run_event(self, event: 'Event'):
         """Runs an event notification.
@@ -1431,10 +1577,11 @@ class Timers(commands.Cog, CogUtils):
         self.bot.dispatch("event_notification", event, reminder)
 
     async def run_timer(self, timer, short=False):
-        """Dispatches an event for the timer."""
+        """Dispatches an event for the timer.
+
+        Timers stored in the database are queued to be deleted in the next batch."""
         if not short:
-            query = "DELETE FROM timer WHERE id=$1;"
-            await self.bot.pool.execute(query, timer.id)
+            self._expired_timers.append(timer.id)
         log.debug(f"{self.tag} Executing timer {timer}")
         if timer.type == ReminderType.CUSTOM:
             self.bot.dispatch("custom_timer_complete", timer)
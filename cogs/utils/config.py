@@ -36,6 +36,8 @@ KEYS = [
     "online_scan_interval",
     "death_scan_interval",
     "network_retry_delay",
+    "loot_workers",
+    "loot_max_scans",
     "extra_cogs",
     "command_prefix",
     "online_emoji",
@@ -100,6 +102,8 @@ class Config:
         self.online_scan_interval = 90
         self.death_scan_interval = 15
         self.network_retry_delay = 1
+        self.loot_workers = 0
+        self.loot_max_scans = 2
         self.online_emoji = "🔹"
         self.true_emoji = "✅"
         self.false_emoji = "❌"
@@ -12,26 +12,302 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import asyncio
 import datetime
+import logging
+import os
 import re
 import sqlite3
-from typing import Any, List, Optional, Union, TypeVar, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Union, TypeVar, Tuple
 
 import asyncpg
 import tibiapy
 
+log = logging.getLogger("nabbot")
+
+T = TypeVar('T')
+
 WIKIDB = "data/tibiawiki.db"
 
-# Open database in read only mode.
-wiki_db = sqlite3.connect(f"file:{WIKIDB}?mode=ro", uri=True)
-wiki_db.row_factory = sqlite3.Row
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+"""The maximum number of bytes of a SQLite database that are memory mapped by each connection."""
+SQLITE_WORKERS = 4
+"""The default number of threads used to run queries of a SQLite database."""
+SQLITE_SLOW_QUERY = 0.25
+"""Seconds after which a query is logged as slow, including the time spent waiting for a free thread."""
+
+
+def connect_sqlite(path: str, *, readonly=True, immutable=True, row_factory=sqlite3.Row) -> sqlite3.Connection:
+    """Opens a connection to a SQLite database, tuned for concurrent reads.
+
+    Read only connections are memory mapped and refuse any write. Writable connections use write-ahead logging, so
+    readers are never blocked by a writer.
+
+    :param path: The path to the database file.
+    :param readonly: Whether to open the database in read only mode.
+    :param immutable: Whether the file is assumed to not change while open. Only applies to read only connections.
+    :param row_factory: The row factory to use for the connection.
+    :return: The opened connection.
+    """
+    if readonly:
+        uri = f"file:{path}?mode=ro{'&immutable=1' if immutable else ''}"
+    else:
+        uri = f"file:{path}?mode=rwc"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.row_factory = row_factory
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    if readonly:
+        conn.execute("PRAGMA query_only = 1")
+    else:
+        conn.execute("PRAGMA journal_mode = WAL")
+    return conn
+
+
+class QueryStats:
+    """Latency statistics of a kind of query.
+
+    :ivar count: The number of times the query was run.
+    :ivar total: The total seconds spent on the query.
+    :ivar maximum: The longest time the query took, in seconds.
+    """
+    __slots__ = ("count", "total", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} count={self.count} average={self.average:.4f} maximum={self.maximum:.4f}>"
+
+    @property
+    def average(self) -> float:
+        """The average time the query took, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, elapsed: float):
+        """Records a new run of the query.
+
+        :param elapsed: The seconds the query took.
+        """
+        self.count += 1
+        self.total += elapsed
+        self.maximum = max(self.maximum, elapsed)
+
+
+class SqliteDatabase:
+    """A SQLite database with one connection per thread.
+
+    Queries can be executed synchronously on the calling thread's connection, or awaited, in which case they run in the
+    database's own thread pool, without blocking the event loop. The latency of awaited queries is recorded in
+    :attr:`stats`.
+
+    The database can be pointed to a new file at runtime using :meth:`reload`. Queries already running finish using the
+    previous file, while every thread opens a connection to the new file on its next query.
+
+    :param path: The path to the database file.
+    :param workers: The number of threads used to run queries.
+    :param readonly: Whether to open the database in read only mode.
+    :param immutable: Whether the file is assumed to not change while open.
+    :param row_factory: The row factory used by the connections.
+    """
+    def __init__(self, path: str, *, workers=SQLITE_WORKERS, readonly=True, immutable=True,
+                 row_factory=sqlite3.Row):
+        self.path = path
+        self.readonly = readonly
+        self.immutable = immutable
+        self.row_factory = row_factory
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.generation = 0
+        """The number of times the database has been reloaded."""
+        self.stats: Dict[str, QueryStats] = {}
+        """The latency statistics of awaited queries, by query."""
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sqlite")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} path={self.path!r}>"
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The connection of the current thread. It is opened the first time it's accessed."""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None and self._local.generation != self.generation:
+            with self._lock:
+                self._connections.remove(conn)
+            conn.close()
+            conn = None
+        if conn is None:
+            with self._lock:
+                path, generation = self.path, self.generation
+            conn = self._connect(path)
+            self._local.connection = conn
+            self._local.generation = generation
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        return connect_sqlite(path, readonly=self.readonly, immutable=self.immutable, row_factory=self.row_factory)
+
+    def file_signature(self) -> Tuple[int, int]:
+        """Gets the modification time and size of the database file, used to detect when the file changes."""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def execute(self, query: str, params=()) -> sqlite3.Cursor:
+        """Executes a query using the current thread's connection.
+
+        :param query: The query to execute.
+        :param params: The query's parameters.
+        :return: The cursor with the query's results.
+        """
+        return self.connection.execute(query, params)
+
+    async def reload(self, path: str = None, prepare: Callable[[sqlite3.Connection], T] = None) -> Optional[T]:
+        """Points the database to a new file, or reopens the current one.
+
+        The new file is checked for corruption and prepared in the thread pool before replacing the current one.
+        If any of these steps fails, the current file is kept.
+
+        :param path: The path to the new database file. If not set, the current file is reopened.
+        :param prepare: A function called with a connection to the new file before it is used, to validate it or to
+                        warm up data that depends on it. An exception raised by it aborts the reload.
+        :return: The value returned by the prepare function, if any.
+        :raises sqlite3.DatabaseError: If the new file is not a valid database.
+        """
+        path = path or self.path
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(self._executor, self._prepare, path, prepare)
+        with self._lock:
+            self.path = path
+            self.generation += 1
+        return result
+
+    def _prepare(self, path, prepare):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Database file not found: {path}")
+        with closing(self._connect(path)) as conn:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"Database failed integrity check: {check}")
+            if prepare is not None:
+                return prepare(conn)
+
+    async def run(self, func: Callable[..., T], *args, label: str = None) -> T:
+        """Runs a function in the database's thread pool.
+
+        The function is called with the worker thread's connection as first argument, followed by the passed arguments.
+
+        :param func: The function to run.
+        :param args: The additional arguments to pass to the function.
+        :param label: The name to record the latency under. By default, the function's name is used.
+        :return: The function's return value.
+        """
+        return await self._run(label or func.__qualname__, self._call, func, args)
+
+    async def call(self, func: Callable[..., T], *args, label: str = None) -> T:
+        """Calls a function in the database's thread pool, without passing the connection.
+
+        Meant for functions that do their queries through :attr:`connection` or :meth:`execute`.
+
+        :param func: The function to call.
+        :param args: The arguments to pass to the function.
+        :param label: The name to record the latency under. By default, the function's name is used.
+        :return: The function's return value.
+        """
+        return await self._run(label or func.__qualname__, func, *args)
+
+    async def _run(self, label, func, *args):
+        loop = asyncio.get_event_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.setdefault(label, QueryStats()).record(elapsed)
+            if elapsed >= SQLITE_SLOW_QUERY:
+                log.warning(f"Slow SQLite query | {self.path} | {label} | {elapsed*1000:.1f}ms")
+
+    def _call(self, func, args):
+        return func(self.connection, *args)
+
+    async def fetchall(self, query: str, params=()) -> List[Any]:
+        """Executes a query in the thread pool and returns all the resulting rows.
+
+        :param query: The query to execute.
+        :param params: The query's parameters.
+        :return: The resulting rows.
+        """
+        return await self.run(lambda conn: conn.execute(query, params).fetchall(), label=self._label(query))
+
+    async def fetchone(self, query: str, params=()) -> Optional[Any]:
+        """Executes a query in the thread pool and returns the first resulting row.
+
+        :param query: The query to execute.
+        :param params: The query's parameters.
+        :return: The first row, or None if there were no results.
+        """
+        return await self.run(lambda conn: conn.execute(query, params).fetchone(), label=self._label(query))
+
+    async def fetchval(self, query: str, params=(), column=0) -> Optional[Any]:
+        """Executes a query in the thread pool and returns a value of the first resulting row.
+
+        :param query: The query to execute.
+        :param params: The query's parameters.
+        :param column: The index of the column to return.
+        :return: The value, or None if there were no results.
+        """
+        row = await self.fetchone(query, params)
+        return row[column] if row is not None else None
+
+    @staticmethod
+    def _label(query: str) -> str:
+        return " ".join(query.split())[:80]
+
+    def close(self):
+        """Stops the thread pool and closes every connection.
+
+        This doesn't block, queries already submitted finish in the background before the connections are closed.
+        """
+        self._executor.shutdown(wait=False)
+        threading.Thread(target=self._close, name="sqlite-close").start()
+
+    def _close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+
+wiki = SqliteDatabase(WIKIDB)
+"""The TibiaWiki database, opened in read only mode."""
 
 # Pattern to match the number of affected rows
 result_patt = re.compile(r"(\d+)$")
 
 PoolConn = Union[asyncpg.pool.Pool, asyncpg.Connection]
 """A type alias for an union of Pool and Connection."""
-T = TypeVar('T')
+
+Keyset = Tuple[datetime.datetime, int]
+"""A type alias for the date and id of the last entry of a page, used to fetch the following page."""
+TimelineKeyset = Tuple[datetime.datetime, str, int]
+"""A type alias for the date, type and id of the last entry of a timeline page.
+
+Deaths and level ups have their own id sequences, so the type is needed to tell apart entries with the same date."""
+PAGE_SIZE = 20
+"""The default number of entries fetched per page on keyset paginated queries."""
+EVENT_NOTIFICATIONS = [datetime.timedelta(hours=1), datetime.timedelta(minutes=30), datetime.timedelta(minutes=10),
+                       datetime.timedelta()]
+"""How long before an event starts each of its notifications is sent, by reminder number.
+
+The notification times stored in the database are calculated from these, see :func:`update_notification_function`."""
 
 
 def get_affected_count(result: str) -> int:
@@ -42,6 +318,34 @@ def get_affected_count(result: str) -> int:
     return int(m.group(1))
 
 
+async def iterate_pages(fetch_page: Callable[..., Awaitable[List[T]]], after: Keyset = None, limit=PAGE_SIZE,
+                        key: Callable[[T], Tuple] = None) -> AsyncGenerator[T, None]:
+    """Creates an asynchronous generator out of a keyset paginated function.
+
+    Pages are only fetched once the entries of the previous page have been consumed.
+
+    :param fetch_page: A coroutine function accepting the ``after`` and ``limit`` keyword arguments.
+    :param after: The keyset of the entry to start after.
+    :param limit: The number of entries to fetch per page.
+    :param key: A function that gets the keyset of an entry. By default, its date and id are used.
+    :return: An asynchronous generator containing the entries.
+    """
+    while True:
+        page = await fetch_page(after=after, limit=limit)
+        for entry in page:
+            yield entry
+        if len(page) < limit:
+            return
+        after = key(page[-1]) if key else (page[-1].date, page[-1].id)
+
+
+def _split_keyset(after: Optional[Keyset]) -> Tuple[Optional[datetime.datetime], int]:
+    """Splits a keyset into its date and id, to be used as query parameters."""
+    if after is None:
+        return None, 0
+    return after
+
+
 async def set_prefixes(pool: PoolConn, guild_id: int, prefixes: List[str]):
     """Sets the new server prefixes.
 
@@ -165,7 +469,7 @@ class DbChar(tibiapy.abc.BaseCharacter):
         async with conn.transaction():
             async for row in conn.cursor(f"""
                     (
-                        SELECT d.*, json_agg(k)::jsonb as killers, 'd' AS type
+                        SELECT d.id, d.character_id, d.level, d.date, json_agg(k)::jsonb as killers, 'd' AS type
                         FROM character_death d
                         LEFT JOIN {DbKiller.table} k ON k.death_id = d.id
                         WHERE d.character_id = $1
@@ -436,28 +740,52 @@ class DbLevelUp:
                 yield cls(**row)
 
     @classmethod
-    async def get_latest(cls, conn: PoolConn, *, minimum_level=0, user_id=0, worlds: Union[List[str], str] = None):
+    def get_latest(cls, conn: PoolConn, *, minimum_level=0, user_id=0, worlds: Union[List[str], str] = None,
+                   after: Keyset = None) -> AsyncGenerator['DbLevelUp', None]:
         """Gets an asynchronous generator of the character's level ups.
 
+        Entries are fetched in pages, as they are consumed.
+
         :param conn: Connection to the database.
         :param minimum_level: The minimum level to show.
         :param user_id: The id of an user to only show level ups of characters they own.
         :param worlds: A list of worlds to only show level ups of characters in that world.
+        :param after: The date and id of the level up to start after.
         :return: An asynchronous generator containing the levels.
         """
+        async def fetch_page(**kwargs):
+            return await cls.get_latest_page(conn, minimum_level=minimum_level, user_id=user_id, worlds=worlds,
+                                             **kwargs)
+        return iterate_pages(fetch_page, after)
+
+    @classmethod
+    async def get_latest_page(cls, conn: PoolConn, *, minimum_level=0, user_id=0,
+                              worlds: Union[List[str], str] = None, after: Keyset = None, limit=PAGE_SIZE) \
+            -> List['DbLevelUp']:
+        """Gets a page of recent level ups, from most recent.
+
+        :param conn: Connection to the database.
+        :param minimum_level: The minimum level to show.
+        :param user_id: The id of an user to only show level ups of characters they own.
+        :param worlds: A list of worlds to only show level ups of characters in that world.
+        :param after: The date and id of the last level up of the previous page.
+        :param limit: The maximum number of level ups to get.
+        :return: A list containing the level ups.
+        """
         if isinstance(worlds, str):
             worlds = [worlds]
         if not worlds:
             worlds = []
-        async with conn.transaction():
-            async for row in conn.cursor("""
-                    SELECT l.*, (json_agg(c)->>0)::jsonb as char FROM character_levelup l
-                    LEFT JOIN "character" c ON c.id = l.character_id
-                    WHERE ($1::bigint = 0 OR c.user_id = $1) AND (cardinality($2::text[]) = 0 OR c.world = any($2))
-                    AND l.level >= $3
-                    GROUP BY l.id
-                    ORDER BY date DESC""", user_id, worlds, minimum_level):
-                yield cls(**row)
+        after_date, after_id = _split_keyset(after)
+        rows = await conn.fetch("""
+            SELECT l.*, to_jsonb(c) as char FROM character_levelup l
+            INNER JOIN "character" c ON c.id = l.character_id
+            WHERE ($1::bigint = 0 OR c.user_id = $1) AND (cardinality($2::text[]) = 0 OR c.world = any($2))
+            AND l.level >= $3
+            AND ($4::timestamptz IS NULL OR (l.date <= $4 AND (l.date < $4 OR l.id < $5::integer)))
+            ORDER BY l.date DESC, l.id DESC
+            LIMIT $6""", user_id, worlds, minimum_level, after_date, after_id, limit)
+        return [cls(**row) for row in rows]
 
 
 class BaseKiller:
@@ -605,33 +933,57 @@ class DbDeath:
                 yield DbDeath(**row)
 
     @classmethod
-    async def get_latest(cls, conn: PoolConn, minimum_level=0, *, user_id=0, worlds: Union[List[str], str] = None):
-        """Gets an asynchronous generator of recent level ups.
+    def get_latest(cls, conn: PoolConn, minimum_level=0, *, user_id=0, worlds: Union[List[str], str] = None,
+                   after: Keyset = None) -> AsyncGenerator['DbDeath', None]:
+        """Gets an asynchronous generator of recent deaths.
+
+        Entries are fetched in pages, as they are consumed.
 
         :param conn: Connection to the database.
         :param minimum_level: The minimum level to show.
         :param user_id: The id of an user to only show deaths of characters they own.
         :param worlds: A list of worlds to only show deaths of characters in that world.
+        :param after: The date and id of the death to start after.
         :return: An asynchronous generator containing the deaths.
         """
+        async def fetch_page(**kwargs):
+            return await cls.get_latest_page(conn, minimum_level, user_id=user_id, worlds=worlds, **kwargs)
+        return iterate_pages(fetch_page, after)
+
+    @classmethod
+    async def get_latest_page(cls, conn: PoolConn, minimum_level=0, *, user_id=0,
+                              worlds: Union[List[str], str] = None, after: Keyset = None, limit=PAGE_SIZE) \
+            -> List['DbDeath']:
+        """Gets a page of recent deaths, from most recent.
+
+        :param conn: Connection to the database.
+        :param minimum_level: The minimum level to show.
+        :param user_id: The id of an user to only show deaths of characters they own.
+        :param worlds: A list of worlds to only show deaths of characters in that world.
+        :param after: The date and id of the last death of the previous page.
+        :param limit: The maximum number of deaths to get.
+        :return: A list containing the deaths.
+        """
         if isinstance(worlds, str):
             worlds = [worlds]
         if not worlds:
             worlds = []
-        async with conn.transaction():
-            async for row in conn.cursor(f"""
-                    SELECT (json_agg(c)->>0)::jsonb as char, d.*, 
-                    json_agg(dk)::jsonb as killers, json_agg(da)::jsonb as assists
-                    FROM character_death d
-                    LEFT JOIN {DbKiller.table} dk ON dk.death_id = d.id
-                    LEFT JOIN {DbAssist.table} da ON da.death_id = d.id
-                    LEFT JOIN "character" c ON c.id = d.character_id
-                    WHERE ($1::bigint = 0 OR c.user_id = $1) AND
-                    (cardinality($2::text[]) = 0 OR c.world = any($2)) AND d.level >= $3
-                    GROUP BY d.id ORDER BY date DESC
-                    """, user_id, worlds, minimum_level):
-                death = DbDeath(**row)
-                yield death
+        after_date, after_id = _split_keyset(after)
+        rows = await conn.fetch(f"""
+            SELECT to_jsonb(c) as char, d.*,
+            COALESCE((SELECT jsonb_agg(dk ORDER BY dk.position) FROM {DbKiller.table} dk WHERE dk.death_id = d.id),
+                     '[]') as killers,
+            COALESCE((SELECT jsonb_agg(da ORDER BY da.position) FROM {DbAssist.table} da WHERE da.death_id = d.id),
+                     '[]') as assists
+            FROM character_death d
+            INNER JOIN "character" c ON c.id = d.character_id
+            WHERE ($1::bigint = 0 OR c.user_id = $1) AND
+            (cardinality($2::text[]) = 0 OR c.world = any($2)) AND d.level >= $3
+            AND ($4::timestamptz IS NULL OR (d.date <= $4 AND (d.date < $4 OR d.id < $5::integer)))
+            ORDER BY d.date DESC, d.id DESC
+            LIMIT $6
+            """, user_id, worlds, minimum_level, after_date, after_id, limit)
+        return [cls(**row) for row in rows]
 
     @classmethod
     async def get_by_killer(cls, conn: PoolConn, killer, minimum_level=0, *, worlds: Union[List[str], str] = None):
@@ -687,8 +1039,9 @@ class DbDeath:
         :param assists: List of players that contributed to the death indirectly.
         :return: The inserted entry.
         """
-        row_id = await conn.fetchval("""INSERT INTO character_death(character_id, level, date) VALUES($1, $2, $3)
-                                                RETURNING id""", char_id, level, date)
+        row_id = await conn.fetchval("""INSERT INTO character_death(character_id, level, date, world)
+                                        VALUES($1, $2, $3, (SELECT world FROM "character" WHERE id = $1))
+                                        RETURNING id""", char_id, level, date)
         for pos, killer in enumerate(killers):
             killer.death_id = row_id
             killer.position = pos
@@ -703,42 +1056,78 @@ class DbDeath:
         return death
 
 
-async def get_recent_timeline(conn: PoolConn, *, minimum_level=0, user_id=0, worlds: Union[List[str], str] = None):
+def get_recent_timeline(conn: PoolConn, *, minimum_level=0, user_id=0, worlds: Union[List[str], str] = None,
+                        after: TimelineKeyset = None) -> AsyncGenerator[Union['DbDeath', 'DbLevelUp'], None]:
     """Gets an asynchronous generator of recent deaths and level ups
 
+    Entries are fetched in pages, as they are consumed.
+
     :param conn: Connection to the database.
     :param minimum_level: The minimum level to show.
     :param user_id: The id of an user to only show entries of characters they own.
     :param worlds: A list of worlds to only show entries of characters in that world.
+    :param after: The date, type and id of the entry to start after.
     :return: An asynchronous generator containing the entries.
     """
+    async def fetch_page(**kwargs):
+        return await get_recent_timeline_page(conn, minimum_level=minimum_level, user_id=user_id, worlds=worlds,
+                                              **kwargs)
+    return iterate_pages(fetch_page, after, key=_timeline_keyset)
+
+
+def _timeline_keyset(entry: Union['DbDeath', 'DbLevelUp']) -> TimelineKeyset:
+    """Gets the keyset of a timeline entry."""
+    return entry.date, "l" if isinstance(entry, DbLevelUp) else "d", entry.id
+
+
+async def get_recent_timeline_page(conn: PoolConn, *, minimum_level=0, user_id=0,
+                                   worlds: Union[List[str], str] = None, after: TimelineKeyset = None,
+                                   limit=PAGE_SIZE) \
+        -> List[Union[DbDeath, DbLevelUp]]:
+    """Gets a page of recent deaths and level ups, from most recent.
+
+    Each part of the union is limited on its own, so only the most recent entries of each table are read.
+
+    :param conn: Connection to the database.
+    :param minimum_level: The minimum level to show.
+    :param user_id: The id of an user to only show entries of characters they own.
+    :param worlds: A list of worlds to only show entries of characters in that world.
+    :param after: The date, type and id of the last entry of the previous page.
+    :param limit: The maximum number of entries to get.
+    :return: A list containing the entries.
+    """
     if isinstance(worlds, str):
         worlds = [worlds]
     if not worlds:
         worlds = []
-    async with conn.transaction():
-        async for row in conn.cursor(f"""
-                (
-                    SELECT d.*, (json_agg(c)->>0)::jsonb as char, json_agg(k)::jsonb as killers, 'd' AS type
-                    FROM character_death d
-                    LEFT JOIN {DbKiller.table} k ON k.death_id = d.id
-                    LEFT JOIN "character" c ON c.id = d.character_id
-                    WHERE ($1::bigint = 0 OR c.user_id = $1) AND
-                    (cardinality($2::text[]) = 0 OR c.world = any($2)) AND d.level >= $3
-                    GROUP BY d.id
-                )
-                UNION
-                (
-                    SELECT l.*, (json_agg(c)->>0)::jsonb as char, NULL, 'l' AS type
-                    FROM character_levelup l
-                    LEFT JOIN "character" c ON c.id = l.character_id
-                    WHERE ($1::bigint = 0 OR c.user_id = $1) AND
-                    (cardinality($2::text[]) = 0 OR c.world = any($2)) AND l.level >= $3
-                    GROUP BY l.id
-                )
-                ORDER by date DESC
-                """, user_id, worlds, minimum_level):
-            if row["type"] == "l":
-                yield DbLevelUp(**row)
-            else:
-                yield DbDeath(**row)
+    after_date, after_type, after_id = after if after is not None else (None, None, 0)
+    # Entries are sorted by date, type and id. For the same date, level ups go before deaths.
+    rows = await conn.fetch(f"""
+        (
+            SELECT d.id, d.character_id, d.level, d.date, to_jsonb(c) as char,
+            COALESCE((SELECT jsonb_agg(k ORDER BY k.position) FROM {DbKiller.table} k WHERE k.death_id = d.id),
+                     '[]') as killers,
+            'd' AS type
+            FROM character_death d
+            INNER JOIN "character" c ON c.id = d.character_id
+            WHERE ($1::bigint = 0 OR c.user_id = $1) AND
+            (cardinality($2::text[]) = 0 OR c.world = any($2)) AND d.level >= $3
+            AND ($4::timestamptz IS NULL OR (d.date <= $4 AND (d.date < $4 OR $7::text = 'l' OR d.id < $5::integer)))
+            ORDER BY d.date DESC, d.id DESC
+            LIMIT $6
+        )
+        UNION ALL
+        (
+            SELECT l.*, to_jsonb(c) as char, NULL, 'l' AS type
+            FROM character_levelup l
+            INNER JOIN "character" c ON c.id = l.character_id
+            WHERE ($1::bigint = 0 OR c.user_id = $1) AND
+            (cardinality($2::text[]) = 0 OR c.world = any($2)) AND l.level >= $3
+            AND ($4::timestamptz IS NULL OR (l.date <= $4 AND (l.date < $4 OR ($7::text = 'l' AND l.id < $5::integer))))
+            ORDER BY l.date DESC, l.id DESC
+            LIMIT $6
+        )
+        ORDER BY date DESC, type DESC, id DESC
+        LIMIT $6
+        """, user_id, worlds, minimum_level, after_date, after_id, limit, after_type)
+    return [DbLevelUp(**row) if row["type"] == "l" else DbDeath(**row) for row in rows]
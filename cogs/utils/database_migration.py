@@ -18,15 +18,22 @@ import logging
 import os
 import sqlite3
 import time
-from typing import Dict
+from typing import Dict, List
 
 import asyncpg
 
-from cogs.utils.database import get_affected_count
+from cogs.utils.database import EVENT_NOTIFICATIONS, get_affected_count
 
-LATEST_VERSION = 1
+LATEST_VERSION = 5
 SQL_DB_LASTVERSION = 22
 
+PARTITIONED_TABLES = ["character_death", "character_levelup"]
+"""Tables that are range partitioned by month on their date column."""
+PARTITIONS_AHEAD = 3
+"""Number of future monthly partitions to keep created in advance."""
+MOVING_ROWS_SETTING = "nabbot.moving_rows"
+"""Setting enabled while rows are moved between partitions, so row triggers can ignore them."""
+
 log = logging.getLogger("nabbot")
 
 
@@ -39,9 +46,13 @@ async def check_database(pool: asyncpg.pool.Pool):
             if version <= 0:
                 log.info("Schema is empty, creating tables.")
                 await create_database(con)
-                await set_version(con, 1)
+                version = 1
             else:
-                log.info("\tVersion 1 found.")
+                log.info(f"\tVersion {version} found.")
+            if version < LATEST_VERSION:
+                await update_database(con, version)
+            await update_notification_function(con)
+            await create_partitions(con)
     except asyncpg.InsufficientPrivilegeError as e:
         log.error(f"PostgreSQL error: {e}")
         return False
@@ -84,7 +95,54 @@ async def create_database(con: asyncpg.connection.Connection):
     for trigger in triggers:
         await con.execute(trigger)
     log.info("Setting version to 1...")
-    await set_version(con, LATEST_VERSION)
+    await set_version(con, 1)
+
+
+async def update_database(con: asyncpg.connection.Connection, version: int):
+    """Applies all the migrations newer than the current version.
+
+    Each migration runs in its own transaction, so a failed migration leaves the database in its last valid version.
+    """
+    for new_version, migration in sorted(migrations.items()):
+        if new_version <= version:
+            continue
+        log.info(f"Updating database to version {new_version}...")
+        async with con.transaction():
+            await migration(con)
+            await set_version(con, new_version)
+        log.info(f"\tUpdated database to version {new_version}")
+
+
+async def update_notification_function(con: asyncpg.connection.Connection):
+    """Makes sure the function that calculates the notification time of events matches :data:`EVENT_NOTIFICATIONS`.
+
+    If the function is changed, the notification times of existing events are calculated again.
+
+    :param con: Connection to the database.
+    """
+    cases = "\n".join(f"        WHEN NEW.reminder = {i} THEN NEW.start - interval '{delta.total_seconds():.0f} seconds'"
+                      for i, delta in enumerate(EVENT_NOTIFICATIONS))
+    source = f"""
+BEGIN
+    NEW.notification = CASE
+{cases}
+    END;
+    RETURN NEW;
+END;
+"""
+    current = await con.fetchval("SELECT prosrc FROM pg_proc WHERE proname = 'update_event_notification'")
+    if current == source:
+        return
+    async with con.transaction():
+        await con.execute(f"""
+            CREATE OR REPLACE FUNCTION update_event_notification() RETURNS trigger
+                LANGUAGE plpgsql
+                AS $${source}$$;
+        """)
+        if current is not None:
+            log.info("Event notification times changed, updating events.")
+            # Fires the trigger for existing rows.
+            await con.execute("UPDATE event SET reminder = reminder")
 
 
 async def set_version(con: asyncpg.connection.Connection, version):
@@ -371,6 +429,435 @@ triggers = [
 ]
 
 
+# region Partitions
+def _month_start(date: datetime.datetime) -> datetime.datetime:
+    """Gets the first instant of the month of a date, in UTC."""
+    return datetime.datetime(date.year, date.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _add_months(date: datetime.datetime, months: int) -> datetime.datetime:
+    """Moves a month start date a number of months forward or backwards."""
+    month = date.month - 1 + months
+    return date.replace(year=date.year + month // 12, month=month % 12 + 1)
+
+
+def get_partition_name(table: str, month: datetime.datetime) -> str:
+    """Gets the name of a table's partition for a given month.
+
+    :param table: The name of the partitioned table.
+    :param month: Any date of the month the partition covers.
+    :return: The partition's name, e.g. character_death_y2019m03.
+    """
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+async def get_partitions(con: asyncpg.connection.Connection, table: str) -> List[str]:
+    """Gets the names of the partitions currently attached to a table, excluding the default partition.
+
+    :param con: Connection to the database.
+    :param table: The name of the partitioned table.
+    :return: A sorted list with the partitions' names.
+    """
+    rows = await con.fetch("""SELECT c.relname FROM pg_inherits i
+                              INNER JOIN pg_class c ON c.oid = i.inhrelid
+                              INNER JOIN pg_class p ON p.oid = i.inhparent
+                              WHERE p.relname = $1 AND c.relname != $2
+                              ORDER BY c.relname""", table, f"{table}_default")
+    return [r["relname"] for r in rows]
+
+
+async def create_partition(con: asyncpg.connection.Connection, table: str, month: datetime.datetime) -> bool:
+    """Creates the monthly partition of a table, if it doesn't exist already.
+
+    Rows that ended in the default partition because their month's partition didn't exist yet are moved to the new
+    partition. Moved rows are neither new nor deleted, so while they are moved, :data:`MOVING_ROWS_SETTING` is set for
+    row triggers to skip them.
+
+    :param con: Connection to the database.
+    :param table: The name of the partitioned table.
+    :param month: Any date of the month the partition will cover.
+    :return: Whether the partition was created or not.
+    """
+    start = _month_start(month)
+    end = _add_months(start, 1)
+    name = get_partition_name(table, start)
+    exists = await con.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+    if exists:
+        return False
+    default = f"{table}_default"
+    async with con.transaction():
+        # A partition can't be created while the default partition holds rows within its range.
+        await con.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+        await con.execute(f"""CREATE TABLE {name} PARTITION OF {table}
+                              FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')""")
+        # Only lasts until the end of the transaction
+        await con.execute(f"SET LOCAL {MOVING_ROWS_SETTING} = 'on'")
+        result = await con.execute(f"""
+            WITH moved AS (DELETE FROM {default} WHERE date >= $1 AND date < $2 RETURNING *)
+            INSERT INTO {name} SELECT * FROM moved""", start, end)
+        await con.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    log.info(f"Created partition {name}, {get_affected_count(result):,} rows moved from {default}.")
+    return True
+
+
+async def create_partitions(con: asyncpg.connection.Connection, months_ahead: int = PARTITIONS_AHEAD):
+    """Makes sure partitions exist for the current month and the following months for all partitioned tables.
+
+    :param con: Connection to the database.
+    :param months_ahead: The number of months after the current one to create partitions for.
+    """
+    current = _month_start(datetime.datetime.now(datetime.timezone.utc))
+    for table in PARTITIONED_TABLES:
+        for i in range(months_ahead + 1):
+            await create_partition(con, table, _add_months(current, i))
+
+
+async def detach_partitions(con: asyncpg.connection.Connection, before: datetime.datetime, drop=False) -> List[str]:
+    """Detaches the partitions of all partitioned tables that only contain entries older than the specified date.
+
+    Detached partitions remain as regular tables, unless they are dropped. Note that killers and assists of deaths in
+    dropped partitions are also deleted, while their daily death statistics are kept.
+
+    :param con: Connection to the database.
+    :param before: Partitions whose range ends before or at this date are detached.
+    :param drop: Whether to also drop the detached partitions.
+    :return: The list of detached partitions.
+    """
+    limit = _month_start(before)
+    detached = []
+    for table in PARTITIONED_TABLES:
+        for name in await get_partitions(con, table):
+            year, month = int(name[-7:-3]), int(name[-2:])
+            end = _add_months(datetime.datetime(year, month, 1, tzinfo=datetime.timezone.utc), 1)
+            if end > limit:
+                continue
+            async with con.transaction():
+                await con.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                if drop:
+                    if table == "character_death":
+                        await con.execute(f"DELETE FROM character_death_killer WHERE death_id IN "
+                                          f"(SELECT id FROM {name})")
+                        await con.execute(f"DELETE FROM character_death_assist WHERE death_id IN "
+                                          f"(SELECT id FROM {name})")
+                    await con.execute(f"DROP TABLE {name}")
+            log.info(f"{'Dropped' if drop else 'Detached'} partition {name}.")
+            detached.append(name)
+    return detached
+
+
+async def _partition_table(con: asyncpg.connection.Connection, table: str, create_query: str):
+    """Converts an existing table into a monthly range partitioned table, keeping its rows and id sequence.
+
+    Rows without a date can't be placed in any partition, so they are moved to a separate table, ``<table>_undated``.
+
+    :param con: Connection to the database.
+    :param table: The name of the table to convert.
+    :param create_query: The query that creates the partitioned table.
+    """
+    log.info(f"\tConverting {table} to a partitioned table...")
+    await con.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    # Constraint indexes keep their names, which would clash with the ones of the new table.
+    for row in await con.fetch("SELECT indexname FROM pg_indexes WHERE tablename = $1", f"{table}_old"):
+        await con.execute(f"ALTER INDEX {row['indexname']} RENAME TO {row['indexname']}_old")
+    await con.execute(create_query)
+    await con.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    await con.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    first, last = await con.fetchrow(f"SELECT min(date), max(date) FROM {table}_old")
+    if first is not None:
+        month = _month_start(first)
+        while month <= last:
+            name = get_partition_name(table, month)
+            await con.execute(f"""CREATE TABLE {name} PARTITION OF {table}
+                                  FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')""")
+            month = _add_months(month, 1)
+    result = await con.execute(f"""INSERT INTO {table}(id, character_id, level, date)
+                                   SELECT id, character_id, level, date FROM {table}_old WHERE date IS NOT NULL""")
+    log.info(f"\tCopied {get_affected_count(result):,} rows.")
+    # Rows without a date can't be partitioned, they are kept apart instead of being dropped with the old table
+    result = await con.execute(f"CREATE TABLE {table}_undated AS SELECT * FROM {table}_old WHERE date IS NULL")
+    undated = get_affected_count(result)
+    if undated:
+        log.warning(f"\t{undated:,} rows without a date were not copied, they were moved to {table}_undated.")
+    else:
+        await con.execute(f"DROP TABLE {table}_undated")
+
+
+async def migrate_v2(con: asyncpg.connection.Connection):
+    """Partitions character_death and character_levelup by month.
+
+    Since foreign keys can't reference partitioned tables, deletion of a death's killers and assists is done by a
+    trigger instead.
+    """
+    await con.execute("ALTER TABLE character_death_killer DROP CONSTRAINT IF EXISTS character_death_killer_death_id_fkey")
+    await con.execute("ALTER TABLE character_death_assist DROP CONSTRAINT IF EXISTS character_death_assist_death_id_fkey")
+    await _partition_table(con, "character_death", """
+        CREATE TABLE character_death (
+            id integer NOT NULL DEFAULT nextval('character_death_id_seq'),
+            character_id integer NOT NULL,
+            level smallint,
+            date timestamptz NOT NULL,
+            PRIMARY KEY (id, date),
+            FOREIGN KEY (character_id) REFERENCES "character" (id) ON DELETE CASCADE,
+            UNIQUE(character_id, date)
+        ) PARTITION BY RANGE (date);
+    """)
+    await _partition_table(con, "character_levelup", """
+        CREATE TABLE character_levelup (
+            id integer NOT NULL DEFAULT nextval('character_levelup_id_seq'),
+            character_id integer NOT NULL,
+            level smallint,
+            date timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, date),
+            FOREIGN KEY (character_id) REFERENCES "character" (id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (date);
+    """)
+    await con.execute("DROP TABLE character_death_old, character_levelup_old")
+    await con.execute("CREATE INDEX character_death_date_idx ON character_death (date DESC, id DESC)")
+    await con.execute("CREATE INDEX character_levelup_date_idx ON character_levelup (date DESC, id DESC)")
+    await con.execute("CREATE INDEX character_levelup_character_id_idx ON character_levelup (character_id, date DESC)")
+    await con.execute("CREATE INDEX character_death_killer_death_id_idx ON character_death_killer (death_id)")
+    await con.execute("CREATE INDEX character_death_assist_death_id_idx ON character_death_assist (death_id)")
+    await con.execute("""
+        CREATE OR REPLACE FUNCTION delete_death_killers() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            DELETE FROM character_death_killer WHERE death_id = OLD.id;
+            DELETE FROM character_death_assist WHERE death_id = OLD.id;
+            RETURN OLD;
+        END;
+        $$;
+    """)
+    await con.execute("""
+        CREATE TRIGGER delete_character_death_killers
+        AFTER DELETE ON character_death
+        FOR EACH ROW EXECUTE PROCEDURE delete_death_killers();
+    """)
+# endregion
+
+
+async def migrate_v3(con: asyncpg.connection.Connection):
+    """Adds daily death statistics per world, maintained by triggers as deaths and killers are inserted."""
+    await con.execute("""
+        CREATE TABLE character_death_stats (
+            world text NOT NULL,
+            day date NOT NULL,
+            character_id integer NOT NULL,
+            count integer NOT NULL DEFAULT 0,
+            PRIMARY KEY (world, day, character_id),
+            FOREIGN KEY (character_id) REFERENCES "character" (id) ON DELETE CASCADE
+        );
+    """)
+    await con.execute("""
+        CREATE TABLE character_death_killer_stats (
+            world text NOT NULL,
+            day date NOT NULL,
+            name text NOT NULL,
+            count integer NOT NULL DEFAULT 0,
+            PRIMARY KEY (world, day, name)
+        );
+    """)
+    await con.execute("CREATE INDEX character_death_stats_day_idx ON character_death_stats (day)")
+    await con.execute("""
+        CREATE OR REPLACE FUNCTION update_death_stats() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            INSERT INTO character_death_stats(world, day, character_id, count)
+            SELECT COALESCE(c.world, ''), (NEW.date AT TIME ZONE 'UTC')::date, NEW.character_id, 1
+            FROM "character" c WHERE c.id = NEW.character_id
+            ON CONFLICT (world, day, character_id)
+            DO UPDATE SET count = character_death_stats.count + 1;
+            RETURN NEW;
+        END;
+        $$;
+    """)
+    await con.execute("""
+        CREATE OR REPLACE FUNCTION update_death_killer_stats() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            INSERT INTO character_death_killer_stats(world, day, name, count)
+            SELECT COALESCE(c.world, ''), (d.date AT TIME ZONE 'UTC')::date, NEW.name, 1
+            FROM character_death d
+            INNER JOIN "character" c ON c.id = d.character_id
+            WHERE d.id = NEW.death_id
+            ON CONFLICT (world, day, name)
+            DO UPDATE SET count = character_death_killer_stats.count + 1;
+            RETURN NEW;
+        END;
+        $$;
+    """)
+    await con.execute("""
+        CREATE TRIGGER update_character_death_stats
+        AFTER INSERT ON character_death
+        FOR EACH ROW EXECUTE PROCEDURE update_death_stats();
+    """)
+    await con.execute("""
+        CREATE TRIGGER update_character_death_killer_stats
+        AFTER INSERT ON character_death_killer
+        FOR EACH ROW EXECUTE PROCEDURE update_death_killer_stats();
+    """)
+    # The tables are filled by migrate_v5, once deaths store their world
+
+
+async def refresh_death_stats(con: asyncpg.connection.Connection):
+    """Recalculates the death statistics tables from the registered deaths.
+
+    Statistics are updated as deaths are inserted, so this is only needed to fill the tables or to fix inconsistencies.
+    """
+    log.info("\tCalculating death statistics...")
+    await con.execute("TRUNCATE character_death_stats, character_death_killer_stats")
+    result = await con.execute("""
+        INSERT INTO character_death_stats(world, day, character_id, count)
+        SELECT COALESCE(d.world, c.world, ''), (d.date AT TIME ZONE 'UTC')::date, d.character_id, count(*)
+        FROM character_death d
+        INNER JOIN "character" c ON c.id = d.character_id
+        GROUP BY 1, 2, 3
+    """)
+    log.info(f"\tInserted {get_affected_count(result):,} character statistics.")
+    result = await con.execute("""
+        INSERT INTO character_death_killer_stats(world, day, name, count)
+        SELECT COALESCE(d.world, c.world, ''), (d.date AT TIME ZONE 'UTC')::date, k.name, count(*)
+        FROM character_death_killer k
+        INNER JOIN character_death d ON d.id = k.death_id
+        LEFT JOIN "character" c ON c.id = d.character_id
+        GROUP BY 1, 2, 3
+    """)
+    log.info(f"\tInserted {get_affected_count(result):,} killer statistics.")
+
+
+async def migrate_v4(con: asyncpg.connection.Connection):
+    """Adds the indexes used to look up upcoming timers, event notifications and boss cooldowns.
+
+    PostgreSQL 11 doesn't support generated columns and the notification time can't be used in an expression index, so
+    it is stored in a column maintained by a trigger instead."""
+    await con.execute("ALTER TABLE timer ADD PRIMARY KEY (id)")
+    await con.execute("CREATE INDEX timer_expires_idx ON timer (expires)")
+    # Compared as text, so timers with a non numeric char_id can't make queries fail.
+    await con.execute("""
+        CREATE INDEX timer_char_id_idx ON timer ((extra->>'char_id'), name)
+        WHERE type = 1 AND extra ? 'char_id'
+    """)
+    await con.execute("ALTER TABLE event ADD COLUMN notification timestamptz")
+    await update_notification_function(con)
+    await con.execute("""
+        CREATE TRIGGER update_event_notification
+        BEFORE INSERT OR UPDATE OF start, reminder ON event
+        FOR EACH ROW EXECUTE PROCEDURE update_event_notification();
+    """)
+    # Fires the trigger for existing rows.
+    await con.execute("UPDATE event SET reminder = reminder")
+    await con.execute("CREATE INDEX event_notification_idx ON event (notification) WHERE active AND reminder <= 3")
+
+
+async def migrate_v5(con: asyncpg.connection.Connection):
+    """Makes death triggers ignore rows being moved between partitions, and updates death statistics when deaths or
+    killers are deleted.
+
+    Deaths store the world their character was in when registered, so statistics are updated in the same world they
+    were counted in, even if the character changed world or was deleted since. When a death is deleted, its killers'
+    statistics are updated before deleting them, as the killers' trigger can no longer find the death by then."""
+    await con.execute("ALTER TABLE character_death ADD COLUMN world text")
+    await con.execute("""UPDATE character_death d SET world = c.world FROM "character" c
+                         WHERE c.id = d.character_id""")
+    await con.execute(f"""
+        CREATE OR REPLACE FUNCTION delete_death_killers() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            IF current_setting('{MOVING_ROWS_SETTING}', true) = 'on' THEN
+                RETURN OLD;
+            END IF;
+            UPDATE character_death_killer_stats s SET count = s.count - k.count
+            FROM (SELECT name, count(*) AS count FROM character_death_killer WHERE death_id = OLD.id GROUP BY name) k
+            WHERE s.world = COALESCE(OLD.world, (SELECT c.world FROM "character" c WHERE c.id = OLD.character_id), '')
+                AND s.day = (OLD.date AT TIME ZONE 'UTC')::date AND s.name = k.name;
+            DELETE FROM character_death_killer_stats WHERE day = (OLD.date AT TIME ZONE 'UTC')::date AND count <= 0;
+            DELETE FROM character_death_killer WHERE death_id = OLD.id;
+            DELETE FROM character_death_assist WHERE death_id = OLD.id;
+            RETURN OLD;
+        END;
+        $$;
+    """)
+    await con.execute(f"""
+        CREATE OR REPLACE FUNCTION update_death_stats() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            IF current_setting('{MOVING_ROWS_SETTING}', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO character_death_stats(world, day, character_id, count)
+                SELECT COALESCE(NEW.world, c.world, ''), (NEW.date AT TIME ZONE 'UTC')::date, NEW.character_id, 1
+                FROM "character" c WHERE c.id = NEW.character_id
+                ON CONFLICT (world, day, character_id)
+                DO UPDATE SET count = character_death_stats.count + 1;
+                RETURN NEW;
+            END IF;
+            UPDATE character_death_stats SET count = count - 1
+            WHERE character_id = OLD.character_id AND day = (OLD.date AT TIME ZONE 'UTC')::date
+                AND world = COALESCE(OLD.world, (SELECT c.world FROM "character" c WHERE c.id = OLD.character_id), '');
+            DELETE FROM character_death_stats
+            WHERE character_id = OLD.character_id AND day = (OLD.date AT TIME ZONE 'UTC')::date AND count <= 0;
+            RETURN OLD;
+        END;
+        $$;
+    """)
+    await con.execute(f"""
+        CREATE OR REPLACE FUNCTION update_death_killer_stats() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+        BEGIN
+            IF current_setting('{MOVING_ROWS_SETTING}', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO character_death_killer_stats(world, day, name, count)
+                SELECT COALESCE(d.world, c.world, ''), (d.date AT TIME ZONE 'UTC')::date, NEW.name, 1
+                FROM character_death d
+                LEFT JOIN "character" c ON c.id = d.character_id
+                WHERE d.id = NEW.death_id
+                ON CONFLICT (world, day, name)
+                DO UPDATE SET count = character_death_killer_stats.count + 1;
+                RETURN NEW;
+            END IF;
+            -- If the death itself was deleted, delete_death_killers already updated the statistics
+            UPDATE character_death_killer_stats s SET count = s.count - 1
+            FROM character_death d
+            LEFT JOIN "character" c ON c.id = d.character_id
+            WHERE d.id = OLD.death_id AND s.world = COALESCE(d.world, c.world, '')
+                AND s.day = (d.date AT TIME ZONE 'UTC')::date AND s.name = OLD.name;
+            DELETE FROM character_death_killer_stats WHERE name = OLD.name AND count <= 0;
+            RETURN OLD;
+        END;
+        $$;
+    """)
+    await con.execute("DROP TRIGGER update_character_death_stats ON character_death")
+    await con.execute("""
+        CREATE TRIGGER update_character_death_stats
+        AFTER INSERT OR DELETE ON character_death
+        FOR EACH ROW EXECUTE PROCEDURE update_death_stats();
+    """)
+    await con.execute("DROP TRIGGER update_character_death_killer_stats ON character_death_killer")
+    await con.execute("""
+        CREATE TRIGGER update_character_death_killer_stats
+        AFTER INSERT OR DELETE ON character_death_killer
+        FOR EACH ROW EXECUTE PROCEDURE update_death_killer_stats();
+    """)
+    await refresh_death_stats(con)
+
+
+migrations = {
+    2: migrate_v2,
+    3: migrate_v3,
+    4: migrate_v4,
+    5: migrate_v5,
+}
+"""Mapping of database versions to the coroutine function that updates the database to that version."""
+
+
 # Legacy SQLite migration
 # This may be removed in later versions or kept separate
 async def import_legacy_db(pool: asyncpg.pool.Pool, path):
@@ -0,0 +1,156 @@
+#  Copyright 2019 Allan Galarza
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Calculates the cost of imbuements, based on the prices of their materials."""
+import sqlite3
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+TIERS = ["Basic", "Intricate", "Powerful"]
+"""The imbuement tiers, in order."""
+FEES = [5000, 25000, 100000]
+"""The gold fee of each tier."""
+FEES_100 = [15000, 55000, 150000]
+"""The gold fee of each tier, with 100% success chance."""
+TOKENS = [2, 4, 6]
+"""The gold tokens needed to get the materials of each tier, including the materials of lower tiers."""
+TOKEN_TYPES = ["Vampirism", "Void", "Strike"]
+"""The imbuement types whose materials can be bought with gold tokens."""
+DURATION = 20
+"""The hours an imbuement lasts."""
+GOLD_TOKEN = "gold token"
+"""The name used to provide the price of gold tokens."""
+
+
+class ImbuementMaterial(NamedTuple):
+    """A material required by an imbuement."""
+    item_title: str
+    amount: int
+
+
+class ImbuementRecipe(NamedTuple):
+    """The materials required by an imbuement.
+
+    Materials are sorted by tier, every tier adding one material to the ones of lower tiers."""
+    title: str
+    type: str
+    tier: int
+    materials: Tuple[ImbuementMaterial, ...]
+
+    @property
+    def tokens_available(self) -> bool:
+        """Whether the materials can be bought with gold tokens."""
+        return self.type in TOKEN_TYPES
+
+
+class ImbuementCost(NamedTuple):
+    """The cost of an imbuement at certain prices.
+
+    Materials of the tiers up to :attr:`token_tier` are bought with gold tokens, and the rest are bought directly."""
+    recipe: ImbuementRecipe
+    prices: Tuple[int, ...]
+    """The price of each material."""
+    material_cost: int
+    """The cost of all materials."""
+    token_tier: int = -1
+    """The highest tier bought with gold tokens, or -1 if none."""
+    token_price: Optional[int] = None
+
+    @property
+    def total(self) -> int:
+        """The cost of the imbuement, including the fee."""
+        return self.material_cost + FEES[self.recipe.tier]
+
+    @property
+    def total_100(self) -> int:
+        """The cost of the imbuement, including the fee for 100% success chance."""
+        return self.material_cost + FEES_100[self.recipe.tier]
+
+    @property
+    def hourly(self) -> float:
+        """The cost per hour of the imbuement."""
+        return self.total / DURATION
+
+    @property
+    def hourly_100(self) -> float:
+        """The cost per hour of the imbuement, with 100% success chance."""
+        return self.total_100 / DURATION
+
+
+def load_imbuement_recipes(conn: sqlite3.Connection) -> Dict[str, ImbuementRecipe]:
+    """Loads the materials of every imbuement from the TibiaWiki database.
+
+    :param conn: A connection to the database.
+    :return: The imbuement recipes, by the imbuement's title.
+    """
+    rows = conn.execute("SELECT imbuement.title, imbuement.type, imbuement.tier, item.title as item_title, amount "
+                        "FROM imbuement_material "
+                        "INNER JOIN imbuement ON imbuement.article_id = imbuement_material.imbuement_id "
+                        "INNER JOIN item ON item.article_id = imbuement_material.item_id "
+                        "ORDER BY imbuement_material.rowid")
+    materials: Dict[str, List[ImbuementMaterial]] = {}
+    info = {}
+    for row in rows:
+        if row["tier"] not in TIERS:
+            continue
+        info[row["title"]] = (row["type"], TIERS.index(row["tier"]))
+        materials.setdefault(row["title"], []).append(ImbuementMaterial(row["item_title"], row["amount"]))
+    return {title: ImbuementRecipe(title, *info[title], tuple(materials[title])) for title in materials}
+
+
+def calculate_cost(recipe: ImbuementRecipe, prices: Sequence[int], token_price: int = None) -> ImbuementCost:
+    """Calculates the cheapest way to get an imbuement.
+
+    :param recipe: The imbuement's recipe.
+    :param prices: The price of each material, in the order of the recipe.
+    :param token_price: The price of gold tokens, if they should be considered.
+    :return: The imbuement's cost.
+    :raises ValueError: If not enough prices were provided.
+    """
+    if len(prices) < len(recipe.materials):
+        raise ValueError("Not enough material prices provided for this tier.")
+    prices = tuple(prices[:len(recipe.materials)])
+    # The cost of the materials of each tier, including lower tiers
+    tier_costs = []
+    cost = 0
+    for material, price in zip(recipe.materials, prices):
+        cost += material.amount * price
+        tier_costs.append(cost)
+    if token_price is None or not recipe.tokens_available:
+        return ImbuementCost(recipe, prices, cost)
+    # Materials up to a tier can be replaced with gold tokens, keep the cheapest option
+    best_cost, token_tier = cost, -1
+    for tier, tier_cost in enumerate(tier_costs):
+        option = token_price * TOKENS[tier] + cost - tier_cost
+        if option < best_cost:
+            best_cost, token_tier = option, tier
+    return ImbuementCost(recipe, prices, best_cost, token_tier, token_price)
+
+
+def rank_imbuements(recipes: Iterable[ImbuementRecipe], prices: Mapping[str, int]) -> List[ImbuementCost]:
+    """Calculates the cost of every imbuement whose materials have a known price, from cheapest to most expensive.
+
+    :param recipes: The imbuements to calculate.
+    :param prices: The price of each material, by its lowercase title. The price of gold tokens can be included too.
+    :return: The cost of the imbuements that could be calculated, sorted by their total cost.
+    """
+    token_price = prices.get(GOLD_TOKEN)
+    costs = []
+    for recipe in recipes:
+        try:
+            material_prices = [prices[m.item_title.lower()] for m in recipe.materials]
+        except KeyError:
+            continue
+        costs.append(calculate_cost(recipe, material_prices, token_price))
+    costs.sort(key=lambda c: (c.total, c.recipe.title))
+    return costs
@@ -15,7 +15,7 @@
 import asyncio
 import inspect
 import itertools
-from typing import Union
+from typing import AsyncIterator, Union
 
 import discord
 from discord.ext import commands
@@ -93,6 +93,13 @@ class Pages:
         else:
             self.permissions = self.channel.permissions_for(ctx.bot.user)
 
+        self.check_permissions()
+
+    def check_permissions(self):
+        """Checks if the bot has the required permissions to show and paginate entries.
+
+        :raise CannotPaginate: If a required permission is missing.
+        """
         if not self.permissions.embed_links:
             raise CannotPaginate('Bot does not have embed links permission.')
 
@@ -110,6 +117,11 @@ class Pages:
         base = (page - 1) * self.per_page
         return self.entries[base:base + self.per_page]
 
+    def get_footer_text(self, page):
+        if self.show_entry_count:
+            return f'Page {page}/{self.maximum_pages} ({len(self.entries)} entries)'
+        return f'Page {page}/{self.maximum_pages}'
+
     async def show_page(self, page, *, first=False):
         self.current_page = page
         entries = self.get_page(page)
@@ -121,12 +133,7 @@ class Pages:
                 p.append(f'{entry}')
 
         if self.maximum_pages > 1:
-            if self.show_entry_count:
-                text = f'Page {page}/{self.maximum_pages} ({len(self.entries)} entries)'
-            else:
-                text = f'Page {page}/{self.maximum_pages}'
-
-            self.embed.set_footer(text=text)
+            self.embed.set_footer(text=self.get_footer_text(page))
 
         if not self.paginating:
             # Added for NabBot
@@ -230,6 +237,89 @@ class Pages:
             await self.match()
 
 
+class LazyPages(Pages):
+    """A paginator that gets its entries from an asynchronous iterator, as pages are requested.
+
+    Only the entries needed to show the current page and to know if there's a next page are consumed.
+    Since the total of entries is unknown until the iterator is exhausted, the footer only shows the number of pages
+    loaded so far.
+
+    Before paginating, :meth:`prefetch` must be called, to know if there are any entries at all.
+    The source is closed once pagination ends, or once no more entries will be taken from it.
+
+    Parameters
+    ------------
+    ctx: Context
+        The context of the command.
+    source: AsyncIterator[str]
+        An asynchronous iterator of entries to paginate.
+    max_entries: int
+        The maximum number of entries to take from the source.
+    """
+    def __init__(self, ctx: NabCtx, *, source: AsyncIterator[str], max_entries=100, **kwargs):
+        super().__init__(ctx, entries=[], **kwargs)
+        self.source = source
+        self.max_entries = max_entries
+        self.exhausted = False
+
+    async def fill(self, count):
+        """Consumes entries from the source until the specified number of entries is loaded.
+
+        :param count: The number of entries that should be loaded.
+        :return: The number of entries loaded.
+        """
+        count = min(count, self.max_entries)
+        while not self.exhausted and len(self.entries) < count:
+            try:
+                self.entries.append(await self.source.__anext__())
+            except StopAsyncIteration:
+                self.exhausted = True
+        if len(self.entries) >= self.max_entries and not self.exhausted:
+            self.exhausted = True
+            await self.close()
+        pages, left_over = divmod(len(self.entries), self.per_page)
+        if left_over:
+            pages += 1
+        self.maximum_pages = pages
+        return len(self.entries)
+
+    async def prefetch(self):
+        """Loads the entries of the first page and checks if pagination will be needed.
+
+        :return: The number of entries loaded.
+        :raise CannotPaginate: If the bot is missing a permission required to paginate.
+        """
+        count = await self.fill(self.per_page + 1)
+        self.paginating = count > self.per_page
+        try:
+            self.check_permissions()
+        except CannotPaginate:
+            await self.close()
+            raise
+        return count
+
+    async def paginate(self):
+        try:
+            await super().paginate()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Closes the source, so any resources it holds are released."""
+        aclose = getattr(self.source, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    def get_footer_text(self, page):
+        if self.exhausted:
+            return super().get_footer_text(page)
+        return f'Page {page}/{self.maximum_pages}+'
+
+    async def show_page(self, page, *, first=False):
+        await self.fill(page * self.per_page + 1)
+        await super().show_page(page, first=first)
+
+
 class VocationPages(Pages):
     def __init__(self, ctx: NabCtx, *, entries, vocations, **kwargs):
         super().__init__(ctx, entries=entries, **kwargs)
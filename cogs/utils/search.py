@@ -0,0 +1,193 @@
+#  Copyright 2019 Allan Galarza
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from collections import defaultdict
+from typing import Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+SIMILARITY_THRESHOLD = 0.3
+"""The minimum trigram similarity for a fuzzy match to be considered."""
+
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+RANK_FUZZY = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """Gets the set of trigrams in a text.
+
+    The text is expected to be normalized already.
+
+    :param text: The text to split.
+    :return: A set with every substring of three characters of the text.
+    """
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(text: str) -> Set[str]:
+    """Gets the set of trigrams of every word in a text, padding the words to weigh their start and end.
+
+    These are used to measure similarity, as short words would otherwise share too few trigrams.
+
+    :param text: The text to split.
+    :return: A set with the trigrams of the padded words.
+    """
+    return {gram for word in text.split() for gram in trigrams(f"  {word} ")}
+
+
+def normalize(text: Optional[str]) -> str:
+    """Normalizes a text for indexing and searching."""
+    return " ".join(text.lower().split()) if text else ""
+
+
+class SearchResult(Generic[T]):
+    """A match of a search in a :class:`TrigramIndex`.
+
+    :ivar entry: The matched entry.
+    :ivar rank: How the entry matched, lower is better.
+    :ivar score: The similarity of the term with the entry, for fuzzy matches.
+    """
+    __slots__ = ("entry", "rank", "score")
+
+    def __init__(self, entry: T, rank: int, score: float = 1.0):
+        self.entry = entry
+        self.rank = rank
+        self.score = score
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} entry={self.entry!r} rank={self.rank} score={self.score:.2f}>"
+
+    @property
+    def exact(self) -> bool:
+        """Whether the entry matched the term exactly."""
+        return self.rank == RANK_EXACT
+
+
+class TrigramIndex(Generic[T]):
+    """An in-memory index to search entries by one or more text fields.
+
+    Matches are ranked by exact matches first, followed by prefix matches, substring matches, and finally fuzzy
+    matches, based on the trigrams shared with the search term.
+    Matches in the same rank are sorted by the length of their first field, and then by insertion order.
+    """
+    def __init__(self):
+        self.entries: List[T] = []
+        self._fields: List[Tuple[str, ...]] = []
+        self._postings: Dict[str, Set[Tuple[int, int]]] = defaultdict(set)
+        self._word_postings: Dict[str, Set[Tuple[int, int]]] = defaultdict(set)
+        self._sizes: Dict[Tuple[int, int], int] = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry: T, *fields: Optional[str]):
+        """Adds an entry to the index.
+
+        :param entry: The entry to add.
+        :param fields: The texts the entry can be found by.
+        """
+        idx = len(self.entries)
+        self.entries.append(entry)
+        normalized = tuple(normalize(f) for f in fields)
+        self._fields.append(normalized)
+        for field_idx, text in enumerate(normalized):
+            doc = (idx, field_idx)
+            for gram in trigrams(text):
+                self._postings[gram].add(doc)
+            grams = word_trigrams(text)
+            self._sizes[doc] = len(grams)
+            for gram in grams:
+                self._word_postings[gram].add(doc)
+
+    def search(self, term: str, limit: int = 15, *, fuzzy=True) -> List[SearchResult[T]]:
+        """Searches entries matching a term.
+
+        :param term: The term to search.
+        :param limit: The maximum number of results to return.
+        :param fuzzy: Whether to look for similar entries if there are no direct matches.
+        :return: The matching entries, sorted by relevance.
+        """
+        term = normalize(term)
+        if not term:
+            return []
+        grams = trigrams(term)
+        if grams:
+            candidates = set.intersection(*(self._postings.get(g, set()) for g in grams))
+            entries = {idx for idx, _ in candidates}
+        else:
+            entries = range(len(self.entries))
+        ranks = {}
+        for idx in entries:
+            matches = [r for r in (self._rank(term, text) for text in self._fields[idx]) if r is not None]
+            if matches:
+                ranks[idx] = min(matches)
+        if ranks:
+            ordered = sorted(ranks, key=lambda i: (ranks[i], len(self._fields[i][0]), i))
+            return [SearchResult(self.entries[i], ranks[i]) for i in ordered[:limit]]
+        if not fuzzy:
+            return []
+        return self._search_similar(word_trigrams(term), limit)
+
+    def similar(self, term: str, limit: int = 5) -> List[SearchResult[T]]:
+        """Searches entries similar to a term, regardless of whether there are direct matches or not.
+
+        Only the trigram postings of the term are visited, so it is fast enough to run on every failed search.
+
+        :param term: The term to search.
+        :param limit: The maximum number of results to return.
+        :return: The similar entries, sorted by their similarity score.
+        """
+        term = normalize(term)
+        if not term:
+            return []
+        return self._search_similar(word_trigrams(term), limit)
+
+    def _search_similar(self, grams: Set[str], limit: int) -> List[SearchResult[T]]:
+        hits = defaultdict(int)
+        for gram in grams:
+            for doc in self._word_postings.get(gram, ()):
+                hits[doc] += 1
+        scores = {}
+        for doc, shared in hits.items():
+            score = shared / (len(grams) + self._sizes[doc] - shared)
+            idx = doc[0]
+            if score >= SIMILARITY_THRESHOLD and score > scores.get(idx, 0):
+                scores[idx] = score
+        ordered = sorted(scores, key=lambda i: (-scores[i], len(self._fields[i][0]), i))
+        return [SearchResult(self.entries[i], RANK_FUZZY, scores[i]) for i in ordered[:limit]]
+
+    @staticmethod
+    def _rank(term: str, text: str) -> Optional[int]:
+        if text == term:
+            return RANK_EXACT
+        if text.startswith(term):
+            return RANK_PREFIX
+        if term in text:
+            return RANK_SUBSTRING
+        return None
+
+
+def build_index(entries: Iterable[T], *fields: str) -> TrigramIndex[T]:
+    """Builds an index from a collection of mappings.
+
+    :param entries: The entries to index.
+    :param fields: The keys of the entries to index.
+    :return: The built index.
+    """
+    index = TrigramIndex()
+    for entry in entries:
+        index.add(entry, *(entry[f] for f in fields))
+    return index
@@ -21,9 +21,10 @@ from collections import defaultdict
 
 import math
 import re
+import threading
 import urllib.parse
 from html.parser import HTMLParser
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 import aiohttp
 import asyncpg
@@ -36,7 +37,7 @@ from tibiapy import Category, Character, Guild, Highscores, House, ListedWorld,
 
 from cogs.utils.timing import get_local_timezone
 from . import config, errors, online_characters
-from .database import DbChar, wiki_db
+from .database import DbChar, wiki
 
 log = logging.getLogger("nabbot")
 
@@ -139,6 +140,17 @@ CACHE_NEWS = cachetools.TTLCache(100, 1800)
 CACHE_WORLD_LIST = cachetools.TTLCache(1, 120)
 CACHE_BOSSES = cachetools.TTLCache(100, 3600)
 
+# Map tiles and rendered map areas
+MAP_TILE_SIZE = 256
+CACHE_MAP_TILES: Dict[Tuple[int, int, int], Optional[Image.Image]] = {}
+"""Tiles of the loaded map floors, keyed by floor and tile coordinates. Blank tiles are stored as None.
+
+Tiles are kept until the map cache is cleared, so every floor is only decoded once."""
+CACHE_MAP_AREAS = cachetools.LRUCache(256)
+"""Rendered map areas, keyed by their coordinates, size, scale and whether they have a crosshair."""
+_map_floors: Dict[int, 'MapFloor'] = {}
+_map_lock = threading.Lock()
+
 
 class NabChar(Character):
     """Adds extra attributes to the Character class."""
@@ -205,7 +217,7 @@ async def get_character(bot, name, *, tries=5) -> Optional[NabChar]:
         return None
 
     if character.house:
-        house_id = get_house_id(character.house.name)
+        house_id = await get_house_id(character.house.name)
         if house_id:
             character.house.id = house_id
 
@@ -324,12 +336,12 @@ async def get_highscores(world, category=Category.EXPERIENCE, vocation=VocationF
     return highscores
 
 
-def get_house_id(name) -> Optional[int]:
+async def get_house_id(name) -> Optional[int]:
     """Gets the house id of a house with a given name.
 
     Name is lowercase."""
     try:
-        return wiki_db.execute("SELECT house_id FROM house WHERE name LIKE ?", (name,)).fetchone()["house_id"]
+        return (await wiki.fetchone("SELECT house_id FROM house WHERE name LIKE ?", (name,)))["house_id"]
     except (AttributeError, KeyError, TypeError):
         log.debug(f"Couldn't find house_id of house '{name}'")
         return None
@@ -675,14 +687,9 @@ def get_current_server_save_time(current_time: Optional[dt.datetime] = None) ->
     return current_ss
 
 
-def get_rashid_city() -> Dict[str, Union[str, int]]:
-    """Returns a dictionary with rashid's info
-
-    Dictionary contains: the name of the week, city and x,y,z, positions."""
-    c = wiki_db.cursor()
-    c.execute("SELECT * FROM rashid_position WHERE day = ?", (get_tibia_weekday(),))
-    info = c.fetchone()
-    c.close()
+async def get_rashid_city() -> str:
+    """Returns the city where Rashid is today."""
+    info = await wiki.fetchone("SELECT city FROM rashid_position WHERE day = ?", (get_tibia_weekday(),))
     return info["city"]
 
 
@@ -879,6 +886,80 @@ async def bind_database_character(bot, character: NabChar):
             bot.dispatch("character_guild_change", character, db_char.guild)
 
 
+class MapFloor(NamedTuple):
+    """The properties of a map floor's image, needed to put its tiles back together."""
+    mode: str
+    palette: Optional[List[int]]
+    size: Tuple[int, int]
+
+
+def load_map_floor(z: int) -> MapFloor:
+    """Decodes the image of a map floor and splits it into tiles, storing all of them in the cache.
+
+    :param z: The floor to load.
+    :return: The floor's image properties.
+    """
+    result = wiki.execute("SELECT image FROM map WHERE z = ?", (z,)).fetchone()
+    im = Image.open(io.BytesIO(bytearray(result['image'])))
+    im.load()
+    floor = MapFloor(im.mode, im.getpalette() if im.mode == "P" else None, im.size)
+    width, height = im.size
+    for ty in range(0, math.ceil(height / MAP_TILE_SIZE)):
+        for tx in range(0, math.ceil(width / MAP_TILE_SIZE)):
+            left, top = tx * MAP_TILE_SIZE, ty * MAP_TILE_SIZE
+            tile = im.crop((left, top, left + MAP_TILE_SIZE, top + MAP_TILE_SIZE))
+            CACHE_MAP_TILES[(z, tx, ty)] = tile if tile.getbbox() else None
+    _map_floors[z] = floor
+    return floor
+
+
+def clear_map_cache():
+    """Clears the cached map tiles and areas, so they are loaded again from the TibiaWiki database."""
+    with _map_lock:
+        _map_floors.clear()
+        CACHE_MAP_TILES.clear()
+        CACHE_MAP_AREAS.clear()
+
+
+def get_map_tile(z: int, tx: int, ty: int) -> Optional[Image.Image]:
+    """Gets a tile of a map floor, loading the floor if it hasn't been loaded yet.
+
+    :param z: The floor of the tile.
+    :param tx: The horizontal index of the tile.
+    :param ty: The vertical index of the tile.
+    :return: The tile's image, or None if the tile is blank.
+    """
+    if z not in _map_floors:
+        load_map_floor(z)
+    return CACHE_MAP_TILES.get((z, tx, ty))
+
+
+def get_map_region(z: int, left: int, top: int, right: int, bottom: int) -> Image.Image:
+    """Gets a region of a map floor, built from the tiles it covers.
+
+    Parts of the region out of the map's bounds are left blank.
+
+    :param z: The floor.
+    :param left: The left coordinate of the region.
+    :param top: The top coordinate of the region.
+    :param right: The right coordinate of the region, exclusive.
+    :param bottom: The bottom coordinate of the region, exclusive.
+    :return: The image of the region.
+    """
+    with _map_lock:
+        floor = _map_floors.get(z) or load_map_floor(z)
+        width, height = floor.size
+        im = Image.new(floor.mode, (right - left, bottom - top))
+        if floor.palette is not None:
+            im.putpalette(floor.palette)
+        for ty in range(max(top, 0) // MAP_TILE_SIZE, (min(bottom, height) - 1) // MAP_TILE_SIZE + 1):
+            for tx in range(max(left, 0) // MAP_TILE_SIZE, (min(right, width) - 1) // MAP_TILE_SIZE + 1):
+                tile = get_map_tile(z, tx, ty)
+                if tile is not None:
+                    im.paste(tile, (tx * MAP_TILE_SIZE - left, ty * MAP_TILE_SIZE - top))
+    return im
+
+
 def get_map_area(x, y, z, size=15, scale=8, crosshair=True, client_coordinates=True):
     """Gets a minimap picture of a map area
 
@@ -886,16 +967,17 @@ def get_map_area(x, y, z, size=15, scale=8, crosshair=True, client_coordinates=T
     scale is how much the image will be streched (1 = 1 sqm = 1 pixel)
     client_coordinates means the coordinate origin used is the same used for the Tibia Client
         If set to False, the origin will be based on the top left corner of the map.
+
+    Only the map tiles covering the area are used, and rendered areas are cached.
     """
     if client_coordinates:
         x -= 124 * 256
         y -= 121 * 256
-    c = wiki_db.cursor()
-    c.execute("SELECT * FROM m"
-              "ap WHERE z LIKE ?", (z,))
-    result = c.fetchone()
-    im = Image.open(io.BytesIO(bytearray(result['image'])))
-    im = im.crop((x - size, y - size, x + size, y + size))
+    key = (x, y, z, size, scale, crosshair)
+    img_byte_arr = CACHE_MAP_AREAS.get(key)
+    if img_byte_arr is not None:
+        return img_byte_arr
+    im = get_map_region(z, x - size, y - size, x + size, y + size)
     im = im.resize((size * scale, size * scale))
     if crosshair:
         draw = ImageDraw.Draw(im)
@@ -906,6 +988,7 @@ def get_map_area(x, y, z, size=15, scale=8, crosshair=True, client_coordinates=T
     img_byte_arr = io.BytesIO()
     im.save(img_byte_arr, format='png')
     img_byte_arr = img_byte_arr.getvalue()
+    CACHE_MAP_AREAS[key] = img_byte_arr
     return img_byte_arr
 
 
@@ -0,0 +1,185 @@
+#  Copyright 2019 Allan Galarza
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Precomputed information of the images in the TibiaWiki database.
+
+Decoding images to get their colours is too slow to do on every command, so it is done once, offline, every time the
+TibiaWiki database is updated, storing the results in a sidecar database::
+
+    python launcher.py wikiimages
+"""
+import io
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from typing import NamedTuple, Optional, Tuple
+
+from PIL import Image
+
+from . import average_color, most_frequent_color
+from .database import WIKIDB, SqliteDatabase, connect_sqlite
+
+log = logging.getLogger("nabbot")
+
+WIKI_IMAGES_DB = "data/tibiawiki_images.db"
+
+IMAGE_TABLES = ["creature", "item", "npc", "imbuement"]
+"""The TibiaWiki tables whose images are precomputed."""
+THUMBNAIL_SIZE = 64
+"""The size in pixels of the side of normalized thumbnails."""
+
+SCHEMA = """
+CREATE TABLE image_info (
+    "table" TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    average_color INTEGER,
+    dominant_color INTEGER,
+    thumbnail BLOB NOT NULL,
+    extension TEXT NOT NULL,
+    PRIMARY KEY ("table", article_id)
+);
+CREATE TABLE source (
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+class ImageInfo(NamedTuple):
+    """The precomputed information of an article's image."""
+    thumbnail: bytes
+    extension: str
+    average_color: Optional[int]
+    dominant_color: Optional[int]
+
+
+def pack_color(color: Optional[Tuple[int, int, int]]) -> Optional[int]:
+    """Packs RGB components into a single integer."""
+    if color is None:
+        return None
+    r, g, b = color
+    return (r << 16) + (g << 8) + b
+
+
+def make_thumbnail(image: Image.Image, data: bytes) -> Tuple[bytes, str]:
+    """Normalizes the size of an image, to be used as an embed's thumbnail.
+
+    The image is centered in a square transparent canvas and scaled up by an integer factor, so pixels are kept sharp.
+    Animated images are kept as they are.
+
+    :param image: The decoded image.
+    :param data: The image's original content.
+    :return: The thumbnail's content and its file extension.
+    """
+    if getattr(image, "is_animated", False):
+        return data, image.format.lower() if image.format else "gif"
+    image = image.convert("RGBA")
+    side = max(image.size)
+    canvas = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+    canvas.paste(image, ((side - image.width) // 2, (side - image.height) // 2))
+    factor = max(1, THUMBNAIL_SIZE // side)
+    if factor > 1:
+        canvas = canvas.resize((side * factor, side * factor), Image.NEAREST)
+    output = io.BytesIO()
+    canvas.save(output, format="png")
+    return output.getvalue(), "png"
+
+
+def build_image_info(source: str = WIKIDB, path: str = WIKI_IMAGES_DB) -> int:
+    """Builds the image information database from the TibiaWiki database.
+
+    The database is built in a temporary file first, replacing the previous one once complete.
+
+    :param source: The path to the TibiaWiki database.
+    :param path: The path where the image information database will be saved.
+    :return: The number of images processed.
+    """
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    stat = os.stat(source)
+    count = 0
+    with closing(connect_sqlite(source, immutable=False)) as wiki_conn, closing(sqlite3.connect(temp_path)) as conn:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO source(mtime, size) VALUES(?, ?)", (stat.st_mtime_ns, stat.st_size))
+        for table in IMAGE_TABLES:
+            rows = wiki_conn.execute(f"SELECT article_id, image FROM {table} WHERE image IS NOT NULL")
+            for row in rows:
+                try:
+                    image = Image.open(io.BytesIO(row["image"]))
+                    thumbnail, extension = make_thumbnail(image, row["image"])
+                    colors = pack_color(average_color(image)), pack_color(most_frequent_color(image))
+                except (OSError, ValueError, ZeroDivisionError):
+                    log.warning(f"Could not process image of {table} {row['article_id']}")
+                    continue
+                conn.execute('INSERT INTO image_info("table", article_id, average_color, dominant_color, thumbnail, '
+                             'extension) VALUES(?, ?, ?, ?, ?, ?)',
+                             (table, row["article_id"], *colors, thumbnail, extension))
+                count += 1
+            log.info(f"Processed images of table {table}")
+        conn.commit()
+    os.replace(temp_path, path)
+    return count
+
+
+class WikiImages:
+    """Reads the precomputed image information.
+
+    Information is only returned while it matches the current TibiaWiki database file. The file is only checked again
+    when the TibiaWiki database is reloaded.
+
+    :param path: The path to the image information database.
+    :param source: The TibiaWiki database the information must match.
+    """
+    def __init__(self, path: str = WIKI_IMAGES_DB, source: SqliteDatabase = None):
+        self.path = path
+        self.source = source
+        self.db = SqliteDatabase(path, workers=1, immutable=False)
+        row = self.db.execute("SELECT mtime, size FROM source").fetchone()
+        self.source_signature = (row["mtime"], row["size"]) if row else None
+        self._checked_generation: Optional[int] = None
+        self._current = False
+
+    @property
+    def current(self) -> bool:
+        """Whether the information matches the current TibiaWiki database file."""
+        if self.source is None:
+            return True
+        if self._checked_generation != self.source.generation:
+            try:
+                self._current = self.source.file_signature() == self.source_signature
+            except FileNotFoundError:
+                self._current = False
+            self._checked_generation = self.source.generation
+        return self._current
+
+    async def get(self, table: str, article_id: int) -> Optional[ImageInfo]:
+        """Gets the information of an article's image.
+
+        :param table: The article's table.
+        :param article_id: The article's id.
+        :return: The image's information, or None if it wasn't precomputed or is outdated.
+        """
+        if not self.current:
+            return None
+        row = await self.db.fetchone('SELECT thumbnail, extension, average_color, dominant_color FROM image_info '
+                                     'WHERE "table" = ? AND article_id = ?', (table, article_id))
+        if row is None:
+            return None
+        return ImageInfo(row["thumbnail"], row["extension"], row["average_color"], row["dominant_color"])
+
+    def close(self):
+        """Closes the database."""
+        self.db.close()
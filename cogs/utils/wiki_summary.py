@@ -0,0 +1,123 @@
+#  Copyright 2019 Allan Galarza
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Aggregated information of the TibiaWiki database.
+
+The database only changes when it is updated, so aggregates are calculated once per database file and kept in memory.
+"""
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from .imbuements import ImbuementRecipe, load_imbuement_recipes
+
+SUMMARY_TABLES = ["achievement", "charm", "creature", "creature_drop", "house", "imbuement", "item", "item_attribute",
+                  "item_key", "npc", "npc_offer_buy", "npc_offer_sell", "npc_destination", "npc_spell", "quest",
+                  "spell"]
+"""Tables whose rows are counted."""
+
+BESTIARY_LEVELS = ["Trivial", "Easy", "Medium", "Hard"]
+"""The bestiary difficulty levels, in order."""
+
+
+class BestiaryCreature(NamedTuple):
+    """A creature in a bestiary class."""
+    title: str
+    level: Optional[str]
+
+
+class WikiSummary:
+    """Aggregated information of a TibiaWiki database.
+
+    :ivar version: The version of tibiawiki-sql that generated the database.
+    :ivar timestamp: The unix timestamp of when the database was generated.
+    :ivar counts: The number of rows of every table in :data:`SUMMARY_TABLES`.
+    :ivar bestiary: The creatures of every bestiary class, sorted by class name and then by difficulty.
+    :ivar item_types: The number of items of every type.
+    :ivar imbuements: The materials of every imbuement, by the imbuement's title.
+    """
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.timestamp: Optional[float] = None
+        self.counts: Dict[str, int] = {}
+        self.bestiary: Dict[str, List[BestiaryCreature]] = OrderedDict()
+        self.item_types: Dict[str, int] = {}
+        self.imbuements: Dict[str, ImbuementRecipe] = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} version={self.version!r} timestamp={self.timestamp!r}>"
+
+    @property
+    def bestiary_classes(self) -> Dict[str, int]:
+        """The bestiary classes and how many creatures each has."""
+        return OrderedDict((name, len(creatures)) for name, creatures in self.bestiary.items())
+
+    def get_bestiary_creatures(self, _class: str) -> List[BestiaryCreature]:
+        """Gets the creatures that belong to a bestiary class.
+
+        :param _class: The name of the class, case insensitive.
+        :return: The creatures in the class, sorted by difficulty.
+        """
+        _class = _class.lower()
+        for name, creatures in self.bestiary.items():
+            if name.lower() == _class:
+                return creatures
+        return []
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection) -> 'WikiSummary':
+        """Calculates the summary of a TibiaWiki database.
+
+        :param conn: A connection to the database.
+        :return: The database's summary.
+        """
+        summary = cls()
+        for row in cls._fetch(conn, "SELECT key, value FROM database_info"):
+            if row["key"] == "version":
+                summary.version = row["value"]
+            elif row["key"] == "timestamp":
+                summary.timestamp = float(row["value"])
+        for table in SUMMARY_TABLES:
+            rows = cls._fetch(conn, f"SELECT COUNT(*) as count FROM {table}")
+            summary.counts[table] = int(rows[0]["count"]) if rows else 0
+        rows = cls._fetch(conn, "SELECT title, bestiary_class, bestiary_level FROM creature "
+                                "WHERE bestiary_class IS NOT NULL ORDER BY bestiary_class")
+        for row in rows:
+            summary.bestiary.setdefault(row["bestiary_class"], []).append(
+                BestiaryCreature(row["title"], row["bestiary_level"]))
+        for creatures in summary.bestiary.values():
+            creatures.sort(key=cls._level_order)
+        rows = cls._fetch(conn, "SELECT type, COUNT(*) as count FROM item WHERE type IS NOT NULL GROUP BY type "
+                                "ORDER BY count DESC")
+        summary.item_types = OrderedDict((row["type"], row["count"]) for row in rows)
+        try:
+            summary.imbuements = load_imbuement_recipes(conn)
+        except sqlite3.OperationalError:
+            pass
+        return summary
+
+    @staticmethod
+    def _level_order(creature: BestiaryCreature) -> int:
+        try:
+            return BESTIARY_LEVELS.index(creature.level)
+        except ValueError:
+            return len(BESTIARY_LEVELS)
+
+    @staticmethod
+    def _fetch(conn: sqlite3.Connection, query: str) -> List[sqlite3.Row]:
+        # Databases generated by older versions may be missing some tables or columns
+        try:
+            return conn.execute(query).fetchall()
+        except sqlite3.OperationalError:
+            return []
@@ -13,6 +13,7 @@
 #  limitations under the License.
 
 import asyncio
+import datetime as dt
 import json
 import logging
 import os
@@ -21,7 +22,10 @@ from logging.handlers import TimedRotatingFileHandler
 import asyncpg
 import click
 
-from cogs.utils.database_migration import check_database, drop_tables, import_legacy_db
+from cogs.utils.database import WIKIDB
+from cogs.utils.database_migration import check_database, create_partitions, detach_partitions, drop_tables, \
+    import_legacy_db
+from cogs.utils.wiki_images import WIKI_IMAGES_DB, build_image_info
 from nabbot import NabBot
 
 os.makedirs("logs", exist_ok=True)
@@ -165,6 +169,54 @@ def empty():
     log.info("Database cleared")
 
 
+@main.command()
+@click.option('-m', '--months', help="Number of future months to create partitions for.", default=3)
+@click.option('-d', '--detach', help="Detach partitions older than this number of months.", type=click.IntRange(1),
+              default=None)
+@click.option('--drop/--no-drop', help="Drop the detached partitions instead of keeping them as tables.",
+              default=False)
+def partitions(months, detach, drop):
+    """Manages the monthly partitions of deaths and level ups.
+
+    Creates partitions for the current month and the following months.
+    Optionally, partitions older than a number of months can be detached, to keep them out of recent queries."""
+    loop = asyncio.get_event_loop()
+    pool: asyncpg.pool.Pool = loop.run_until_complete(create_pool(get_uri(), command_timeout=240))
+    if pool is None:
+        log.error('Could not set up PostgreSQL. Exiting.')
+        return
+
+    async def run():
+        async with pool.acquire() as con:
+            await create_partitions(con, months)
+            if detach is None:
+                return
+            before = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=detach*30)
+            detached = await detach_partitions(con, before, drop)
+            log.info(f"{len(detached):,} partitions {'dropped' if drop else 'detached'}.")
+
+    if drop and detach is not None:
+        confirm = click.confirm(f"You are about to drop all partitions older than {detach} months.\n"
+                                "Are you sure you want to continue? This action is irreversible.")
+        if not confirm:
+            log.warning("Operation aborted.")
+            return
+    loop.run_until_complete(run())
+    log.info("Partitions updated")
+
+
+@main.command()
+@click.option('-s', '--source', help="Path to the TibiaWiki database.", default=WIKIDB)
+@click.option('-o', '--output', help="Path where the image information will be saved.", default=WIKI_IMAGES_DB)
+def wikiimages(source, output):
+    """Precomputes the colours and thumbnails of TibiaWiki images.
+
+    This must be done every time the TibiaWiki database is updated, otherwise, images are processed as needed."""
+    log.info("Processing TibiaWiki images...")
+    count = build_image_info(source, output)
+    log.info(f"{count:,} images processed")
+
+
 @main.command()
 @click.option('-path', '--path', help="Name for the database file.", default="data/users.db")
 def migrate(path):